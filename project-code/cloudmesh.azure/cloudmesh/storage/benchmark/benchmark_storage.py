@@ -0,0 +1,274 @@
+###############################################################
+# python benchmark_storage.py --blobs 1000,10000,100000 --workers 1,8,32
+#
+# Measures list, search, get, put and delete of the azureblob Provider
+# on synthetic trees of 10^3 to 10^6 blobs with mixed sizes. The blobs
+# live in the FakeBlobService of the provider, which can be given a latency,
+# bandwidth and capacity, so two runs with the same options can be
+# compared. Every tree size and concurrency level runs in its own process
+# so that its peak memory is its own. The result is printed as JSON.
+#
+# list   lists every leaf folder of 100 blobs
+# search searches every top folder of 10000 blobs for *7.bin
+# get    downloads --sample single blobs
+# put    uploads --sample single files
+# delete deletes every leaf folder
+###############################################################
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+from cloudmesh.storage.StorageABC import StorageABC
+from cloudmesh.storage.provider.azureblob.BlobFake import FakeBlobService
+from cloudmesh.storage.provider.azureblob.BlobThrottle import \
+    ThrottledService
+from cloudmesh.storage.provider.azureblob.Provider import Provider
+
+LEAF = 100
+TOP = 10000
+
+
+def parse_mix(mix):
+    # "1024:80,65536:20" -> [(1024, 80), (65536, 20)]
+    return [tuple(int(value) for value in part.split(':'))
+            for part in mix.split(',')]
+
+
+def blob_name(index):
+    return "bench/{top:03d}/{leaf:02d}/{index:07d}.bin".format(
+        top=index // TOP, leaf=index // LEAF % (TOP // LEAF), index=index)
+
+
+def percentile(values, fraction):
+    if len(values) == 0:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def failed(result):
+    if result is None:
+        return True
+    if isinstance(result, list):
+        return any(entry.get("cm", {}).get("status") == "failed"
+                   for entry in result)
+    return False
+
+
+def measure(op, calls, workers):
+    """
+    Runs the calls with workers threads
+
+    :param op: the name of the operation
+    :param calls: list of (function, bytes moved by the call)
+    :param workers: the number of concurrent calls
+    :return: dict with the throughput and latency of the calls
+    """
+
+    def timed(call):
+        function, size = call
+        start = time.perf_counter()
+        try:
+            result = function()
+            error = failed(result)
+        except Exception:
+            result, error = None, True
+        items = len(result) if isinstance(result, list) else 0
+        return time.perf_counter() - start, items, size, error
+
+    latencies = []
+    items = size = errors = 0
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for latency, call_items, call_size, error in executor.map(
+                    timed, calls):
+                latencies.append(latency)
+                items += call_items
+                size += call_size
+                errors += error
+    seconds = time.perf_counter() - start
+    return {
+        "op": op,
+        "ops": len(calls),
+        "items": items,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "ops_per_s": round(len(calls) / seconds, 1),
+        "items_per_s": round(items / seconds, 1),
+        "mb_per_s": round(size / seconds / 1024 / 1024, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def provider_for(service, workers):
+    def init(self, service=None, config=None):
+        self.credentials = {
+            "account_name": "benchmark",
+            "account_key": "YmVuY2htYXJr",
+            "container": "benchmark",
+            "max_workers": workers
+        }
+
+    StorageABC.__init__ = init
+    provider = Provider(service="azure")
+    provider.storage_service = ThrottledService(
+        service, provider.controller, limiter=provider.limiter)
+    return provider
+
+
+def run(args):
+    blobs, workers = args.blobs, args.workers
+    generator = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    contents = {size: os.urandom(size) for size, weight in mix}
+
+    def pick():
+        return generator.choices([size for size, weight in mix],
+                                 [weight for size, weight in mix])[0]
+
+    service = FakeBlobService(latency=args.latency, jitter=args.jitter,
+                              bandwidth=args.bandwidth,
+                              capacity=args.capacity, seed=args.seed)
+    start = time.perf_counter()
+    sizes = {}
+    for index in range(blobs):
+        size = pick()
+        sizes[blob_name(index)] = size
+        service.add(blob_name(index), contents[size])
+    setup = time.perf_counter() - start
+    provider = provider_for(service, workers)
+
+    leaves = ["/bench/{top:03d}/{leaf:02d}".format(
+        top=index // TOP, leaf=index // LEAF % (TOP // LEAF))
+        for index in range(0, blobs, LEAF)]
+    tops = sorted(set(leaf[:len("/bench/000")] for leaf in leaves))
+    sample = generator.sample(range(blobs), min(args.sample, blobs))
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        results.append(measure("list", [
+            (lambda leaf=leaf: provider.list(source=leaf), 0)
+            for leaf in leaves], workers))
+        results.append(measure("search", [
+            (lambda top=top: provider.search(directory=top,
+                                             filename="*7.bin",
+                                             recursive=True), 0)
+            for top in tops], workers))
+
+        downloads = os.path.join(directory, "get")
+        os.mkdir(downloads)
+        results.append(measure("get", [
+            (lambda index=index: provider.get(
+                source="/" + blob_name(index),
+                destination=os.path.join(downloads, str(index))),
+             sizes[blob_name(index)])
+            for index in sample], workers))
+
+        uploads = os.path.join(directory, "put")
+        os.mkdir(uploads)
+        calls = []
+        for index in sample:
+            size = pick()
+            path = os.path.join(uploads, "{index:07d}.bin".format(
+                index=index))
+            with open(path, 'wb') as stream:
+                stream.write(contents[size])
+            calls.append((lambda path=path: provider.put(
+                source=path, destination="/put"), size))
+        results.append(measure("put", calls, workers))
+
+        results.append(measure("delete", [
+            (lambda leaf=leaf: provider.delete(source=leaf, recursive=True),
+             0)
+            for leaf in leaves], workers))
+
+    return {
+        "blobs": blobs,
+        "workers": workers,
+        "setup_s": round(setup, 3),
+        "requests": sum(service.calls.values()),
+        "throttled": service.throttled,
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blobs", default="1000,10000,100000",
+                        help="comma separated sizes of the trees")
+    parser.add_argument("--workers", default="1,8,32",
+                        help="comma separated concurrency levels")
+    parser.add_argument("--sample", type=int, default=500,
+                        help="number of blobs of get and put")
+    parser.add_argument("--mix", default="1024:80,65536:15,1048576:5",
+                        help="blob sizes in bytes and their weights")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="most seconds added to the latency")
+    parser.add_argument("--bandwidth", type=int,
+                        help="bytes per second of all requests")
+    parser.add_argument("--capacity", type=int,
+                        help="concurrent requests before 503 ServerBusy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON to this file")
+    parser.add_argument("--run", action="store_true",
+                        help="run a single tree size and concurrency level "
+                             "in this process")
+    args = parser.parse_args()
+
+    if args.run:
+        args.blobs = int(args.blobs)
+        args.workers = int(args.workers)
+        print(json.dumps(run(args)))
+        return
+
+    options = ["--sample", str(args.sample), "--mix", args.mix,
+               "--latency", str(args.latency), "--jitter", str(args.jitter),
+               "--seed", str(args.seed)]
+    if args.bandwidth:
+        options += ["--bandwidth", str(args.bandwidth)]
+    if args.capacity:
+        options += ["--capacity", str(args.capacity)]
+    runs = []
+    for blobs in args.blobs.split(','):
+        for workers in args.workers.split(','):
+            output = subprocess.check_output(
+                [sys.executable, __file__] + options +
+                ["--blobs", blobs, "--workers", workers, "--run"])
+            runs.append(json.loads(output.decode().splitlines()[-1]))
+    report = json.dumps({
+        "config": {
+            "sample": args.sample,
+            "mix": args.mix,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "bandwidth": args.bandwidth,
+            "capacity": args.capacity,
+            "seed": args.seed
+        },
+        "runs": runs
+    }, indent=2)
+    if args.output:
+        with open(args.output, 'w') as stream:
+            stream.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
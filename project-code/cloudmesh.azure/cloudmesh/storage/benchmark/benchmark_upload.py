@@ -0,0 +1,115 @@
+###############################################################
+# python benchmark_upload.py --size 1024 --block 8
+#
+# Compares the CPU time and the peak memory of a block upload that reads
+# the blocks into bytes with one that sends slices of a memory mapping.
+# The blocks are consumed by a service that reads them like the HTTP
+# client and discards them, every mode runs in its own process so that
+# the peak memory of one does not hide the other.
+###############################################################
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from azure.storage.blob.models import BlobBlockList
+from azure.storage.blob.models import ResourceProperties
+from cloudmesh.storage.StorageABC import StorageABC
+from cloudmesh.storage.provider.azureblob.Provider import Provider
+
+
+class NullBlobService(object):
+
+    def create_container(self, container_name, **kwargs):
+        return False
+
+    def get_block_list(self, container_name, blob_name, **kwargs):
+        return BlobBlockList()
+
+    def put_block(self, container_name, blob_name, block, block_id,
+                  **kwargs):
+        # http.client sends a stream in blocks of 16 KiB and bytes at once
+        if hasattr(block, 'read'):
+            while len(block.read(16384)) > 0:
+                pass
+        else:
+            memoryview(block)
+
+    def put_block_list(self, container_name, blob_name, block_list,
+                       **kwargs):
+        return ResourceProperties()
+
+
+def run(path, mode, block_size, workers):
+    def init(self, service=None, config=None):
+        self.credentials = {
+            "account_name": "benchmark",
+            "account_key": "YmVuY2htYXJr",
+            "container": "benchmark",
+            "block_size": block_size,
+            "block_workers": workers,
+            "mmap_upload": mode == "mmap"
+        }
+
+    StorageABC.__init__ = init
+    provider = Provider(service="azure")
+    provider.storage_service = NullBlobService()
+    start = time.process_time()
+    wall = time.perf_counter()
+    provider._put_blocks("benchmark.bin", path)
+    return {
+        "mode": mode,
+        "cpu_s": round(time.process_time() - start, 3),
+        "wall_s": round(time.perf_counter() - wall, 3),
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1024,
+                        help="size of the file in MiB")
+    parser.add_argument("--block", type=int, default=8,
+                        help="size of a block in MiB")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--file", help="upload this file")
+    parser.add_argument("--mode", choices=["read", "mmap"],
+                        help="run a single mode in this process")
+    args = parser.parse_args()
+    block_size = args.block * 1024 * 1024
+
+    if args.mode is not None:
+        print(json.dumps(run(args.file, args.mode, block_size,
+                             args.workers)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.file
+        if path is None:
+            path = os.path.join(directory, "benchmark.bin")
+            with open(path, 'wb') as stream:
+                for i in range(args.size):
+                    stream.write(os.urandom(1024 * 1024))
+        results = []
+        for mode in ["read", "mmap"]:
+            output = subprocess.check_output(
+                [sys.executable, __file__, "--mode", mode, "--file", path,
+                 "--block", str(args.block),
+                 "--workers", str(args.workers)])
+            results.append(json.loads(output.decode().splitlines()[-1]))
+    print(json.dumps({
+        "size_mb": os.path.getsize(path) // (1024 * 1024)
+        if args.file else args.size,
+        "block_mb": args.block,
+        "workers": args.workers,
+        "results": results
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
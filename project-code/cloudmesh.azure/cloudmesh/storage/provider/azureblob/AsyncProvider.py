@@ -0,0 +1,93 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from cloudmesh.storage.provider.azureblob.Provider import Provider
+
+
+class AsyncProvider(object):
+    """
+    asyncio interface of the azureblob Provider
+
+    The BlockBlobService has no asynchronous client, so the calls of the
+    Provider are run on a thread pool shared by all coroutines of the
+    provider. Thousands of operations can be awaited at the same time on one
+    event loop, async_workers of them (default 64) talk to the service while
+    the others wait in the queue of the pool.
+    """
+
+    def __init__(self, service=None, config="~/.cloudmesh/cloudmesh4.yaml",
+                 provider=None, max_workers=None):
+        """
+        :param service: the name of the storage service in the configuration
+        :param config: the location of the yaml configuration file
+        :param provider: use this Provider instead of creating one
+        :param max_workers: the number of concurrent requests, defaults to
+                            async_workers of the storage credentials
+        """
+        self.provider = provider or Provider(service=service, config=config)
+        max_workers = max_workers or \
+            int(self.provider.credentials.get('async_workers', 64))
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs))
+
+    async def get(self, source=None, destination=None, recursive=False):
+        return await self._run(self.provider.get, source=source,
+                               destination=destination, recursive=recursive)
+
+    async def put(self, source=None, destination=None, recursive=False):
+        return await self._run(self.provider.put, source=source,
+                               destination=destination, recursive=recursive)
+
+    async def delete(self, source=None, recursive=False):
+        return await self._run(self.provider.delete, source=source,
+                               recursive=recursive)
+
+    async def create_dir(self, directory=None):
+        return await self._run(self.provider.create_dir, directory=directory)
+
+    async def search(self, directory=None, filename=None, recursive=False):
+        return await self._run(self.provider.search, directory=directory,
+                               filename=filename, recursive=recursive)
+
+    async def list(self, source=None, recursive=False):
+        return await self._run(self.provider.list, source=source,
+                               recursive=recursive)
+
+    async def list_iter(self, source=None, recursive=False, page_size=5000,
+                        marker=None):
+        """
+        Iterates over the content of a virtual folder
+
+        Only one page of page_size entries is held at a time, the next page
+        is requested when the previous one is consumed.
+
+        :param source: the virtual folder, '' or None is the container root
+        :param recursive: list all blobs in all sub-folders, otherwise the
+                          sub-folders are returned as BlobPrefix entries
+        :param page_size: the number of entries requested at once
+        :param marker: the marker of a page of list_pages to continue after
+        :return: async generator of Blob and BlobPrefix objects
+        """
+        prefix = self.provider._prefix(source)
+        delimiter = None if recursive else '/'
+        while True:
+            page, marker = await self._run(self.provider._page, prefix,
+                                           delimiter, page_size, marker)
+            for blob in page:
+                yield blob
+            if not marker:
+                break
+
+    def close(self):
+        self.executor.shutdown()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
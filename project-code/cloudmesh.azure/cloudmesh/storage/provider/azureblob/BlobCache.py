@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class BlobCache(object):
+    """
+    An in memory LRU cache of the content of small blobs
+
+    The cache holds at most max_bytes of content, the least recently read
+    blobs are evicted first. A cached blob is used without asking the
+    service for ttl seconds after it was last validated. Afterwards it is
+    revalidated with a conditional read that only returns the content if
+    the ETag of the blob changed.
+    """
+
+    def __init__(self, max_bytes, max_blob=None, ttl=60):
+        """
+        :param max_bytes: the total size of the cached content
+        :param max_blob: blobs larger than this are not cached, defaults to
+                         max_bytes
+        :param ttl: the seconds a blob is used without revalidation
+        """
+        self.max_bytes = max_bytes
+        self.max_blob = min(max_blob or max_bytes, max_bytes)
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # name -> [blob with content, time of the last validation]
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def __contains__(self, name):
+        with self.lock:
+            return name in self.entries
+
+    def _store(self, blob):
+        # Internal function adding a blob and evicting the least recently
+        # used ones until the cache fits into max_bytes, the lock is held
+        self._remove(blob.name)
+        if len(blob.content) > self.max_blob:
+            return
+        self.entries[blob.name] = [blob, time.monotonic()]
+        self.size += len(blob.content)
+        while self.size > self.max_bytes:
+            name, (evicted, checked) = self.entries.popitem(last=False)
+            self.size -= len(evicted.content)
+            self.evictions += 1
+
+    def _remove(self, name):
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            self.size -= len(entry[0].content)
+
+    def remove(self, name):
+        """
+        Drops a blob that was written or deleted
+
+        :param name: the name of the blob
+        """
+        with self.lock:
+            self._remove(name)
+
+    def read(self, name, fetch, etag=None):
+        """
+        Returns a blob with its content
+
+        :param name: the name of the blob
+        :param fetch: called with the ETag of the cached blob or None,
+                      returns the blob with its content or None if the blob
+                      did not change
+        :param etag: the current ETag if the caller knows it, a cached blob
+                     with this ETag is used without revalidation
+        :return: the blob with its content
+        """
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is not None:
+                cached, checked = entry
+                if time.monotonic() - checked < self.ttl or \
+                        cached.properties.etag == etag:
+                    self.entries.move_to_end(name)
+                    self.hits += 1
+                    return cached
+        blob = fetch(cached.properties.etag if entry is not None else None)
+        with self.lock:
+            if blob is None:
+                self.revalidations += 1
+                self.hits += 1
+                if self.entries.get(name) is entry:
+                    entry[1] = time.monotonic()
+                    self.entries.move_to_end(name)
+                return cached
+            self.misses += 1
+            self._store(blob)
+        return blob
+
+    def stats(self):
+        """
+        Returns the counters of the cache
+
+        :return: dict
+        """
+        with self.lock:
+            return {
+                "blobs": len(self.entries),
+                "size": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,120 @@
+import threading
+
+import requests
+from azure.storage.blob import BlockBlobService
+from azure.storage.common.retry import no_retry
+from requests.adapters import HTTPAdapter
+
+from cloudmesh.storage.provider.azureblob.BlobThrottle import \
+    ConcurrencyController
+from cloudmesh.storage.provider.azureblob.BlobThrottle import RateLimiter
+
+
+class BlobClients(object):
+    """
+    A process wide registry of BlockBlobService clients
+
+    Providers of the same account and container share one client and with
+    it one requests session, so the connections opened by one provider are
+    kept alive and reused by the next one instead of paying for a new TCP
+    and TLS handshake. The connection pool of a session keeps as many
+    connections as the most concurrent provider using it asked for. Clients
+    and sessions can be used from several threads at the same time.
+
+    The requests to an account share one ConcurrencyController, because
+    the account throttles all of them together. The clients do not retry
+    on their own, the ThrottledService of the providers does. Providers
+    configured with the same bandwidth share one RateLimiter.
+    """
+
+    lock = threading.Lock()
+    clients = {}
+    controllers = {}
+    limiters = {}
+
+    @classmethod
+    def _mount(cls, session, pool_size):
+        # Internal function replacing the connection pool of a session
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.pool_size = pool_size
+
+    @classmethod
+    def client(cls, account_name, account_key, container, pool_size=10):
+        """
+        Returns the shared client of a container
+
+        :param account_name: the name of the storage account
+        :param account_key: the key of the storage account
+        :param container: the name of the container
+        :param pool_size: the number of connections kept alive, the pool of
+                          an existing client grows to it if it is smaller
+        :return: BlockBlobService
+        """
+        key = (account_name, account_key, container)
+        with cls.lock:
+            storage_service = cls.clients.get(key)
+            if storage_service is None:
+                session = requests.Session()
+                cls._mount(session, pool_size)
+                storage_service = BlockBlobService(
+                    account_name=account_name, account_key=account_key,
+                    request_session=session)
+                storage_service.retry = no_retry
+                cls.clients[key] = storage_service
+            elif storage_service.request_session.pool_size < pool_size:
+                cls._mount(storage_service.request_session, pool_size)
+            return storage_service
+
+    @classmethod
+    def controller(cls, account_name, limit):
+        """
+        Returns the shared concurrency controller of an account
+
+        :param account_name: the name of the storage account
+        :param limit: the largest number of concurrent requests, the
+                      maximum of an existing controller grows to it
+        :return: ConcurrencyController
+        """
+        with cls.lock:
+            controller = cls.controllers.get(account_name)
+            if controller is None:
+                controller = ConcurrencyController(limit)
+                cls.controllers[account_name] = controller
+            elif controller.max_limit < limit:
+                controller.max_limit = limit
+            return controller
+
+    @classmethod
+    def limiter(cls, bytes_per_second=None, requests_per_second=None,
+                burst_bytes=None, burst_requests=None):
+        """
+        Returns the shared rate limiter of a bandwidth
+
+        :param bytes_per_second: the bandwidth, None is unlimited
+        :param requests_per_second: the request rate, None is unlimited
+        :param burst_bytes: the bytes sent at once after a pause
+        :param burst_requests: the requests sent at once after a pause
+        :return: RateLimiter or None if nothing is limited
+        """
+        if not bytes_per_second and not requests_per_second:
+            return None
+        key = (bytes_per_second, requests_per_second, burst_bytes,
+               burst_requests)
+        with cls.lock:
+            if key not in cls.limiters:
+                cls.limiters[key] = RateLimiter(*key)
+            return cls.limiters[key]
+
+    @classmethod
+    def clear(cls):
+        """
+        Closes the connections of all clients and forgets them
+        """
+        with cls.lock:
+            for storage_service in cls.clients.values():
+                storage_service.request_session.close()
+            cls.clients.clear()
+            cls.controllers.clear()
+            cls.limiters.clear()
@@ -0,0 +1,254 @@
+import hashlib
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # without fcntl the cache is still consistent, but processes may
+    # download the same blob at the same time
+    fcntl = None
+
+# the files of a download in progress, the temporary copy and the
+# checkpoint of a download in ranges
+TEMPORARY = ['tmp', 'tmp.checkpoint']
+
+
+class BlobDiskCache(object):
+    """
+    A local directory with copies of blobs shared by all processes on a host
+
+    A blob is stored under a name derived from its container, name and
+    ETag, so a changed blob never matches an old copy. A copy is
+    downloaded into a temporary file and renamed when it is complete, and
+    the download holds a lock on the entry, so processes asking for the same
+    blob at the same time wait for a single download.
+
+    Every process adds the size of its downloads to the size of the cache
+    it knows. Only when that is beyond max_bytes the directory is scanned
+    and the least recently used copies are removed until it is below
+    low_water * max_bytes, so most downloads do not read the directory.
+    The scan also removes the lock files of entries without a copy and the
+    temporary files and checkpoints of downloads that crashed, running
+    downloads count against the quota.
+
+    The copies in the cache are read only, get copies them to a destination
+    that can be changed. With link, get hard links the copy to the
+    destination instead when both are on the same file system, which saves
+    the disk space and time of the copy but leaves a destination that is
+    read only and shares its content with the cache.
+    """
+
+    def __init__(self, root, max_bytes, link=False, low_water=0.9):
+        """
+        :param root: the cache directory, it is created if needed
+        :param max_bytes: the disk quota of the cache
+        :param link: hard link copies instead of copying them
+        :param low_water: the share of max_bytes left after an eviction
+        """
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.max_bytes = max_bytes
+        self.link = link
+        self.low_water = low_water
+        self.lock = threading.Lock()
+        # the size of the cache, None until the first scan
+        self.size = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path(self, container, blob_name, etag):
+        """
+        Returns the location of the copy of a blob
+
+        :param container: the account and container of the blob
+        :param blob_name: the name of the blob
+        :param etag: the ETag of the blob
+        :return: the path of the copy
+        """
+        key = hashlib.sha256("\0".join(
+            [container, blob_name, etag or '']).encode('utf-8')).hexdigest()
+        return os.path.join(self.root, key[:2], key)
+
+    @contextmanager
+    def _locked(self, path, blocking=True):
+        # Internal function holding an exclusive lock on path + '.lock', it
+        # yields False instead of waiting if blocking is False and the lock
+        # is held by another. A lock file removed by an eviction while this
+        # waited for it is opened again.
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lock_path = path + '.lock'
+        while True:
+            lock = open(lock_path, 'a')
+            if fcntl is None:
+                break
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX if blocking else
+                            fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock.close()
+                yield False
+                return
+            try:
+                current = os.stat(lock_path).st_ino == \
+                    os.fstat(lock.fileno()).st_ino
+            except FileNotFoundError:
+                current = False
+            if current:
+                break
+            lock.close()
+        try:
+            yield True
+        finally:
+            # closing the file releases the lock
+            lock.close()
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _place(self, path, destination, link):
+        # Internal function putting the copy at the destination
+        if os.path.lexists(destination):
+            os.remove(destination)
+        if link:
+            try:
+                os.link(path, destination)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(path, destination)
+
+    def get(self, container, blob_name, etag, destination, download,
+            link=None):
+        """
+        Puts a blob at the destination from the cache
+
+        :param container: the account and container of the blob
+        :param blob_name: the name of the blob
+        :param etag: the ETag of the blob
+        :param destination: the local file
+        :param download: called with a path to download the blob to if it is
+                         not in the cache
+        :param link: hard link the copy, defaults to link of the cache. A
+                     destination whose times are changed afterwards must
+                     not be linked, it would change the copy in the cache.
+        :return: True if the blob was in the cache
+        """
+        path = self.path(container, blob_name, etag)
+        with self._locked(path):
+            hit = os.path.exists(path)
+            if hit:
+                # the modification time of a copy is the time of its last use
+                os.utime(path)
+            else:
+                temporary = path + '.tmp'
+                download(temporary)
+                os.replace(temporary, path)
+                os.chmod(path, 0o444)
+            self._place(path, destination,
+                        self.link if link is None else link)
+        self._count("hits" if hit else "misses")
+        if not hit:
+            with self.lock:
+                if self.size is not None:
+                    self.size += os.path.getsize(path)
+                full = self.size is None or self.size > self.max_bytes
+            if full:
+                self.evict()
+        return hit
+
+    def _scan(self):
+        # Internal function listing the complete copies with their time of
+        # the last use and size. Lock files of entries without a copy and
+        # temporary files that are not being written are removed, the
+        # temporary files of running downloads are added to the size.
+        copies = []
+        size = 0
+        for directory, dirs, files in os.walk(self.root):
+            names = set(files)
+            for name in files:
+                path = os.path.join(directory, name)
+                if '.' not in name:
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    copies.append((stat.st_mtime, stat.st_size, path))
+                    size += stat.st_size
+                    continue
+                entry, extension = name.split('.', 1)
+                if directory == self.root or \
+                        extension not in ['lock'] + TEMPORARY or \
+                        (extension == 'lock' and
+                         (entry in names or
+                          any(entry + '.' + temporary in names
+                              for temporary in TEMPORARY))):
+                    continue
+                entry_path = os.path.join(directory, entry)
+                with self._locked(entry_path, blocking=False) as held:
+                    if not held:
+                        if extension in TEMPORARY:
+                            try:
+                                size += os.path.getsize(path)
+                            except OSError:
+                                pass
+                    elif extension in TEMPORARY:
+                        self._remove_file(path)
+                        if not os.path.exists(entry_path):
+                            self._remove_file(entry_path + '.lock')
+                    elif not os.path.exists(entry_path):
+                        self._remove_file(path)
+        return copies, size
+
+    def evict(self):
+        """
+        Removes the least recently used copies and their lock files until
+        the cache fits into low_water * max_bytes, if it is larger than
+        max_bytes
+
+        :return: the number of removed copies
+        """
+        with self._locked(os.path.join(self.root, 'evict')):
+            copies, size = self._scan()
+            removed = 0
+            if size > self.max_bytes:
+                for used, copy_size, path in sorted(copies):
+                    if size <= self.low_water * self.max_bytes:
+                        break
+                    with self._locked(path):
+                        if not self._remove_file(path):
+                            continue
+                        # the lock is held, processes waiting for it open
+                        # a new lock file
+                        self._remove_file(path + '.lock')
+                    size -= copy_size
+                    removed += 1
+        with self.lock:
+            self.size = size
+            self.evictions += removed
+        return removed
+
+    def stats(self):
+        """
+        Returns the counters of this process
+
+        :return: dict
+        """
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,580 @@
+import bisect
+import functools
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from collections import deque
+from urllib.parse import unquote
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+from azure.common import AzureHttpError
+from azure.storage.blob.models import BatchSubResponse
+from azure.storage.blob.models import Blob
+from azure.storage.blob.models import BlobBlock
+from azure.storage.blob.models import BlobBlockList
+from azure.storage.blob.models import BlobBlockState
+from azure.storage.blob.models import BlobPrefix
+from azure.storage.blob.models import BlobProperties
+from azure.storage.blob.models import BlockListType
+from azure.storage.blob.models import CopyProperties
+from azure.storage.blob.models import ResourceProperties
+from azure.storage.common._http import HTTPResponse
+
+
+def request(method):
+    # every public method of the fake is a request to the service
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._request(method.__name__, method, self, *args, **kwargs)
+
+    return wrapper
+
+
+def busy():
+    return AzureHttpError("The server is busy. ErrorCode: ServerBusy", 503)
+
+
+def timed_out():
+    return AzureHttpError("Operation could not be completed within the "
+                          "specified time. ErrorCode: OperationTimedOut", 500)
+
+
+def denied():
+    return AzureHttpError("This request is not authorized to perform this "
+                          "operation. ErrorCode: AuthorizationFailure", 403)
+
+
+class FakeListGenerator(object):
+    """
+    Follows the pages of a listing like the ListGenerator of the SDK, the
+    pages after the first one are read with the list method of the
+    service directly
+    """
+
+    def __init__(self, items, next_marker, list_method, num_results=None):
+        self.items = items
+        self.next_marker = next_marker
+        self.list_method = list_method
+        self.num_results = num_results
+
+    def __iter__(self):
+        for item in self.items:
+            yield item
+        remaining = self.num_results
+        while self.next_marker:
+            if remaining is not None:
+                remaining -= len(self.items)
+                if remaining <= 0:
+                    break
+            page = self.list_method(num_results=remaining,
+                                    marker=self.next_marker)
+            self.items = page.items
+            self.next_marker = page.next_marker
+            for item in self.items:
+                yield item
+
+
+class FakeBlobService(object):
+    """
+    A storage container in memory with the semantics of BlockBlobService
+
+    The tests and benchmarks use it instead of a storage account.
+
+    Every write gives a blob a new ETag and modification time derived from
+    a counter, so two runs of a test see the same values. Reads honour
+    ranges and the if_match and if_none_match conditions, uploaded blocks
+    stay uncommitted until put_block_list and listings follow prefix,
+    delimiter, num_results and marker like the service.
+
+    Every request waits latency seconds plus up to jitter seconds drawn
+    from a random generator seeded with seed. With bandwidth the bytes of
+    all requests share one link of that many bytes per second. With
+    capacity at most that many requests run at the same time and the
+    others fail with 503 ServerBusy, error_rate fails a share of the
+    requests with 500 OperationTimedOut and fail schedules the errors of
+    the next requests.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, bandwidth=None,
+                 capacity=None, error_rate=0.0, seed=0):
+        """
+        :param latency: the seconds every request takes
+        :param jitter: the most seconds added at random to the latency
+        :param bandwidth: the bytes per second of all requests, None is
+                          unlimited
+        :param capacity: the number of concurrent requests, None is
+                         unlimited
+        :param error_rate: the share of requests that fail
+        :param seed: the seed of the jitter and the failures
+        """
+        self.blobs = {}
+        # blob -> {block id: content} of the uncommitted blocks
+        self.blocks = {}
+        # blob -> [(block id, size)] of the committed blocks
+        self.committed = {}
+        # destination -> [copy properties, status checks until it finishes]
+        self.copies = {}
+        self.copy_polls = 0
+        # the most entries of a page of a listing
+        self.page_size = 5000
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.version = 0
+        # the sorted names of the blobs, deleted names are removed when
+        # they are the larger part
+        self.names = []
+        self.deleted = 0
+
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        # request name or * -> errors raised by the next requests
+        self.faults = {}
+        self.link = 0.0
+        self.active = 0
+        self.peak = 0
+        self.throttled = 0
+        self.failed = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def fail(self, name='*', error=None, times=1):
+        """
+        Makes the next requests fail
+
+        :param name: the name of the request, * is any request
+        :param error: the exception raised, defaults to 503 ServerBusy
+        :param times: the number of requests that fail
+        """
+        with self.lock:
+            self.faults.setdefault(name, deque()).extend(
+                [error or busy()] * times)
+
+    def _fault(self, name):
+        # Internal function returning the error of a request or None, the
+        # lock is held
+        for key in [name, '*']:
+            if self.faults.get(key):
+                return self.faults[key].popleft()
+        if self.error_rate > 0 and self.random.random() < self.error_rate:
+            return timed_out()
+        if self.capacity is not None and self.active >= self.capacity:
+            self.throttled += 1
+            return busy()
+        return None
+
+    def _request(self, name, method, *args, **kwargs):
+        with self.lock:
+            self.calls[name] += 1
+            error = self._fault(name)
+            if error is not None:
+                self.failed += 1
+                raise error
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            delay = self.latency
+            if self.jitter > 0:
+                delay += self.random.uniform(0, self.jitter)
+        try:
+            if delay > 0:
+                time.sleep(delay)
+            return method(*args, **kwargs)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def _transfer(self, size, received=True):
+        # Internal function waiting until size bytes went over the link
+        with self.lock:
+            if received:
+                self.bytes_received += size
+            else:
+                self.bytes_sent += size
+            if not self.bandwidth or size == 0:
+                return
+            now = time.monotonic()
+            self.link = max(self.link, now) + size / self.bandwidth
+            wait = self.link - now
+        time.sleep(wait)
+
+    def _blob(self, name):
+        content, etag, modified = self.blobs[name]
+        properties = BlobProperties()
+        properties.blob_type = 'BlockBlob'
+        properties.etag = etag
+        properties.last_modified = modified
+        properties.creation_time = modified
+        properties.content_length = len(content)
+        if name in self.copies:
+            copy, polls = self.copies[name]
+            if copy.status == 'pending':
+                self.copies[name][1] = polls - 1
+                if polls <= 1:
+                    copy.status = 'success'
+            properties.copy = copy
+        return Blob(name=name, props=properties)
+
+    def _missing(self, container_name, blob_name):
+        if blob_name not in self.blobs:
+            raise AzureHttpError(
+                "The specified blob does not exist: {container}/{blob}".format(
+                    container=container_name, blob=blob_name), 404)
+
+    def _condition(self, blob_name, if_match=None, if_none_match=None,
+                   read=True):
+        # Internal function checking the conditions of a request, a read
+        # of an unchanged blob is answered with 304, a write with 409 or 412
+        etag = self.blobs[blob_name][1] if blob_name in self.blobs else None
+        if if_match is not None and \
+                (etag is None or if_match not in ['*', etag]):
+            raise AzureHttpError("The condition specified using HTTP "
+                                 "conditional header(s) is not met.", 412)
+        if if_none_match is not None and etag is not None:
+            if if_none_match == '*' and not read:
+                raise AzureHttpError("The specified blob already exists.",
+                                     409)
+            if if_none_match in ['*', etag]:
+                if read:
+                    raise AzureHttpError("Not Modified", 304)
+                raise AzureHttpError("The condition specified using HTTP "
+                                     "conditional header(s) is not met.", 412)
+
+    def _range(self, blob_name, start_range=None, end_range=None):
+        # Internal function returning the blob with the requested range of
+        # its content
+        content = self.blobs[blob_name][0]
+        blob = self._blob(blob_name)
+        if start_range is not None:
+            if start_range >= len(content) > 0 or \
+                    (end_range is not None and end_range < start_range):
+                raise AzureHttpError("The range specified is invalid for "
+                                     "the current size of the resource.",
+                                     416)
+            end = len(content) - 1 if end_range is None else \
+                min(end_range, len(content) - 1)
+            blob.properties.content_range = "bytes {start}-{end}/{size}" \
+                .format(start=start_range, end=end, size=len(content))
+            content = content[start_range:end + 1]
+            blob.properties.content_length = len(content)
+        blob.content = content
+        return blob
+
+    def _insert(self, blob_name):
+        # Internal function adding a name to the sorted names, the lock is
+        # held
+        index = bisect.bisect_left(self.names, blob_name)
+        if index < len(self.names) and self.names[index] == blob_name:
+            self.deleted -= 1
+        else:
+            self.names.insert(index, blob_name)
+
+    def _remove(self, blob_name):
+        # Internal function deleting a blob, the lock is held
+        del self.blobs[blob_name]
+        self.committed.pop(blob_name, None)
+        self.blocks.pop(blob_name, None)
+        self.deleted += 1
+        if self.deleted > len(self.names) // 2:
+            self.names = [name for name in self.names if name in self.blobs]
+            self.deleted = 0
+
+    def add(self, blob_name, content=b' ', blocks=None):
+        """
+        Writes a blob without a request
+
+        :param blob_name: the name of the blob
+        :param content: the content of the blob
+        :param blocks: the committed blocks of the blob as (id, size)
+        :return: ResourceProperties
+        """
+        with self.lock:
+            self.version += 1
+            modified = datetime(2019, 1, 1, tzinfo=timezone.utc) + \
+                timedelta(seconds=self.version)
+            if blob_name not in self.blobs:
+                self._insert(blob_name)
+            self.blobs[blob_name] = (bytes(content),
+                                     '"0x{n:X}"'.format(n=self.version),
+                                     modified)
+            self.committed[blob_name] = blocks or []
+            self.blocks.pop(blob_name, None)
+        resource = ResourceProperties()
+        resource.etag = self.blobs[blob_name][1]
+        resource.last_modified = modified
+        return resource
+
+    @request
+    def create_container(self, container_name, **kwargs):
+        return False
+
+    @request
+    def exists(self, container_name, blob_name=None, **kwargs):
+        return blob_name in self.blobs
+
+    @request
+    def get_blob_properties(self, container_name, blob_name, if_match=None,
+                            if_none_match=None, **kwargs):
+        self._missing(container_name, blob_name)
+        self._condition(blob_name, if_match, if_none_match)
+        return self._blob(blob_name)
+
+    @request
+    def create_blob_from_bytes(self, container_name, blob_name, blob,
+                               if_match=None, if_none_match=None, **kwargs):
+        self._transfer(len(blob), received=False)
+        self._condition(blob_name, if_match, if_none_match, read=False)
+        return self.add(blob_name, blob)
+
+    @request
+    def create_blob_from_path(self, container_name, blob_name, file_path,
+                              if_match=None, if_none_match=None, **kwargs):
+        with open(file_path, 'rb') as stream:
+            content = stream.read()
+        self._transfer(len(content), received=False)
+        self._condition(blob_name, if_match, if_none_match, read=False)
+        return self.add(blob_name, content)
+
+    @request
+    def put_block(self, container_name, blob_name, block, block_id,
+                  **kwargs):
+        if hasattr(block, 'read'):
+            block = block.read()
+        block = bytes(block)
+        self._transfer(len(block), received=False)
+        with self.lock:
+            blocks = self.blocks.setdefault(blob_name, {})
+            ids = list(blocks) + \
+                [committed[0] for committed in
+                 self.committed.get(blob_name, [])]
+            if any(len(other) != len(block_id) for other in ids):
+                raise AzureHttpError("The specified blob or block content "
+                                     "is invalid. ErrorCode: "
+                                     "InvalidBlobOrBlock", 400)
+            blocks[block_id] = block
+
+    @request
+    def get_block_list(self, container_name, blob_name, snapshot=None,
+                       block_list_type=None, **kwargs):
+        with self.lock:
+            if blob_name not in self.blobs and blob_name not in self.blocks:
+                self._missing(container_name, blob_name)
+            block_list = BlobBlockList()
+            if block_list_type in [None, BlockListType.All,
+                                   BlockListType.Committed]:
+                for block_id, size in self.committed.get(blob_name, []):
+                    block = BlobBlock(id=block_id,
+                                      state=BlobBlockState.Committed)
+                    block.size = size
+                    block_list.committed_blocks.append(block)
+            if block_list_type in [BlockListType.All,
+                                   BlockListType.Uncommitted]:
+                for block_id, content in \
+                        self.blocks.get(blob_name, {}).items():
+                    block = BlobBlock(id=block_id,
+                                      state=BlobBlockState.Uncommitted)
+                    block.size = len(content)
+                    block_list.uncommitted_blocks.append(block)
+        return block_list
+
+    @request
+    def put_block_list(self, container_name, blob_name, block_list,
+                       if_match=None, if_none_match=None, **kwargs):
+        with self.lock:
+            self._condition(blob_name, if_match, if_none_match, read=False)
+            uncommitted = self.blocks.get(blob_name, {})
+            committed = {}
+            if blob_name in self.blobs:
+                content = self.blobs[blob_name][0]
+                offset = 0
+                for block_id, size in self.committed[blob_name]:
+                    committed[block_id] = content[offset:offset + size]
+                    offset += size
+            parts = []
+            for block in block_list:
+                if block.state == BlobBlockState.Committed:
+                    candidates = [committed]
+                elif block.state == BlobBlockState.Uncommitted:
+                    candidates = [uncommitted]
+                else:
+                    candidates = [uncommitted, committed]
+                found = [blocks[block.id] for blocks in candidates
+                         if block.id in blocks]
+                if len(found) == 0:
+                    raise AzureHttpError("The specified block list is "
+                                         "invalid. ErrorCode: "
+                                         "InvalidBlockList", 400)
+                parts.append((block.id, found[0]))
+        return self.add(blob_name, b''.join(part for _, part in parts),
+                        [(block_id, len(part)) for block_id, part in parts])
+
+    @request
+    def get_blob_to_path(self, container_name, blob_name, file_path,
+                         start_range=None, end_range=None, if_match=None,
+                         if_none_match=None, **kwargs):
+        self._missing(container_name, blob_name)
+        self._condition(blob_name, if_match, if_none_match)
+        blob = self._range(blob_name, start_range, end_range)
+        self._transfer(len(blob.content))
+        with open(file_path, 'wb') as stream:
+            stream.write(blob.content)
+        blob.content = None
+        return blob
+
+    @request
+    def get_blob_to_bytes(self, container_name, blob_name, start_range=None,
+                          end_range=None, if_match=None, if_none_match=None,
+                          **kwargs):
+        self._missing(container_name, blob_name)
+        self._condition(blob_name, if_match, if_none_match)
+        blob = self._range(blob_name, start_range, end_range)
+        self._transfer(len(blob.content))
+        return blob
+
+    def make_blob_url(self, container_name, blob_name, **kwargs):
+        return "https://cloudmesh.blob.core.windows.net/{container}/" \
+               "{blob}".format(container=container_name, blob=blob_name)
+
+    @request
+    def copy_blob(self, container_name, blob_name, copy_source, **kwargs):
+        source = unquote(copy_source.split('/' + container_name + '/', 1)[1])
+        self._missing(container_name, source)
+        self.add(blob_name, self.blobs[source][0])
+        copy = CopyProperties()
+        copy.id = str(uuid.uuid4())
+        copy.source = copy_source
+        copy.status = 'pending' if self.copy_polls > 0 else 'success'
+        with self.lock:
+            self.copies[blob_name] = [copy, self.copy_polls]
+        result = CopyProperties()
+        result.id = copy.id
+        result.status = copy.status
+        return result
+
+    @request
+    def list_blobs(self, container_name, prefix=None, num_results=None,
+                   include=None, delimiter=None, marker=None, timeout=None):
+        prefix = prefix or ''
+        page_size = self.page_size if num_results is None else \
+            min(num_results, self.page_size)
+        items = []
+        with self.lock:
+            start = bisect.bisect_left(self.names, max(prefix, marker or ''))
+            end = bisect.bisect_left(self.names, prefix + chr(0x10FFFF))
+            names = self.names[start:end]
+        for name in names:
+            if len(items) > page_size:
+                break
+            if name not in self.blobs:
+                continue
+            if delimiter is not None and delimiter in name[len(prefix):]:
+                rest = name[len(prefix):]
+                folder = prefix + rest[:rest.index(delimiter) + 1]
+                if len(items) == 0 or items[-1].name != folder:
+                    entry = BlobPrefix()
+                    entry.name = folder
+                    items.append(entry)
+            else:
+                items.append(self._blob(name))
+        if marker:
+            items = [item for item in items if item.name >= marker]
+        next_marker = None
+        if len(items) > page_size:
+            next_marker = items[page_size].name
+            items = items[:page_size]
+        return FakeListGenerator(
+            items, next_marker,
+            functools.partial(self.list_blobs, container_name, prefix=prefix,
+                              include=include, delimiter=delimiter,
+                              timeout=timeout),
+            num_results)
+
+    @request
+    def delete_blob(self, container_name, blob_name, if_match=None,
+                    **kwargs):
+        with self.lock:
+            self._missing(container_name, blob_name)
+            self._condition(blob_name, if_match, read=False)
+            self._remove(blob_name)
+
+    @request
+    def batch_delete_blobs(self, batch_delete_sub_requests, timeout=None):
+        if len(batch_delete_sub_requests) > 256:
+            raise ValueError("Batch request should take 1 to 256 sub-requests")
+        responses = []
+        with self.lock:
+            for sub_request in batch_delete_sub_requests:
+                if sub_request.blob_name in self.blobs:
+                    self._remove(sub_request.blob_name)
+                    response = HTTPResponse(202, 'Accepted', {}, b'')
+                else:
+                    response = HTTPResponse(404, 'BlobNotFound', {}, b'')
+                responses.append(BatchSubResponse(
+                    response.status == 202, response, sub_request))
+        return responses
+
+
+class ThrottlingBlobService(FakeBlobService):
+    """
+    Accepts at most capacity requests at the same time, the others fail
+    with 503 ServerBusy like an overloaded storage account
+    """
+
+    def __init__(self, capacity, latency=0.005):
+        super().__init__(latency=latency, capacity=capacity)
+
+
+class PageFailingBlobService(FakeBlobService):
+    """
+    Fails the first request of every page after the first page of a
+    listing with 503 ServerBusy
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.failed_markers = set()
+
+    def list_blobs(self, container_name, marker=None, **kwargs):
+        with self.lock:
+            fail = marker and marker not in self.failed_markers
+            if fail:
+                self.failed_markers.add(marker)
+        if fail:
+            raise busy()
+        return super().list_blobs(container_name, marker=marker, **kwargs)
+
+
+class BatchRefusingBlobService(FakeBlobService):
+    """
+    Refuses every second sub-request of the first batch_refusals batch
+    requests with 503 ServerBusy, the batch request itself succeeds
+    """
+
+    def __init__(self, batch_refusals=1, **kwargs):
+        super().__init__(**kwargs)
+        self.batch_refusals = batch_refusals
+
+    def batch_delete_blobs(self, batch_delete_sub_requests, timeout=None):
+        with self.lock:
+            refuse = self.batch_refusals > 0
+            self.batch_refusals -= 1
+        if not refuse:
+            return super().batch_delete_blobs(batch_delete_sub_requests,
+                                              timeout=timeout)
+        accepted = super().batch_delete_blobs(
+            batch_delete_sub_requests[::2], timeout=timeout)
+        responses = []
+        for index, sub_request in enumerate(batch_delete_sub_requests):
+            if index % 2 == 0:
+                responses.append(accepted[index // 2])
+            else:
+                responses.append(BatchSubResponse(
+                    False, HTTPResponse(503, 'ServerBusy', {}, b''),
+                    sub_request))
+        return responses
@@ -0,0 +1,272 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from azure.storage.blob.models import Blob
+from azure.storage.blob.models import BlobPrefix
+from azure.storage.blob.models import BlobProperties
+
+
+class BlobIndex(object):
+    """
+    A local SQLite index of the names, sizes, dates and ETags of the blobs
+    in a container.
+
+    The index remembers which virtual folders were read completely from the
+    service, only those folders can be answered from the index. A folder is
+    read either recursively, which also covers all its sub-folders, or with
+    a delimiter, which covers only the blobs of the folder itself and the
+    names of its sub-folders.
+    """
+
+    def __init__(self, path):
+        """
+        Opens the index and creates its tables
+
+        :param path: the SQLite file, its directory is created if needed
+        """
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                "name TEXT PRIMARY KEY, size INTEGER, created TEXT, "
+                "last_modified TEXT, etag TEXT)")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS folders ("
+                "prefix TEXT PRIMARY KEY, refreshed REAL)")
+            # the prefixes read with a delimiter and the sub-folders they
+            # returned
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS shallow_folders ("
+                "prefix TEXT PRIMARY KEY, refreshed REAL)")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS subfolders ("
+                "name TEXT PRIMARY KEY)")
+
+    def close(self):
+        self.db.close()
+
+    @staticmethod
+    def _range(prefix):
+        # the names starting with prefix are the names in [prefix, prefix+max)
+        return prefix, prefix + '\U0010ffff'
+
+    @staticmethod
+    def _folder(prefix, name):
+        # the sub-folder of prefix that is or contains name, None for the
+        # blobs directly below prefix
+        rest = name[len(prefix):]
+        if '/' not in rest:
+            return None
+        return prefix + rest[:rest.index('/') + 1]
+
+    @staticmethod
+    def _row(blob):
+        properties = blob.properties
+        created = properties.creation_time or properties.last_modified
+        return (blob.name,
+                properties.content_length,
+                created.isoformat() if created else None,
+                properties.last_modified.isoformat()
+                if properties.last_modified else None,
+                properties.etag)
+
+    @staticmethod
+    def _blob(row):
+        name, size, created, last_modified, etag = row
+        properties = BlobProperties()
+        properties.blob_type = 'BlockBlob'
+        properties.content_length = size
+        properties.creation_time = \
+            datetime.fromisoformat(created) if created else None
+        properties.last_modified = \
+            datetime.fromisoformat(last_modified) if last_modified else None
+        properties.etag = etag
+        return Blob(name=name, props=properties)
+
+    def update(self, blobs):
+        """
+        Adds or replaces blobs in the index
+
+        :param blobs: iterable of Blob objects with properties
+        """
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?)",
+                (self._row(blob) for blob in blobs))
+
+    def remove(self, names):
+        """
+        Removes blobs from the index
+
+        A sub-folder without any blob left in the index is removed with its
+        last blob.
+
+        :param names: iterable of blob names
+        """
+        names = list(names)
+        with self.lock, self.db:
+            self.db.executemany("DELETE FROM blobs WHERE name = ?",
+                                ((name,) for name in names))
+            folders = {name[:end + 1] for name in names
+                       for end in range(len(name)) if name[end] == '/'}
+            for folder in folders:
+                if self.db.execute(
+                        "SELECT 1 FROM blobs WHERE name >= ? AND name < ? "
+                        "LIMIT 1", self._range(folder)).fetchone() is None:
+                    self.db.execute("DELETE FROM subfolders WHERE name = ?",
+                                    (folder,))
+
+    def refresh(self, prefix, blobs, recursive=True):
+        """
+        Brings the blobs below prefix up to date with a complete listing
+
+        Only blobs whose last_modified or ETag changed are written, blobs
+        that are no longer listed are removed. Afterwards the folder counts
+        as read completely. A listing with a delimiter only replaces the
+        blobs directly below prefix and the sub-folders, the blobs in the
+        sub-folders are kept while the sub-folder is still listed.
+
+        :param prefix: the prefix of the listing, '' for the container
+        :param blobs: the listing of the prefix from the service
+        :param recursive: the listing is recursive, otherwise it was read
+                          with the delimiter '/' and has BlobPrefix entries
+        :return: the number of blobs written and removed
+        """
+        with self.lock:
+            known = {
+                name: (last_modified, etag) for name, last_modified, etag in
+                self.db.execute(
+                    "SELECT name, last_modified, etag FROM blobs "
+                    "WHERE name >= ? AND name < ?", self._range(prefix))}
+            subfolders = [name for name, in self.db.execute(
+                "SELECT name FROM subfolders WHERE name >= ? AND name < ?",
+                self._range(prefix))]
+        changed = []
+        folders = set()
+        for blob in blobs:
+            if isinstance(blob, BlobPrefix):
+                folders.add(blob.name)
+                continue
+            row = self._row(blob)
+            if known.pop(blob.name, None) != (row[3], row[4]):
+                changed.append(row)
+        if not recursive:
+            known = {name: value for name, value in known.items()
+                     if self._folder(prefix, name) not in folders}
+            subfolders = [name for name in subfolders
+                          if self._folder(prefix, name) not in folders]
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?)",
+                changed)
+            self.db.executemany("DELETE FROM blobs WHERE name = ?",
+                                ((name,) for name in known))
+            self.db.executemany("DELETE FROM subfolders WHERE name = ?",
+                                ((name,) for name in subfolders))
+            self.db.executemany("INSERT OR IGNORE INTO subfolders VALUES (?)",
+                                ((name,) for name in folders))
+            self.db.execute(
+                "INSERT OR REPLACE INTO {} VALUES (?, ?)".format(
+                    "folders" if recursive else "shallow_folders"),
+                (prefix, time.time()))
+        return len(changed), len(known)
+
+    def refreshed(self, prefix, recursive=True):
+        """
+        Returns when the folder was last read completely
+
+        A folder is covered by a recursive read of itself or any of its
+        parents, and without recursive also by a read of the folder with a
+        delimiter.
+
+        :param prefix: the prefix of the folder, '' for the container
+        :param recursive: the folder is needed with its sub-folders
+        :return: the time of the read or None
+        """
+        with self.lock:
+            latest = None
+            for folder, refreshed in self.db.execute(
+                    "SELECT prefix, refreshed FROM folders"):
+                if prefix.startswith(folder):
+                    latest = max(latest or refreshed, refreshed)
+            if not recursive:
+                for refreshed, in self.db.execute(
+                        "SELECT refreshed FROM shallow_folders "
+                        "WHERE prefix = ?", (prefix,)):
+                    latest = max(latest or refreshed, refreshed)
+        return latest
+
+    def get(self, name):
+        """
+        Returns a blob of the index
+
+        :param name: the name of the blob
+        :return: the Blob or None if it is not in the index
+        """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT name, size, created, last_modified, etag FROM blobs "
+                "WHERE name = ?", (name,)).fetchone()
+        return None if row is None else self._blob(row)
+
+    def list(self, prefix, recursive=False, num_results=None,
+             batch_size=1000):
+        """
+        Lists the index like list_blobs of the service
+
+        The rows are read in batches of batch_size. Without recursive a
+        sub-folder ends the batch and the next batch starts after the names
+        of the sub-folder, so only the rows of the folder itself are read.
+        The sub-folders of a read with a delimiter are added.
+
+        :param prefix: the prefix of the folder, '' for the container
+        :param recursive: without recursive the sub-folders are returned
+                          as BlobPrefix entries
+        :param num_results: stop after this number of entries
+        :param batch_size: the number of rows read at once
+        :return: list of Blob and BlobPrefix objects
+        """
+        start, end = self._range(prefix)
+        result = []
+        while num_results is None or len(result) < num_results:
+            with self.lock:
+                rows = self.db.execute(
+                    "SELECT name, size, created, last_modified, etag "
+                    "FROM blobs WHERE name >= ? AND name < ? "
+                    "ORDER BY name LIMIT ?",
+                    (start, end, batch_size)).fetchall()
+            if len(rows) == 0:
+                break
+            for row in rows:
+                if num_results is not None and len(result) >= num_results:
+                    break
+                rest = row[0][len(prefix):]
+                if not recursive and '/' in rest:
+                    entry = BlobPrefix()
+                    entry.name = prefix + rest[:rest.index('/') + 1]
+                    result.append(entry)
+                    start = self._range(entry.name)[1]
+                    break
+                result.append(self._blob(row))
+                # the smallest name after the name of the row
+                start = row[0] + '\0'
+        if recursive:
+            return result
+        with self.lock:
+            names = {entry.name for entry in result}
+            for name, in self.db.execute(
+                    "SELECT name FROM subfolders WHERE name >= ? AND name < ?",
+                    self._range(prefix)):
+                if self._folder(prefix, name) == name and name not in names:
+                    entry = BlobPrefix()
+                    entry.name = name
+                    result.append(entry)
+        result.sort(key=lambda entry: entry.name)
+        return result[:num_results]
@@ -0,0 +1,147 @@
+import csv
+import json
+import os
+
+
+class BlobManifest(object):
+    """
+    A list of source and destination pairs of a bulk transfer
+
+    A manifest ending in .csv has one source,destination row per entry and
+    may start with the header source,destination. Any other manifest is
+    read as JSON lines of {"source": ..., "destination": ...}. Entries are
+    read lazily, so a manifest of millions of entries is never held in
+    memory. Every entry is numbered by its position among the entries.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: the manifest file
+        """
+        self.path = path
+        self.csv = path.lower().endswith('.csv')
+
+    def _pairs(self, stream):
+        # Internal function reading the (source, destination) pairs
+        if self.csv:
+            for row in csv.reader(stream):
+                if len(row) == 0 or \
+                        [value.strip() for value in row] == \
+                        ['source', 'destination']:
+                    continue
+                if len(row) != 2:
+                    raise ValueError(
+                        "Manifest row is not source,destination: "
+                        "{row}".format(row=row))
+                yield row[0], row[1]
+        else:
+            for line in stream:
+                if line.strip() == '':
+                    continue
+                entry = json.loads(line)
+                yield entry['source'], entry['destination']
+
+    def __iter__(self):
+        """
+        Reads the entries
+
+        :return: generator of (index, source, destination) tuples
+        """
+        with open(self.path, newline='') as stream:
+            for index, (source, destination) in enumerate(
+                    self._pairs(stream)):
+                yield index, source, destination
+
+
+class BlobCheckpoint(object):
+    """
+    Records the finished entries of a manifest on disk
+
+    The checkpoint is a journal with a header naming the manifest followed
+    by the index of every finished entry, one per line. A line is written
+    as soon as its entry is finished, so a job that crashes loses at most
+    the entries that were in flight. The finished entries are kept in
+    memory as a bitmap of one bit per entry. A journal of another manifest,
+    or of the same manifest after it changed, is started again.
+
+    Instead of a manifest the header may describe any other list of
+    numbered entries, like the ranges of a download.
+    """
+
+    def __init__(self, path, manifest=None, header=None):
+        """
+        :param path: the checkpoint file
+        :param manifest: the manifest file the checkpoint belongs to
+        :param header: a dict describing what the checkpoint belongs to,
+                       used instead of the manifest
+        """
+        self.path = path
+        if header is None:
+            stat = os.stat(manifest)
+            header = {
+                "manifest": os.path.abspath(manifest),
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns
+            }
+        self.header = header
+        self.bitmap = bytearray()
+        self.count = 0
+        resume = self._load()
+        self.stream = open(path, 'a' if resume else 'w')
+        if not resume:
+            self.stream.write(json.dumps(self.header) + '\n')
+            self.stream.flush()
+
+    def _load(self):
+        # Internal function reading an existing journal, it returns False if
+        # the journal is missing or belongs to another manifest
+        try:
+            stream = open(self.path)
+        except OSError:
+            return False
+        with stream:
+            header = stream.readline()
+            try:
+                if json.loads(header) != self.header:
+                    return False
+            except ValueError:
+                return False
+            length = len(header)
+            for line in stream:
+                # the last line may be incomplete after a crash
+                if not line.endswith('\n'):
+                    break
+                self._set(int(line))
+                length += len(line)
+        # the journal only holds ASCII, so characters are bytes
+        os.truncate(self.path, length)
+        return True
+
+    def _set(self, index):
+        # Internal function marking an entry in the bitmap
+        byte, bit = divmod(index, 8)
+        if byte >= len(self.bitmap):
+            self.bitmap.extend(bytes(byte + 1 - len(self.bitmap)))
+        if not self.bitmap[byte] & (1 << bit):
+            self.bitmap[byte] |= 1 << bit
+            self.count += 1
+
+    def __contains__(self, index):
+        byte, bit = divmod(index, 8)
+        return byte < len(self.bitmap) and \
+            bool(self.bitmap[byte] & (1 << bit))
+
+    def record(self, index):
+        """
+        Marks an entry as finished
+
+        :param index: the index of the entry in the manifest
+        """
+        self._set(index)
+        self.stream.write("{index}\n".format(index=index))
+        self.stream.flush()
+
+    def close(self):
+        if not self.stream.closed:
+            os.fsync(self.stream.fileno())
+            self.stream.close()
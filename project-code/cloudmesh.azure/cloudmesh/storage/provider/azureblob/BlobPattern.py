@@ -0,0 +1,127 @@
+import re
+
+# characters that start a wildcard in a glob pattern
+GLOB_MAGIC = '*?['
+# characters with a special meaning in a regular expression
+REGEX_MAGIC = '.^$*+?{}[]|()\\'
+
+
+class BlobPattern(object):
+    """
+    A glob or regular expression matching blob names
+
+    A glob is split into the segments between '/'. '*', '?' and '[...]'
+    do not match '/', a segment '**' matches any number of folders. A
+    regular expression has to match the name from its start.
+
+    The literal prefix of a pattern is the longest start that every
+    matching name shares, only blobs below it have to be listed.
+    """
+
+    def __init__(self, pattern, regex=False):
+        """
+        :param pattern: the glob or regular expression
+        :param regex: the pattern is a regular expression
+        """
+        self.pattern = pattern.lstrip('/') if not regex else pattern
+        self.is_regex = regex
+        if regex:
+            self.segments = None
+            self.regex = re.compile(self.pattern)
+            self.prefix = self._regex_prefix(self.pattern)
+        else:
+            self.segments = self.pattern.split('/')
+            self.regex = re.compile(self._translate(self.segments) + r'\Z')
+            self.segment_regex = [
+                None if segment == '**' else
+                re.compile(self._translate_segment(segment) + r'\Z')
+                for segment in self.segments]
+            self.prefix = self.literal(self.pattern)
+
+    @staticmethod
+    def literal(text):
+        # the part of a glob before its first wildcard
+        for i, char in enumerate(text):
+            if char in GLOB_MAGIC:
+                return text[:i]
+        return text
+
+    @staticmethod
+    def is_glob(text):
+        return any(char in text for char in GLOB_MAGIC)
+
+    @staticmethod
+    def _translate_segment(segment):
+        # translates one segment of a glob into a regular expression
+        result = []
+        i = 0
+        while i < len(segment):
+            char = segment[i]
+            i += 1
+            if char == '*':
+                result.append('[^/]*')
+            elif char == '?':
+                result.append('[^/]')
+            elif char == '[':
+                start = i
+                if segment[start:start + 1] == '!':
+                    start += 1
+                if segment[start:start + 1] == ']':
+                    start += 1
+                end = segment.find(']', start)
+                if end < 0:
+                    result.append(re.escape(char))
+                else:
+                    chars = segment[i:end].replace('\\', '\\\\')
+                    if chars.startswith('!'):
+                        chars = '^' + chars[1:]
+                    result.append('[' + chars + ']')
+                    i = end + 1
+            else:
+                result.append(re.escape(char))
+        return ''.join(result)
+
+    def _translate(self, segments):
+        # translates a glob split into segments into a regular expression
+        result = []
+        for i, segment in enumerate(segments):
+            last = i == len(segments) - 1
+            if segment == '**':
+                result.append('.*' if last else '(?:[^/]*/)*')
+            else:
+                result.append(self._translate_segment(segment))
+                if not last:
+                    result.append('/')
+        return ''.join(result)
+
+    @staticmethod
+    def _regex_prefix(pattern):
+        # the literal start of a regular expression, a character followed by
+        # a quantifier that allows to skip it is not part of it
+        if '|' in pattern:
+            return ''
+        i = 1 if pattern.startswith('^') else 0
+        prefix = []
+        while i < len(pattern):
+            char = pattern[i]
+            if char == '\\' and i + 1 < len(pattern) and \
+                    not pattern[i + 1].isalnum():
+                char = pattern[i + 1]
+                i += 2
+            elif char in REGEX_MAGIC:
+                break
+            else:
+                i += 1
+            if pattern[i:i + 1] in ['*', '?', '{']:
+                break
+            prefix.append(char)
+        return ''.join(prefix)
+
+    def match(self, name):
+        """
+        Tests if a blob name matches the pattern
+
+        :param name: the name of the blob
+        :return: bool
+        """
+        return self.regex.match(name) is not None
@@ -0,0 +1,103 @@
+from collections.abc import Mapping
+from datetime import datetime
+
+from azure.storage.blob.models import BlobProperties
+
+# the properties of a blob that are not part of the cm dict of a record
+PROPERTY_KEYS = tuple(
+    key for key in BlobProperties().__dict__
+    if key not in ["copy", "lease", "content_settings", "creation_time",
+                   "last_modified", "deleted_time"])
+
+
+class BlobRecord(Mapping):
+    """
+    The result of a storage operation on one blob
+
+    A record keeps the values of the blob in slots instead of the Blob and
+    BlobProperties objects of the SDK and their dicts, so a listing of many
+    blobs can be collected and sorted with little memory. It is a read only
+    mapping with the keys of the dicts the provider returned before, the
+    nested properties and cm dicts are built on every read. The provider
+    returns the records themselves. Where a result is printed or stored,
+    to_dict converts a record into a dict that can be changed and
+    serialized to JSON and YAML.
+    """
+
+    __slots__ = ["name", "snapshot", "content", "metadata", "deleted",
+                 "cloud", "status", "size", "created", "updated",
+                 "deleted_time", "properties_values"]
+
+    keys_ = ("name", "snapshot", "content", "properties", "metadata",
+             "deleted", "cm")
+
+    def __init__(self, blob, cloud, status="exists"):
+        """
+        :param blob: the Blob of the SDK with its properties
+        :param cloud: the name of the storage service
+        :param status: exists, deleted or the status of the operation
+        """
+        properties = blob.properties
+        self.name = blob.name
+        self.snapshot = blob.snapshot
+        self.content = blob.content
+        self.metadata = blob.metadata
+        self.deleted = blob.deleted
+        self.cloud = cloud
+        self.status = status
+        self.size = properties.content_length
+        self.updated = properties.last_modified
+        self.created = properties.creation_time or properties.last_modified
+        self.deleted_time = properties.deleted_time
+        self.properties_values = tuple(getattr(properties, key, None)
+                                       for key in PROPERTY_KEYS)
+
+    @property
+    def properties(self):
+        properties = {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in zip(PROPERTY_KEYS, self.properties_values)}
+        if self.deleted_time is None:
+            properties["deleted_time"] = None
+        return properties
+
+    @property
+    def cm(self):
+        cm = {
+            "kind": "storage",
+            "cloud": self.cloud,
+            "name": self.name,
+            "created": self.created.isoformat() if self.created else None,
+            "updated": self.updated.isoformat() if self.updated else None,
+            "size": self.size,
+            "status": self.status
+        }
+        if self.deleted_time is not None:
+            cm["deleted"] = self.deleted_time.isoformat()
+        return cm
+
+    @property
+    def etag(self):
+        return self.properties_values[PROPERTY_KEYS.index("etag")]
+
+    def __getitem__(self, key):
+        if key not in self.keys_:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.keys_)
+
+    def __len__(self):
+        return len(self.keys_)
+
+    def to_dict(self):
+        """
+        Converts the record into the dict returned by earlier versions
+
+        :return: dict
+        """
+        return {key: self[key] for key in self.keys_}
+
+    def __repr__(self):
+        return repr(self.to_dict())
@@ -0,0 +1,240 @@
+import io
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from azure.storage.blob.models import BlobBlock
+
+# the most blocks of a block blob and the largest block the service accepts
+MAX_BLOCKS = 50000
+MAX_BLOCK_SIZE = 100 * 1024 * 1024
+
+
+class BlobReader(io.RawIOBase):
+    """
+    A read only, seekable file object on a blob
+
+    Every read fetches the requested byte range from the service, wrap it in
+    io.BufferedReader to read in fixed size pieces. The ranges are read with
+    the ETag of the blob when it was opened, a blob that changes while it is
+    read fails the read instead of returning a mix of two versions.
+    """
+
+    def __init__(self, storage_service, container, blob):
+        """
+        :param storage_service: the BlockBlobService
+        :param container: the name of the container
+        :param blob: the blob with its properties
+        """
+        super().__init__()
+        self.storage_service = storage_service
+        self.container = container
+        self.name = blob.name
+        self.size = blob.properties.content_length
+        self.etag = blob.properties.etag
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError("Invalid whence: {whence}".format(whence=whence))
+        if position < 0:
+            raise ValueError("Negative seek position: {position}".format(
+                position=position))
+        self.position = position
+        return self.position
+
+    def readinto(self, buffer):
+        length = min(len(buffer), self.size - self.position)
+        if length <= 0:
+            return 0
+        part = self.storage_service.get_blob_to_bytes(
+            self.container, self.name, start_range=self.position,
+            end_range=self.position + length - 1, if_match=self.etag)
+        length = len(part.content)
+        memoryview(buffer)[:length] = part.content
+        self.position += length
+        return length
+
+
+class BlockStream(io.RawIOBase):
+    """
+    A read only stream on a memoryview
+
+    read returns slices of the view instead of copies, so a block of a
+    memory mapped file is sent from the mapping without copying it into
+    bytes first. The stream is seekable so that a retried request can send
+    it again.
+    """
+
+    def __init__(self, view):
+        """
+        :param view: the memoryview with the data
+        """
+        super().__init__()
+        self.view = view
+        self.position = 0
+
+    def __len__(self):
+        return len(self.view)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            position = len(self.view) + offset
+        else:
+            raise ValueError("Invalid whence: {whence}".format(whence=whence))
+        if position < 0:
+            raise ValueError("Negative seek position: {position}".format(
+                position=position))
+        self.position = position
+        return self.position
+
+    def read(self, size=-1):
+        end = len(self.view)
+        if size is not None and size >= 0:
+            end = min(end, self.position + size)
+        start = min(self.position, end)
+        self.position = max(self.position, end)
+        return self.view[start:end]
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        memoryview(buffer)[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self.view.release()
+        super().close()
+
+
+class BlobWriter(io.RawIOBase):
+    """
+    A write only file object that uploads a block blob
+
+    The data is collected in blocks of block_size bytes, full blocks are
+    uploaded with put_block while writing continues, at most max_workers of
+    them at the same time. close commits the blocks. A blob has at most
+    MAX_BLOCKS blocks, the block_size limits the size of the blob. Data that fits into a
+    single block is uploaded with one request on close. Leaving a with block
+    with an exception discards the blob.
+    """
+
+    def __init__(self, storage_service, container, blob_name, block_size,
+                 max_workers):
+        """
+        :param storage_service: the BlockBlobService
+        :param container: the name of the container
+        :param blob_name: the name of the blob
+        :param block_size: the size of a block
+        :param max_workers: the number of blocks uploaded at the same time
+        """
+        super().__init__()
+        self.storage_service = storage_service
+        self.container = container
+        self.name = blob_name
+        self.block_size = block_size
+        self.buffer = bytearray()
+        self.block_ids = []
+        self.futures = []
+        self.tag = uuid.uuid4().hex[:16]
+        self.slots = threading.BoundedSemaphore(max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.resource = None
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def _put_block(self, block, block_id):
+        try:
+            self.storage_service.put_block(self.container, self.name, block,
+                                           block_id)
+        finally:
+            self.slots.release()
+
+    def _send(self, block):
+        if len(self.block_ids) >= MAX_BLOCKS:
+            raise ValueError(
+                "{name} needs more than {count} blocks of {size} bytes".format(
+                    name=self.name, count=MAX_BLOCKS, size=self.block_size))
+        block_id = "{tag}-{index:06d}".format(tag=self.tag,
+                                              index=len(self.block_ids))
+        self.block_ids.append(block_id)
+        self.slots.acquire()
+        self.futures.append(
+            self.executor.submit(self._put_block, bytes(block), block_id))
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed file")
+        data = memoryview(data).cast('B')
+        length = len(data)
+        while len(data) > 0:
+            free = self.block_size - len(self.buffer)
+            self.buffer += data[:free]
+            data = data[free:]
+            if len(self.buffer) == self.block_size:
+                self._send(self.buffer)
+                self.buffer = bytearray()
+        self.size += length
+        return length
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if len(self.block_ids) == 0:
+                self.resource = self.storage_service.create_blob_from_bytes(
+                    self.container, self.name, bytes(self.buffer))
+            else:
+                if len(self.buffer) > 0:
+                    self._send(self.buffer)
+                for future in self.futures:
+                    future.result()
+                self.resource = self.storage_service.put_block_list(
+                    self.container, self.name,
+                    [BlobBlock(id=block_id) for block_id in self.block_ids])
+        finally:
+            self.executor.shutdown()
+            self.buffer = bytearray()
+            super().close()
+
+    def abort(self):
+        # discards the written data, uncommitted blocks are removed by the
+        # service after a week
+        self.executor.shutdown()
+        self.buffer = bytearray()
+        super().close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
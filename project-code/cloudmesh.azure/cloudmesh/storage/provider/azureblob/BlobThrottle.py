@@ -0,0 +1,377 @@
+import functools
+import os
+import random
+import threading
+import time
+
+from azure.common import AzureException
+from azure.common import AzureHttpError
+
+# the status codes of a storage account that is busy, 500 OperationTimedOut
+# and 503 ServerBusy
+THROTTLED = [500, 503]
+# the status codes of server errors that do not go away when the request is
+# sent again, 501 Not Implemented and 505 HTTP Version Not Supported
+PERMANENT = [501, 505]
+# the methods of a BlockBlobService that do not send a request
+LOCAL = ['make_blob_url', 'make_container_url']
+
+
+class ConcurrencyController(object):
+    """
+    Limits the number of concurrent requests to a storage account
+
+    The limit follows the AIMD rule: every request that completes in time
+    raises it by 1/limit, about one more request per round of requests,
+    while a throttled request halves it. All requests that were already
+    running when the limit was lowered are answered by the same overload,
+    so they do not lower it again. A request that takes latency_factor
+    times longer than the fastest requests of its kind keeps the limit
+    where it is.
+    """
+
+    def __init__(self, limit, min_limit=1, max_limit=None, decrease=0.5,
+                 latency_factor=4.0):
+        """
+        :param limit: the number of concurrent requests at the start
+        :param min_limit: the limit is never lowered below this
+        :param max_limit: the limit is never raised above this, defaults to
+                          limit
+        :param decrease: the factor applied to the limit on throttling
+        :param latency_factor: requests slower than this multiple of the
+                               usual latency do not raise the limit
+        """
+        self.limit = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit or limit
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.condition = threading.Condition()
+        self.active = 0
+        self.lowered = 0.0
+        self.latency = {}
+        self.throttled = 0
+        self.retries = 0
+
+    def acquire(self):
+        """
+        Waits until one more request may be sent
+
+        :return: the start time of the request
+        """
+        with self.condition:
+            while self.active >= max(self.min_limit, int(self.limit)):
+                self.condition.wait()
+            self.active += 1
+        return time.monotonic()
+
+    def release(self, start, throttled=False, kind=None):
+        """
+        Records the end of a request and adjusts the limit
+
+        :param start: the start time returned by acquire
+        :param throttled: the service refused the request as overloaded
+        :param kind: the kind of the request, latencies of different kinds
+                     are not compared
+        """
+        now = time.monotonic()
+        with self.condition:
+            self.active -= 1
+            if throttled:
+                self.throttled += 1
+                if start >= self.lowered:
+                    self.limit = max(self.min_limit,
+                                     self.limit * self.decrease)
+                    self.lowered = now
+            else:
+                latency = now - start
+                usual = self.latency.get(kind)
+                if usual is None or latency < usual:
+                    self.latency[kind] = latency
+                else:
+                    # the usual latency slowly follows the slower requests
+                    self.latency[kind] = 0.9 * usual + 0.1 * latency
+                if usual is None or latency <= self.latency_factor * usual:
+                    self.limit = min(self.max_limit,
+                                     self.limit + 1.0 / self.limit)
+            self.condition.notify_all()
+
+    def stats(self):
+        with self.condition:
+            return {
+                "limit": self.limit,
+                "active": self.active,
+                "throttled": self.throttled,
+                "retries": self.retries
+            }
+
+
+class TokenBucket(object):
+    """
+    Limits a rate while allowing bursts
+
+    The bucket holds at most burst tokens and is refilled with rate tokens
+    per second. Taking more tokens than the bucket holds waits until it is
+    full and leaves a debt that delays the next takers.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        :param rate: the tokens per second
+        :param burst: the size of the bucket, defaults to one second of rate
+        """
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        # Internal function adding the tokens since the last update, the
+        # lock is held
+        now = time.monotonic()
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount):
+        """
+        Takes tokens and waits until they are available
+
+        :param amount: the number of tokens
+        """
+        while True:
+            with self.lock:
+                self._refill()
+                needed = min(amount, self.burst)
+                if self.tokens >= needed:
+                    self.tokens -= amount
+                    return
+                wait = (needed - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def charge(self, amount):
+        """
+        Takes tokens for something that already happened without waiting
+
+        :param amount: the number of tokens
+        """
+        with self.lock:
+            self._refill()
+            self.tokens -= amount
+
+
+class RateLimiter(object):
+    """
+    Limits the bytes and requests per second of all transfers of a process
+
+    An upload takes the tokens for its bytes before it is sent. The size of
+    a download is only known when it is done, its bytes are charged
+    afterwards and delay the following requests.
+    """
+
+    def __init__(self, bytes_per_second=None, requests_per_second=None,
+                 burst_bytes=None, burst_requests=None):
+        """
+        :param bytes_per_second: the bandwidth, None is unlimited
+        :param requests_per_second: the request rate, None is unlimited
+        :param burst_bytes: the bytes sent at once after a pause, defaults
+                            to one second of bandwidth
+        :param burst_requests: the requests sent at once after a pause,
+                               defaults to one second of requests
+        """
+        self.bytes = None
+        self.requests = None
+        if bytes_per_second:
+            self.bytes = TokenBucket(bytes_per_second, burst_bytes)
+        if requests_per_second:
+            self.requests = TokenBucket(requests_per_second, burst_requests)
+
+    @staticmethod
+    def _upload_size(name, args, kwargs):
+        # Internal function returning the bytes sent by a request
+        if name in ['put_block', 'create_blob_from_bytes']:
+            data = args[2] if len(args) > 2 else \
+                kwargs.get('block', kwargs.get('blob'))
+            return len(data) if data is not None else 0
+        if name == 'create_blob_from_path':
+            path = args[2] if len(args) > 2 else kwargs.get('file_path')
+            return os.path.getsize(path)
+        return 0
+
+    @staticmethod
+    def _download_size(name, result):
+        # Internal function returning the bytes received by a request
+        if name == 'get_blob_to_bytes':
+            return len(result.content)
+        if name == 'get_blob_to_path':
+            return result.properties.content_length or 0
+        return 0
+
+    def before(self, name, args, kwargs):
+        """
+        Waits until a request may be sent
+
+        :param name: the name of the method of the service
+        :param args: the positional arguments of the request
+        :param kwargs: the keyword arguments of the request
+        """
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.bytes is not None:
+            size = self._upload_size(name, args, kwargs)
+            if size > 0:
+                self.bytes.take(size)
+
+    def after(self, name, result):
+        """
+        Charges the bytes received by a request
+
+        :param name: the name of the method of the service
+        :param result: the result of the request
+        """
+        if self.bytes is not None:
+            size = self._download_size(name, result)
+            if size > 0:
+                self.bytes.charge(size)
+
+
+class ThrottledService(object):
+    """
+    Sends the requests of a BlockBlobService through a
+    ConcurrencyController
+
+    Requests refused with 500 or 503 and requests that failed without an
+    answer lower the limit of the ConcurrencyController. They are retried
+    up to retries times like requests that timed out with 408 or failed
+    with another 5xx status than 501 and 505, which are transient errors
+    of a single request and keep the limit. Before a retry the request
+    waits a random time between zero and backoff * 2 ** attempt seconds,
+    at most max_backoff, so the clients of an overloaded account do not
+    come back at the same time. Streams passed to a request are rewound
+    before it is sent again. An optional RateLimiter paces the requests and
+    their bytes.
+
+    A batch request succeeds even if some of its sub-requests fail. A batch
+    with sub-requests refused with 500 or 503 counts as throttled, and the
+    sub-requests that failed with a transient error are sent again in a
+    smaller batch after the same backoff.
+    """
+
+    def __init__(self, storage_service, controller, retries=6, backoff=0.5,
+                 max_backoff=30.0, limiter=None):
+        """
+        :param storage_service: the BlockBlobService
+        :param controller: the ConcurrencyController of the account
+        :param retries: the number of retries of a request
+        :param backoff: the base of the waiting time in seconds
+        :param max_backoff: the longest waiting time in seconds
+        :param limiter: the RateLimiter of the process or None
+        """
+        self.storage_service = storage_service
+        self.controller = controller
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiter = limiter
+
+    @staticmethod
+    def _throttled(error):
+        if isinstance(error, AzureHttpError):
+            return error.status_code in THROTTLED
+        return isinstance(error, AzureException)
+
+    @staticmethod
+    def _transient(status):
+        # Internal function checking if a request that failed with status
+        # may succeed when it is sent again
+        return status == 408 or (status >= 500 and status not in PERMANENT)
+
+    @classmethod
+    def _retried(cls, error):
+        if isinstance(error, AzureHttpError):
+            return cls._transient(error.status_code)
+        return isinstance(error, AzureException)
+
+    @staticmethod
+    def _refused(response):
+        # Internal function checking if a sub-response of a batch was
+        # refused as overloaded
+        return not response.is_successful and \
+            response.http_response.status in THROTTLED
+
+    @classmethod
+    def _failed(cls, response):
+        # Internal function checking if a sub-response of a batch failed
+        # with a transient error
+        return not response.is_successful and \
+            cls._transient(response.http_response.status)
+
+    def _wait(self, attempt):
+        # Internal function waiting before a retry
+        with self.controller.condition:
+            self.controller.retries += 1
+        time.sleep(random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+
+    def _call(self, name, method, *args, **kwargs):
+        streams = [(arg, arg.tell())
+                   for arg in list(args) + list(kwargs.values())
+                   if hasattr(arg, 'seek') and hasattr(arg, 'tell')]
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.before(name, args, kwargs)
+            start = self.controller.acquire()
+            try:
+                result = method(*args, **kwargs)
+            except Exception as error:
+                self.controller.release(start,
+                                        throttled=self._throttled(error),
+                                        kind=name)
+                if not self._retried(error) or attempt >= self.retries:
+                    raise
+            else:
+                throttled = name == 'batch_delete_blobs' and \
+                    any(self._refused(response) for response in result)
+                self.controller.release(start, throttled=throttled,
+                                        kind=name)
+                if self.limiter is not None:
+                    self.limiter.after(name, result)
+                return result
+            self._wait(attempt)
+            attempt += 1
+            for stream, position in streams:
+                stream.seek(position)
+
+    def _batch_delete_blobs(self, method, batch_delete_sub_requests,
+                            **kwargs):
+        # Internal function sending a batch and the sub-requests that
+        # failed with a transient error again, returns the responses in the order
+        # of the sub-requests
+        responses = [None] * len(batch_delete_sub_requests)
+        pending = list(range(len(batch_delete_sub_requests)))
+        attempt = 0
+        while True:
+            result = self._call(
+                'batch_delete_blobs', method,
+                [batch_delete_sub_requests[index] for index in pending],
+                **kwargs)
+            failed = []
+            for index, response in zip(pending, result):
+                responses[index] = response
+                if self._failed(response):
+                    failed.append(index)
+            if len(failed) == 0 or attempt >= self.retries:
+                return responses
+            self._wait(attempt)
+            attempt += 1
+            pending = failed
+
+    def __getattr__(self, name):
+        attribute = getattr(self.storage_service, name)
+        if not callable(attribute) or name in LOCAL:
+            return attribute
+        if name == 'batch_delete_blobs':
+            return functools.partial(self._batch_delete_blobs, attribute)
+        return functools.partial(self._call, name, attribute)
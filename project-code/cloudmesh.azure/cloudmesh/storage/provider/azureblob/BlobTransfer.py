@@ -0,0 +1,220 @@
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cloudmesh.common.console import Console
+
+
+class _DownloadedFile(object):
+    # Internal class reading an object of a provider without open_read from
+    # a temporary local copy
+
+    def __init__(self, provider, name):
+        self.directory = tempfile.mkdtemp()
+        path = os.path.join(self.directory, os.path.basename(name))
+        provider.get(source='/' + name, destination=path)
+        self.stream = open(path, 'rb')
+
+    def read(self, size=-1):
+        return self.stream.read(size)
+
+    def close(self):
+        self.stream.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class _UploadedFile(object):
+    # Internal class writing an object of a provider without open_write to a
+    # temporary local file that is put on close
+
+    def __init__(self, provider, name):
+        self.provider = provider
+        self.folder = '/' + os.path.dirname(name)
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, os.path.basename(name))
+        self.stream = open(self.path, 'wb')
+
+    def write(self, data):
+        return self.stream.write(data)
+
+    def close(self):
+        self.stream.close()
+        try:
+            self.provider.put(source=self.path, destination=self.folder)
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def abort(self):
+        self.stream.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class Transfer(object):
+    """
+    Copies objects from one storage provider to another without local files
+
+    Every object is read from the open_read stream of the source and
+    written to the open_write stream of the destination. A reader thread
+    fills a queue of at most buffers chunks of chunk_size bytes while the
+    writer empties it, so the download and the upload of an object overlap
+    and the memory of a transfer is bounded by max_workers * buffers *
+    chunk_size plus the blocks the destination stream uploads at the same
+    time. max_workers objects are transferred concurrently.
+
+    A provider of the StorageABC without streams is read with get and
+    written with put through a temporary local file.
+    """
+
+    def __init__(self, source, destination, chunk_size=4 * 1024 * 1024,
+                 buffers=4, max_workers=8):
+        """
+        :param source: the provider the objects are read from
+        :param destination: the provider the objects are written to
+        :param chunk_size: the size of a chunk in the queue
+        :param buffers: the number of chunks in the queue of an object
+        :param max_workers: the number of objects transferred concurrently
+        """
+        self.source = source
+        self.destination = destination
+        self.chunk_size = chunk_size
+        self.buffers = buffers
+        self.max_workers = max_workers
+
+    def _reader(self, name):
+        # Internal function opening an object of the source for reading
+        if hasattr(self.source, 'open_read'):
+            return self.source.open_read(source=name)
+        return _DownloadedFile(self.source, name)
+
+    def _writer(self, name):
+        # Internal function opening an object of the destination for writing
+        if hasattr(self.destination, 'open_write'):
+            return self.destination.open_write(destination=name)
+        return _UploadedFile(self.destination, name)
+
+    def _read(self, reader, chunks, stop):
+        # Internal function running in the reader thread, it ends the queue
+        # with an empty chunk or the exception of the read
+        try:
+            while not stop.is_set():
+                chunk = reader.read(self.chunk_size)
+                chunks.put(chunk)
+                if len(chunk) == 0:
+                    return
+        except Exception as error:
+            chunks.put(error)
+
+    def transfer_object(self, task):
+        """
+        Copies a single object through a bounded queue
+
+        :param task: the name of the object in the source and in the
+                     destination
+        :return: the number of bytes copied
+        """
+        source_name, destination_name = task
+        reader = self._reader(source_name)
+        chunks = queue.Queue(maxsize=self.buffers)
+        stop = threading.Event()
+        thread = threading.Thread(target=self._read,
+                                  args=(reader, chunks, stop), daemon=True)
+        size = 0
+        try:
+            writer = self._writer(destination_name)
+            thread.start()
+            try:
+                while True:
+                    chunk = chunks.get()
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    if len(chunk) == 0:
+                        break
+                    writer.write(chunk)
+                    size += len(chunk)
+            except BaseException:
+                if hasattr(writer, 'abort'):
+                    writer.abort()
+                raise
+            writer.close()
+        finally:
+            stop.set()
+            # empties the queue so that a blocked reader thread can end
+            while thread.is_alive():
+                try:
+                    chunks.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            reader.close()
+        return size
+
+    @staticmethod
+    def _entry(cloud, name, source_name, size=None, error=None):
+        # Internal function building the dict of a transferred object
+        entry = {
+            "name": name,
+            "cm": {
+                "kind": "storage",
+                "cloud": cloud,
+                "name": name,
+                "source": source_name,
+                "status": "exists" if error is None else "failed"
+            }
+        }
+        if error is None:
+            entry["cm"]["size"] = size
+        else:
+            entry["cm"]["error"] = str(error)
+        return entry
+
+    def copy(self, source=None, destination=None, recursive=False):
+        """
+        Copies a file or a folder of the source to the destination
+
+        :param source: a file or folder of the source provider
+        :param destination: the new name of a file, a destination ending
+                            with / is the folder the file is copied to. The
+                            new name of a folder.
+        :param recursive: copy the sub-folders of a folder
+        :return: dict of the copied objects, objects that could not be
+                 copied have the status failed
+        """
+        entries = self.source.list(source=source, recursive=recursive)
+        if entries is None:
+            return Console.error(
+                "File does not exist: {file}".format(file=source))
+        source_path = source.strip('/')
+        destination_path = destination.strip('/')
+        names = [entry["cm"]["name"] for entry in entries]
+        if names == [source_path]:
+            # a single file
+            if destination.endswith('/') or destination_path == '':
+                destination_path = os.path.join(
+                    destination_path, os.path.basename(source_path))
+            tasks = [(source_path, destination_path)]
+        else:
+            # a folder, its path is replaced by the destination
+            source_prefix = source_path + '/' if source_path else ''
+            destination_prefix = \
+                destination_path + '/' if destination_path else ''
+            tasks = [(name, destination_prefix + name[len(source_prefix):])
+                     for name in names]
+
+        cloud = getattr(self.destination, 'cloud', None)
+        result = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for task, future in [
+                    (task, executor.submit(self.transfer_object, task))
+                    for task in tasks]:
+                source_name, destination_name = task
+                try:
+                    result.append(self._entry(cloud, destination_name,
+                                              source_name, future.result()))
+                except Exception as error:
+                    Console.error("Transfer failed: {file}: {error}".format(
+                        file=source_name, error=error))
+                    result.append(self._entry(cloud, destination_name,
+                                              source_name, error=error))
+        return result
@@ -1,75 +1,296 @@
+import base64
+import hashlib
+import io
+import mmap
 import os
 import re
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 from pprint import pprint
+from urllib.parse import quote
 
-from azure.storage.blob import BlockBlobService
+from azure.common import AzureHttpError
+from azure.common import AzureMissingResourceHttpError
+from azure.storage.blob.models import BatchDeleteSubRequest
+from azure.storage.blob.models import Blob
+from azure.storage.blob.models import BlobBlock
+from azure.storage.blob.models import BlobPrefix
+from azure.storage.blob.models import BlobProperties
+from azure.storage.blob.models import BlockListType
+from azure.storage.blob.models import Include
 from cloudmesh.common.console import Console
 from cloudmesh.common.util import HEADING
 from cloudmesh.common.util import path_expand
 from cloudmesh.common.util import banner
 from cloudmesh.storage.StorageABC import StorageABC
+from cloudmesh.storage.provider.azureblob.BlobCache import BlobCache
+from cloudmesh.storage.provider.azureblob.BlobClients import BlobClients
+from cloudmesh.storage.provider.azureblob.BlobDiskCache import BlobDiskCache
+from cloudmesh.storage.provider.azureblob.BlobIndex import BlobIndex
+from cloudmesh.storage.provider.azureblob.BlobManifest import BlobCheckpoint
+from cloudmesh.storage.provider.azureblob.BlobManifest import BlobManifest
+from cloudmesh.storage.provider.azureblob.BlobPattern import BlobPattern
+from cloudmesh.storage.provider.azureblob.BlobRecord import BlobRecord
+from cloudmesh.storage.provider.azureblob.BlobStream import MAX_BLOCKS
+from cloudmesh.storage.provider.azureblob.BlobStream import MAX_BLOCK_SIZE
+from cloudmesh.storage.provider.azureblob.BlobStream import BlobReader
+from cloudmesh.storage.provider.azureblob.BlobStream import BlockStream
+from cloudmesh.storage.provider.azureblob.BlobStream import BlobWriter
+from cloudmesh.storage.provider.azureblob.BlobThrottle import ThrottledService
+
+# the most entries the service returns in one page of a listing
+PAGE_SIZE = 5000
 
 
 class Provider(StorageABC):
+    """
+    Storage provider for the Azure Blob Service
+
+    The single file operations send the following HTTP requests:
+
+        get     2  properties of the source, download
+        put     2  existence check of the destination folder, upload
+        list    1  properties of the source
+        delete  2  properties of the source, delete
+
+    A put into the container root skips the existence check. The first
+    operation of a provider sends one more request to create the container
+    if it does not exist. Files and blobs larger than
+    block_threshold are transferred in several block or range requests.
+    With the cache option a get of a small blob that was read less than
+    cache_ttl seconds ago sends no request, an older one sends a single
+    conditional download.
+    """
+
+    # Directories in Azure are virtual, empty ones are kept with this blob
+    marker_file = 'dummy.txt'
 
     def __init__(self, service=None, config="~/.cloudmesh/cloudmesh4.yaml"):
         super().__init__(service=service, config=config)
-        self.storage_service = BlockBlobService(
-            account_name=self.credentials['account_name'],
-            account_key=self.credentials['account_key'])
         self.container = self.credentials['container']
+        self.container_exists = False
         self.cloud = service
         self.service = service
+        # number of concurrent transfers used by the recursive operations
+        self.max_workers = int(self.credentials.get('max_workers', 8))
+        # files larger than block_threshold are uploaded in blocks of
+        # block_size bytes with block_workers concurrent put_block calls
+        self.block_size = int(
+            self.credentials.get('block_size', 8 * 1024 * 1024))
+        self.block_threshold = int(
+            self.credentials.get('block_threshold', 64 * 1024 * 1024))
+        self.block_workers = int(self.credentials.get('block_workers', 8))
+        # the blocks are sent from a memory mapping of the file instead of
+        # reading them into bytes
+        self.mmap_upload = bool(self.credentials.get('mmap_upload', True))
+        # the providers of a container share a client whose connection pool
+        # keeps pool_size connections alive, enough for max_workers
+        # transfers of block_workers blocks each
+        self.pool_size = int(self.credentials.get(
+            'pool_size', self.max_workers * self.block_workers))
+        # the concurrent requests adapt to the throttling of the account,
+        # refused requests are retried after a random backoff
+        self.controller = BlobClients.controller(
+            self.credentials['account_name'], self.pool_size)
+        # optional limit of the bandwidth and request rate shared by all
+        # transfers of the process
+        self.limiter = BlobClients.limiter(
+            *[float(self.credentials[name])
+              if self.credentials.get(name) else None
+              for name in ['bytes_per_second', 'requests_per_second',
+                           'burst_bytes', 'burst_requests']])
+        self.storage_service = ThrottledService(
+            BlobClients.client(
+                self.credentials['account_name'],
+                self.credentials['account_key'],
+                self.container,
+                self.pool_size),
+            self.controller,
+            int(self.credentials.get('retries', 6)),
+            float(self.credentials.get('backoff', 0.5)),
+            limiter=self.limiter)
+        # number of blobs deleted with one batch request, the service
+        # accepts at most 256
+        self.batch_size = min(256,
+                              int(self.credentials.get('batch_size', 256)))
+        # optional local index that answers list and search, a folder read
+        # longer than index_ttl seconds ago is refreshed before it is used
+        self.index = None
+        if self.credentials.get('index', False):
+            self.index = BlobIndex(path_expand(self.credentials.get(
+                'index_path',
+                '~/.cloudmesh/azureblob/{account}-{container}.db'.format(
+                    account=self.credentials['account_name'],
+                    container=self.container))))
+        self.index_ttl = float(self.credentials.get('index_ttl', 300))
+        # seconds between two checks of server side copies that are pending
+        self.copy_poll = float(self.credentials.get('copy_poll', 1))
+        # seconds after which copies that are still pending count as failed
+        self.copy_timeout = float(self.credentials.get('copy_timeout', 3600))
+        # optional in memory cache of the content of small blobs read with
+        # get, a cached blob is revalidated after cache_ttl seconds
+        self.cache = None
+        if self.credentials.get('cache', False):
+            self.cache = BlobCache(
+                int(self.credentials.get('cache_size', 64 * 1024 * 1024)),
+                int(self.credentials.get('cache_max_blob', 1024 * 1024)),
+                float(self.credentials.get('cache_ttl', 60)))
+        # optional directory with copies of downloaded blobs that is shared
+        # by all processes of the host and limited to disk_cache_size bytes
+        self.disk_cache = None
+        if self.credentials.get('disk_cache', False):
+            self.disk_cache = BlobDiskCache(
+                path_expand(self.credentials['disk_cache']),
+                int(self.credentials.get('disk_cache_size',
+                                         10 * 1024 * 1024 * 1024)),
+                bool(self.credentials.get('disk_cache_link', False)))
 
     # This method will ensure a container exists in Azure Storage Blob Service
+    # it is only sent once per provider
     def _create_container(self):
         container_name = self.container
-        self.storage_service.create_container(container_name)
+        if not self.container_exists:
+            self.storage_service.create_container(container_name)
+            self.container_exists = True
         return container_name
 
+    def _blob(self, blob_name, resource, size):
+        # Internal function building the blob of an upload from the etag and
+        # last_modified of the response instead of asking for its properties
+        properties = BlobProperties()
+        properties.blob_type = 'BlockBlob'
+        properties.etag = resource.etag
+        properties.last_modified = resource.last_modified
+        properties.content_length = size
+        return Blob(name=blob_name, props=properties)
+
     def update_dict(self, elements, func=None):
-        # this is an internal function for building dict object
+        # this is an internal function for building the records of the
+        # blobs, blobs that already are records only get their status. The
+        # records are returned as they are, converting them into dicts
+        # would double the memory of a large listing.
+        status = "deleted" if func == 'delete' else "exists"
         d = []
         for element in elements:
-            entry = element.__dict__
-            entry["cm"] = {
+            if isinstance(element, BlobRecord):
+                element.status = status
+            else:
+                element = BlobRecord(element, self.cloud, status)
+            d.append(element)
+        return d
+
+    def failed_dict(self, name, error):
+        # this is an internal function for building the dict of a failed blob
+        return {
+            "name": name,
+            "cm": {
                 "kind": "storage",
                 "cloud": self.cloud,
-                "name": element.name
+                "name": name,
+                "status": "failed",
+                "error": str(error)
             }
-            element.properties = element.properties.__dict__
-            entry["cm"]["created"] = \
-                element.properties["creation_time"].isoformat()[0]
-            entry["cm"]["updated"] = \
-                element.properties["last_modified"].isoformat()[0]
-            entry["cm"]["size"] = element.properties["content_length"]
-            del element.properties["copy"]
-            del element.properties["lease"]
-            del element.properties["content_settings"]
-            del element.properties["creation_time"]
-            del element.properties["last_modified"]
-            if func == 'delete':
-                entry["cm"]["status"] = "deleted"
-            else:
-                entry["cm"]["status"] = "exists"
-            if element.properties["deleted_time"] is not None:
-                entry["cm"]["deleted"] = element.properties[
-                    "deleted_time"].isoformat()
-                del element.properties["deleted_time"]
-            d.append(entry)
-        return d
+        }
 
-    def cloud_path(self, srv_path):
+    def _parallel(self, func, tasks, max_workers=None):
+        """
+        Runs func on every task with a bounded pool of worker threads
 
-        container_name = self._create_container()
+        Tasks are read lazily from the iterable and at most twice the number
+        of workers are in flight, so a generator of millions of tasks does
+        not have to be held in memory. A failing task does not stop the
+        others, its exception is returned instead of the result.
 
-        # Internal function to determine if the cloud path specified is file or folder or mix
+        :param func: the function called with a single task
+        :param tasks: an iterable of tasks
+        :param max_workers: the number of threads, defaults to max_workers
+                            of the provider
+        :return: generator of (task, result, error) tuples in completion
+                 order
+        """
+        max_workers = max_workers or self.max_workers
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            tasks = iter(tasks)
+            exhausted = False
+            while True:
+                while not exhausted and len(running) < 2 * max_workers:
+                    try:
+                        task = next(tasks)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    running[executor.submit(func, task)] = task
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        yield task, future.result(), None
+                    else:
+                        yield task, None, error
+
+    def _properties(self, blob_name):
+        # Internal function returning the blob with its properties or None
+        # if it does not exist
+        if blob_name == '':
+            return None
+        try:
+            if self.cache is not None and blob_name in self.cache:
+                blob = self._cached(blob_name)
+                return Blob(name=blob.name, props=blob.properties)
+            return self.storage_service.get_blob_properties(self.container,
+                                                            blob_name)
+        except AzureMissingResourceHttpError:
+            return None
+
+    def _cached(self, blob_name, etag=None):
+        # Internal function reading a small blob through the cache, a stale
+        # blob is revalidated with a read that only returns the content if
+        # its ETag changed
+        def fetch(cached_etag):
+            try:
+                return self.storage_service.get_blob_to_bytes(
+                    self.container, blob_name, if_none_match=cached_etag)
+            except AzureMissingResourceHttpError:
+                self.cache.remove(blob_name)
+                raise
+            except AzureHttpError as e:
+                if e.status_code == 304:
+                    return None
+                raise
+
+        return self.cache.read(blob_name, fetch, etag)
+
+    def _cloud_blob(self, srv_path, live=True):
+        """
+        Determines if the cloud path specified is file or folder or mix
+
+        A single properties request both classifies the path and returns
+        the properties of the blob, which the callers use instead of asking
+        for them again.
+
+        :param srv_path: the path in the container
+        :param live: if False and the provider has an index, the path is
+                     looked up in the index without a request
+        :return: the file, the folder and the blob, the blob is None if the
+                 path is not a blob
+        """
         b_folder = None
         b_file = None
         src_file = srv_path
         if srv_path.startswith('/'):
             src_file = srv_path[1:]
-        if self.storage_service.exists(container_name, src_file):
+        if self.index is not None and not live:
+            blob = self._indexed(src_file)
+        else:
+            self._create_container()
+            blob = self._properties(src_file)
+        if blob is not None:
             b_file = os.path.basename(srv_path)
             if srv_path.startswith('/'):
                 b_folder = os.path.dirname(src_file)
@@ -78,15 +299,318 @@ class Provider(StorageABC):
                 b_folder = src_file
             else:
                 b_file = os.path.basename(srv_path)
+        return b_file, b_folder, blob
+
+    def cloud_path(self, srv_path):
+        # Internal function to determine if the cloud path specified is file or folder or mix
+        b_file, b_folder, blob = self._cloud_blob(srv_path)
         return b_file, b_folder
 
+    @staticmethod
+    def _prefix(folder):
+        # Internal function turning a virtual folder into a listing prefix
+        if folder is None or folder.strip('/') == '':
+            return None
+        return folder.strip('/') + '/'
+
+    def _list_folder(self, folder=None, recursive=False, num_results=None,
+                     live=True):
+        """
+        Lists the content of a virtual folder with a server side query
+
+        The folder is turned into a prefix so that only the blobs below it
+        are read from the service. Without recursive the delimiter '/' is
+        used and the sub-folders are returned as BlobPrefix entries, so the
+        cost of a listing depends on the size of the folder and not on the
+        size of the container.
+
+        :param folder: the virtual folder, '' or None is the container root
+        :param recursive: list all blobs in all sub-folders
+        :param num_results: stop after this number of entries
+        :param live: if False and the provider has an index, the listing is
+                     answered from the index
+        :return: generator of Blob and BlobPrefix objects
+        """
+        prefix = self._prefix(folder)
+        if self.index is not None and not live:
+            self._fresh_index(folder, recursive)
+            return self.index.list(prefix or '', recursive, num_results)
+        delimiter = None if recursive else '/'
+        return self._list_blobs(prefix, delimiter, num_results)
+
+    def _page(self, prefix, delimiter, page_size, marker, include=None):
+        # Internal function reading one page of a listing with a single
+        # request, returns the entries and the marker of the next page.
+        # Only the items of the first request are read, iterating the
+        # generator would fetch the next pages past the storage_service.
+        generator = self.storage_service.list_blobs(
+            self.container, prefix=prefix, num_results=page_size,
+            delimiter=delimiter, marker=marker, include=include)
+        return list(generator.items), generator.next_marker
+
+    def _list_blobs(self, prefix=None, delimiter=None, num_results=None,
+                    include=None):
+        """
+        Lists blobs with one request per page
+
+        The SDK would read the pages after the first one with its own
+        client, so they would not be throttled or retried. Here every page
+        is a separate list_blobs request of the storage_service.
+
+        :param prefix: only blobs starting with prefix
+        :param delimiter: the delimiter of the sub-folders or None
+        :param num_results: stop after this number of entries
+        :param include: the Include of the listing
+        :return: generator of Blob and BlobPrefix objects
+        """
+        marker = None
+        while True:
+            page_size = PAGE_SIZE if num_results is None else \
+                min(PAGE_SIZE, num_results)
+            entries, marker = self._page(prefix, delimiter, page_size,
+                                         marker, include)
+            for entry in entries:
+                yield entry
+            if num_results is not None:
+                num_results -= len(entries)
+                if num_results <= 0:
+                    return
+            if not marker:
+                return
+
+    def list_pages(self, source=None, recursive=False, page_size=5000,
+                   marker=None):
+        """
+        Lists a virtual folder page by page
+
+        Every page is read with one request and only one page is held at a
+        time. The marker of a page continues the listing after it, a listing
+        that was interrupted is resumed by passing the last marker again.
+        The pages are always read from the service, not from the index.
+
+        :param source: the virtual folder, '' or None is the container root
+        :param recursive: list all blobs in all sub-folders, otherwise the
+                          names of the sub-folders are returned as folders
+        :param page_size: the number of entries requested at once, the
+                          service returns at most 5000
+        :param marker: the marker of a previous page to continue after it
+        :return: generator of dicts with the BlobRecords of the blobs, the
+                 folders and the marker of the next page, which is None on
+                 the last page
+        """
+        self._create_container()
+        prefix = self._prefix(source)
+        delimiter = None if recursive else '/'
+        while True:
+            entries, marker = self._page(prefix, delimiter, page_size, marker)
+            page = {"blobs": [], "folders": [], "marker": marker or None}
+            for entry in entries:
+                if isinstance(entry, BlobPrefix):
+                    page["folders"].append(entry.name)
+                else:
+                    page["blobs"].append(BlobRecord(entry, self.cloud))
+            yield page
+            if not marker:
+                break
+
+    def _fresh(self, prefix, recursive):
+        # Internal function checking if the index read prefix within
+        # index_ttl seconds
+        refreshed = self.index.refreshed(prefix, recursive)
+        return refreshed is not None and \
+            time.time() - refreshed <= self.index_ttl
+
+    def _refresh(self, prefix, recursive):
+        # Internal function reading the blobs starting with prefix into the
+        # index, without recursive only the names up to the next / are read
+        return self.index.refresh(
+            prefix, self._list_blobs(prefix or None,
+                                     None if recursive else '/'),
+            recursive)
+
+    def _fresh_index(self, folder, recursive=True):
+        # Internal function refreshing the index of a folder that was not
+        # read completely within index_ttl seconds
+        prefix = self._prefix(folder) or ''
+        if not self._fresh(prefix, recursive):
+            self._refresh(prefix, recursive)
+
+    def _indexed(self, blob_name):
+        # Internal function returning the blob from the index or None if it
+        # does not exist. A path that is a folder or in a folder read within
+        # index_ttl is answered without a request, otherwise a listing of
+        # the name with a delimiter finds the blob without reading its
+        # parent folder.
+        if blob_name == '':
+            return None
+        prefixes = [blob_name + '/', blob_name,
+                    self._prefix(os.path.dirname(blob_name)) or '']
+        if not any(self._fresh(prefix, False) for prefix in prefixes):
+            self._refresh(blob_name, False)
+        return self.index.get(blob_name)
+
+    def refresh_index(self, folder=None, recursive=True):
+        """
+        Updates the local index of a virtual folder from the service
+
+        :param folder: the virtual folder, '' or None is the container root
+        :param recursive: read all sub-folders, otherwise only the blobs of
+                          the folder and the names of its sub-folders
+        :return: the number of blobs written to and removed from the index
+        """
+        return self._refresh(self._prefix(folder) or '', recursive)
+
+    def _folder_exists(self, folder):
+        # Internal function to check if any blob lives below a virtual folder
+        for blob in self._list_folder(folder, recursive=True, num_results=1):
+            return True
+        return False
+
     def local_path(self, source_path):
         src_path = path_expand(source_path)
         if src_path[0] not in [".", "/", "~"]:
             src_path = os.path.join(os.getcwd(), source_path)
         return src_path
 
-    def get(self, source=None, destination=None, recursive=False):
+    def _get_ranges(self, blob, download_path, block_size=None,
+                    max_workers=None):
+        """
+        Downloads a large blob in concurrent byte ranges
+
+        The ranges are written into a preallocated file and every finished
+        range is appended to the journal <download_path>.checkpoint, see
+        BlobCheckpoint. A later call resumes from the journal as long as the
+        ETag of the blob is unchanged, otherwise the download starts over.
+        The ranges are read with if_match so a blob changing during the
+        download fails it instead of mixing two versions.
+
+        :param blob: the blob with its properties
+        :param download_path: the local file
+        :param block_size: the size of a range, defaults to block_size of
+                           the provider
+        :param max_workers: the number of concurrent ranges, defaults to
+                            block_workers of the provider
+        :return: the blob
+        """
+        container_name = self.container
+        block_size = block_size or self.block_size
+        max_workers = max_workers or self.block_workers
+        size = blob.properties.content_length
+        etag = blob.properties.etag
+        checkpoint = download_path + '.checkpoint'
+
+        if os.path.exists(checkpoint) and \
+                not (os.path.isfile(download_path) and
+                     os.path.getsize(download_path) == size):
+            os.remove(checkpoint)
+        done = BlobCheckpoint(checkpoint, header={
+            "etag": etag,
+            "size": size,
+            "block_size": block_size
+        })
+        if done.count == 0:
+            with open(download_path, 'wb') as stream:
+                stream.truncate(size)
+
+        def get_range(index):
+            offset = index * block_size
+            end = min(offset + block_size, size) - 1
+            part = self.storage_service.get_blob_to_bytes(
+                container_name, blob.name, start_range=offset,
+                end_range=end, if_match=etag)
+            with open(download_path, 'r+b') as stream:
+                stream.seek(offset)
+                stream.write(part.content)
+
+        count = (size + block_size - 1) // block_size
+        todo = [index for index in range(count) if index not in done]
+        # every finished range is recorded before a failure is raised
+        failure = None
+        try:
+            for index, result, error in self._parallel(get_range, todo,
+                                                       max_workers):
+                if error is None:
+                    done.record(index)
+                elif failure is None:
+                    failure = error
+        finally:
+            done.close()
+        if failure is not None:
+            raise failure
+
+        os.remove(checkpoint)
+        return blob
+
+    def _download_file(self, blob_name, download_path, blob=None,
+                       link=True):
+        # Internal function to download a single blob, blobs larger than
+        # block_threshold are downloaded in resumable ranges. The blob from
+        # a listing or properties request saves asking for its size. Without
+        # link a copy from the disk cache is never hard linked.
+        if blob is None:
+            blob = self.storage_service.get_blob_properties(self.container,
+                                                            blob_name)
+        if self.cache is not None and \
+                blob.properties.content_length <= self.cache.max_blob:
+            blob = self._cached(blob_name, blob.properties.etag)
+            with open(download_path, 'wb') as stream:
+                stream.write(blob.content)
+            return Blob(name=blob.name, props=blob.properties)
+        if self.disk_cache is not None:
+            self.disk_cache.get(
+                "{account}/{container}".format(
+                    account=self.credentials['account_name'],
+                    container=self.container),
+                blob_name, blob.properties.etag, download_path,
+                lambda path: self._download_blob(blob, path),
+                link=None if link else False)
+            return Blob(name=blob_name, props=blob.properties)
+        return self._download_blob(blob, download_path)
+
+    def _download_blob(self, blob, download_path):
+        # Internal function downloading a blob to a local file
+        if blob.properties.content_length > self.block_threshold:
+            return self._get_ranges(blob, download_path)
+        return self.storage_service.get_blob_to_path(self.container,
+                                                     blob.name,
+                                                     download_path)
+
+    def _make_dirs(self, downloads):
+        # Internal function creating the local directory of every download
+        # once per folder before the download is handed to a worker
+        created = set()
+        for task in downloads:
+            cre_path = os.path.dirname(task[1])
+            if cre_path not in created:
+                os.makedirs(cre_path, 0o777, exist_ok=True)
+                created.add(cre_path)
+            yield task
+
+    def _get_files(self, downloads, max_workers=None, link=True):
+        """
+        Downloads blobs concurrently
+
+        :param downloads: iterable of (blob name, local path, blob) tuples
+        :param max_workers: the number of concurrent downloads
+        :param link: allow hard links to the disk cache, files whose times
+                     are changed afterwards must not be linked
+        :return: the list of downloaded blobs and the list of failed dicts
+        """
+        obj_list = []
+        failed = []
+        for (blob_name, download_path, _), blob, error in self._parallel(
+                lambda task: self._download_file(*task, link=link),
+                self._make_dirs(downloads), max_workers):
+            if error is not None:
+                Console.error("Download failed: {file}: {error}".format(
+                    file=blob_name, error=error))
+                failed.append(self.failed_dict(blob_name, error))
+            else:
+                obj_list.append(blob)
+        return obj_list, failed
+
+    def get(self, source=None, destination=None, recursive=False,
+            max_workers=None):
         """
         Downloads file from Destination(Service) to Source(local)
 
@@ -94,16 +618,19 @@ class Provider(StorageABC):
         :param destination: the destination can be a directory or file
         :param recursive: in case of directory the recursive refers to all
                           subdirectories in the specified source
-        :return: dict
+        :param max_workers: the number of concurrent downloads of a folder,
+                            defaults to max_workers of the provider
+        :return: dict, blobs that could not be downloaded have the status
+                 failed
 
         """
 
         HEADING()
-        container_name = self._create_container()
+        self._create_container()
 
         # Determine service path - file or folder
         #blob_file, blob_folder = self.cloud_path(destination)
-        blob_file, blob_folder = self.cloud_path(source)
+        blob_file, blob_folder, cloud_blob = self._cloud_blob(source)
 
         # Determine local path i.e. download-to-folder
         src_path = self.local_path(destination)
@@ -127,37 +654,31 @@ class Provider(StorageABC):
                 "Local directory not found or file already exists: {directory}".format(directory=src_path))
         else:
             obj_list = []
+            failed = []
             if blob_folder is None:
                 # file only specified
                 if not recursive:
-                    if self.storage_service.exists(container_name, blob_file):
+                    if cloud_blob is not None:
                         if rename == 'Y':
-                            download_path = os.path.join(os.path.dirname(src_path), blob_file)
+                            download_path = src_path
                         else:
                             download_path = os.path.join(src_path, blob_file)
                         obj_list.append(
-                            self.storage_service.get_blob_to_path(container_name,
-                                                                  blob_file,
-                                                                  download_path))
-                        if rename == 'Y':
-                            rename_path = src_path
-                            os.rename(download_path, rename_path)
+                            self._download_file(cloud_blob.name,
+                                                download_path, cloud_blob))
                     else:
                         return Console.error(
                             "File does not exist: {file}".format(
                                 file=blob_file))
                 else:
-                    file_found = False
-                    get_gen = self.storage_service.list_blobs(container_name)
-                    for blob in get_gen:
-                        if os.path.basename(blob.name) == blob_file:
-                            download_path = os.path.join(src_path, blob_file)
-                            obj_list.append(
-                                self.storage_service.get_blob_to_path(container_name,
-                                                                      blob.name,
-                                                                      download_path))
-                            file_found = True
-                    if not file_found:
+                    get_gen = self._list_folder(recursive=True)
+                    obj_list, failed = self._get_files(
+                        ((blob.name, os.path.join(src_path, blob.name),
+                          blob)
+                         for blob in get_gen
+                         if os.path.basename(blob.name) == blob_file),
+                        max_workers=max_workers)
+                    if len(obj_list) + len(failed) == 0:
                         return Console.error(
                             "File does not exist: {file}".format(
                                 file=blob_file))
@@ -165,53 +686,41 @@ class Provider(StorageABC):
                 if blob_file is None:
                     # Folder only specified
                     if not recursive:
-                        file_found = False
-                        get_gen = self.storage_service.list_blobs(container_name)
-                        for blob in get_gen:
-                            if os.path.dirname(blob.name) == blob_folder:
-                                download_path = os.path.join(src_path,
-                                                             os.path.basename(
-                                                                 blob.name))
-                                obj_list.append(self.storage_service.get_blob_to_path(
-                                    container_name, blob.name, download_path))
-                                file_found = True
-                        if not file_found:
+                        get_gen = self._list_folder(blob_folder)
+                        obj_list, failed = self._get_files(
+                            ((blob.name,
+                              os.path.join(src_path,
+                                           os.path.basename(blob.name)),
+                              blob)
+                             for blob in get_gen
+                             if not isinstance(blob, BlobPrefix)),
+                            max_workers=max_workers)
+                        if len(obj_list) + len(failed) == 0:
                             return Console.error(
                                 "Directory does not exist: {directory}".format(
                                     directory=blob_folder))
                     else:
-                        file_found = False
-                        srch_gen = self.storage_service.list_blobs(container_name)
-                        for blob in srch_gen:
-                            if (os.path.dirname(blob.name) == blob_folder) or \
-                                (os.path.commonpath([blob.name,
-                                                     blob_folder]) == blob_folder):
-                                cre_path = os.path.join(src_path, os.path.dirname(blob.name))
-                                if not os.path.isdir(cre_path):
-                                    os.makedirs(cre_path, 0o777)
-                                download_path = os.path.join(src_path, blob.name)
-                                obj_list.append(self.storage_service.get_blob_to_path(
-                                    container_name, blob.name, download_path))
-                                file_found = True
-                        if not file_found:
+                        srch_gen = self._list_folder(blob_folder, recursive=True)
+                        obj_list, failed = self._get_files(
+                            ((blob.name, os.path.join(src_path, blob.name),
+                              blob)
+                             for blob in srch_gen),
+                            max_workers=max_workers)
+                        if len(obj_list) + len(failed) == 0:
                             return Console.error(
                                 "Directory does not exist: {directory}".format(
                                     directory=blob_folder))
                 else:
                     # SOURCE is specified with Directory and file
                     if not recursive:
-                        if self.storage_service.exists(container_name, source[1:]):
+                        if cloud_blob is not None:
                             if rename == 'Y':
-                                download_path = os.path.join(os.path.dirname(src_path), blob_file)
+                                download_path = src_path
                             else:
                                 download_path = os.path.join(src_path, blob_file)
                             obj_list.append(
-                                self.storage_service.get_blob_to_path(container_name,
-                                                                      source[1:],
-                                                                      download_path))
-                            if rename == 'Y':
-                                rename_path = src_path
-                                os.rename(download_path, rename_path)
+                                self._download_file(source[1:], download_path,
+                                                    cloud_blob))
                         else:
                             return Console.error(
                                 "File does not exist: {file}".format(
@@ -219,11 +728,191 @@ class Provider(StorageABC):
                     else:
                         return Console.error(
                             "Invalid arguments, recursive not applicable")
-        dict_obj = self.update_dict(obj_list)
+        dict_obj = self.update_dict(obj_list) + failed
         #pprint(dict_obj)
         return dict_obj
 
-    def put(self, service=None, source=None, destination=None, recursive=False):
+    def _block_ids(self, upl_path, size, block_size):
+        """
+        Returns the block ids of a block upload
+
+        The ids are derived from the path, size, modification time and block
+        size of the file, so an interrupted upload of an unchanged file finds
+        its blocks again while a modified file gets new ones.
+
+        :param upl_path: the local file
+        :param size: the size of the file
+        :param block_size: the size of a block
+        :return: list of block ids, one per block
+        """
+        stat = os.stat(upl_path)
+        tag = hashlib.md5("{path}:{size}:{mtime}:{block}".format(
+            path=upl_path, size=size, mtime=stat.st_mtime_ns,
+            block=block_size).encode()).hexdigest()[:16]
+        count = max(1, (size + block_size - 1) // block_size)
+        return ["{tag}-{index:06d}".format(tag=tag, index=index)
+                for index in range(count)]
+
+    def _put_blocks(self, upl_file, upl_path, block_size=None,
+                    max_workers=None):
+        """
+        Uploads a large file in blocks with concurrent put_block calls
+
+        The blocks are committed with a single put_block_list. Blocks that
+        are already uploaded but not committed from an earlier attempt of the
+        same file are not sent again. A file that would need more than
+        MAX_BLOCKS blocks is sent in larger blocks. With mmap_upload the
+        file is memory mapped and every block is sent as a slice of the
+        mapping, the pages of a sent block are released again, so the memory
+        used stays near one block per worker.
+
+        :param upl_file: the blob name
+        :param upl_path: the local file
+        :param block_size: the size of a block, defaults to block_size of
+                           the provider
+        :param max_workers: the number of concurrent blocks, defaults to
+                            block_workers of the provider
+        :return: the result of put_block_list
+        """
+        container_name = self.container
+        block_size = block_size or self.block_size
+        max_workers = max_workers or self.block_workers
+        size = os.path.getsize(upl_path)
+        block_size = max(block_size, -(-size // MAX_BLOCKS))
+        if block_size > MAX_BLOCK_SIZE:
+            raise ValueError(
+                "{path} is larger than {count} blocks of {size} bytes".format(
+                    path=upl_path, count=MAX_BLOCKS, size=MAX_BLOCK_SIZE))
+        block_ids = self._block_ids(upl_path, size, block_size)
+
+        uploaded = set()
+        try:
+            block_list = self.storage_service.get_block_list(
+                container_name, upl_file,
+                block_list_type=BlockListType.Uncommitted)
+            for block in block_list.uncommitted_blocks:
+                uploaded.add((block.id, block.size))
+        except AzureMissingResourceHttpError:
+            pass
+
+        def read_block(offset, length):
+            with open(upl_path, 'rb') as stream:
+                stream.seek(offset)
+                return stream.read(length)
+
+        def put_block(index):
+            offset = index * block_size
+            length = min(block_size, size - offset)
+            if (block_ids[index], length) in uploaded:
+                return
+            if mapped is None:
+                self.storage_service.put_block(container_name, upl_file,
+                                               read_block(offset, length),
+                                               block_ids[index])
+                return
+            with BlockStream(view[offset:offset + length]) as block:
+                self.storage_service.put_block(container_name, upl_file,
+                                               block, block_ids[index])
+            if release:
+                mapped.madvise(mmap.MADV_DONTNEED, offset, length)
+
+        mapped = None
+        if self.mmap_upload and size > 0:
+            stream = open(upl_path, 'rb')
+            mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mapped)
+            # pages can only be released on block boundaries
+            release = hasattr(mapped, 'madvise') and \
+                hasattr(mmap, 'MADV_DONTNEED') and \
+                block_size % mmap.PAGESIZE == 0
+        # all blocks are finished before the mapping is closed
+        failure = None
+        try:
+            for index, result, error in self._parallel(
+                    put_block, range(len(block_ids)), max_workers):
+                if error is not None and failure is None:
+                    failure = error
+        finally:
+            if mapped is not None:
+                view.release()
+                mapped.close()
+                stream.close()
+        if failure is not None:
+            raise failure
+
+        return self.storage_service.put_block_list(
+            container_name, upl_file,
+            [BlobBlock(id=block_id) for block_id in block_ids])
+
+    def _upload_file(self, upl_file, upl_path):
+        # Internal function to upload a single file, a missing upl_path
+        # creates the marker of an empty directory and files larger than
+        # block_threshold are uploaded in blocks
+        container_name = self.container
+        if upl_path is None:
+            self.storage_service.create_blob_from_bytes(container_name,
+                                                        upl_file, b' ')
+            return None
+        size = os.path.getsize(upl_path)
+        if size > self.block_threshold:
+            resource = self._put_blocks(upl_file, upl_path)
+        else:
+            resource = self.storage_service.create_blob_from_path(
+                container_name, upl_file, upl_path)
+        if self.cache is not None:
+            self.cache.remove(upl_file)
+        return self._blob(upl_file, resource, size)
+
+    def _walk_uploads(self, src_path, blob_folder):
+        """
+        Generates the (blob name, local path) pairs of a recursive upload
+
+        The blob name is the path of the file relative to src_path below
+        blob_folder. Empty directories are returned with the local path
+        None so that their marker blob is created.
+
+        :param src_path: the local directory
+        :param blob_folder: the virtual folder in the container
+        :return: generator of (blob name, local path) tuples
+        """
+        for (root, folders, files) in os.walk(src_path, topdown=True):
+            rel_path = os.path.relpath(root, src_path)
+            if rel_path == '.':
+                new_dir = blob_folder
+            else:
+                new_dir = '/'.join([blob_folder] + rel_path.split(os.sep))
+                new_dir = new_dir.strip('/')
+            if len(files) == 0 and len(folders) == 0 and rel_path != '.':
+                yield new_dir + '/' + self.marker_file, None
+            for base in files:
+                if new_dir == '':
+                    upl_file = base
+                else:
+                    upl_file = new_dir + '/' + base
+                yield upl_file, os.path.join(root, base)
+
+    def _put_files(self, uploads, max_workers=None):
+        """
+        Uploads files concurrently
+
+        :param uploads: iterable of (blob name, local path) tuples
+        :param max_workers: the number of concurrent uploads
+        :return: the list of uploaded blobs and the list of failed dicts
+        """
+        obj_list = []
+        failed = []
+        for (upl_file, upl_path), blob, error in self._parallel(
+                lambda task: self._upload_file(*task), uploads, max_workers):
+            if error is not None:
+                Console.error("Upload failed: {file}: {error}".format(
+                    file=upl_path, error=error))
+                failed.append(self.failed_dict(upl_file, error))
+            elif blob is not None:
+                obj_list.append(blob)
+        return obj_list, failed
+
+    def put(self, service=None, source=None, destination=None, recursive=False,
+            max_workers=None):
         """
         Uploads file from Source(local) to Destination(Service)
 
@@ -231,16 +920,19 @@ class Provider(StorageABC):
         :param destination: the destination can be a directory or file
         :param recursive: in case of directory the recursive refers to all
                           subdirectories in the specified source
-        :return: dict
+        :param max_workers: the number of concurrent uploads of a recursive
+                            put, defaults to max_workers of the provider
+        :return: dict, files that could not be uploaded have the status
+                 failed
 
         """
 
         HEADING()
         # Determine service path - file or folder
 
-        container_name = self._create_container()
+        self._create_container()
 
-        if self.storage_service.exists(container_name, destination[1:]):
+        if self._properties(destination[1:]) is not None:
             return Console.error("Directory does not exist: {directory}".format(
                 directory=destination))
         else:
@@ -252,6 +944,7 @@ class Provider(StorageABC):
 
         if os.path.isdir(src_path) or os.path.isfile(src_path):
             obj_list = []
+            failed = []
             if os.path.isfile(src_path):
                 # File only specified
                 upl_path = src_path
@@ -259,44 +952,13 @@ class Provider(StorageABC):
                     upl_file = os.path.basename(src_path)
                 else:
                     upl_file = blob_folder + '/' + os.path.basename(src_path)
-                self.storage_service.create_blob_from_path(container_name,
-                                                                 upl_file, upl_path)
-                obj_list.append(self.storage_service.get_blob_properties(container_name,
-                                                                         upl_file))
+                obj_list.append(self._upload_file(upl_file, upl_path))
             else:
                 # Folder only specified - Upload all files from folder
                 if recursive:
-                    ctr = 1
-                    old_root = ""
-                    new_dir = blob_folder
-                    for (root, folder, files) in os.walk(src_path, topdown=True):
-                        if ctr == 1:
-                            if len(files) > 0:
-                                for base in files:
-                                    upl_path = os.path.join(root, base)
-                                    if blob_folder == '':
-                                        upl_file = base
-                                    else:
-                                        upl_file = blob_folder + '/' + base
-                                    self.storage_service.create_blob_from_path(
-                                        container_name, upl_file, upl_path)
-                                    obj_list.append(self.storage_service.get_blob_properties(container_name,
-                                                                                             upl_file))
-                        else:
-                            if os.path.dirname(old_root) != os.path.dirname(root):
-                                blob_folder = new_dir
-                            new_dir = os.path.join(blob_folder, os.path.basename(root))
-                            self.create_dir(service=None, directory='/' + new_dir)
-                            if len(files) > 0:
-                                for base in files:
-                                    upl_path = os.path.join(root, base)
-                                    upl_file = new_dir + '/' + base
-                                    self.storage_service.create_blob_from_path(
-                                        container_name, upl_file, upl_path)
-                                    obj_list.append(self.storage_service.get_blob_properties(container_name,
-                                                                                             upl_file))
-                            old_root = root
-                        ctr += 1
+                    obj_list, failed = self._put_files(
+                        self._walk_uploads(src_path, blob_folder),
+                        max_workers=max_workers)
                 else:
                     return Console.error(
                         "Source is a folder, recursive expected in arguments")
@@ -304,62 +966,344 @@ class Provider(StorageABC):
             return Console.error(
                 "Directory or File does not exist: {directory}".format(
                     directory=src_path))
-        dict_obj = self.update_dict(obj_list)
+        if self.index is not None:
+            self.index.update(obj_list)
+        dict_obj = self.update_dict(obj_list) + failed
         pprint(dict_obj)
         return dict_obj
 
-    def delete(self, service=None, source=None, recursive=False):
+    def _batches(self, blobs, batch_size=None):
+        # Internal function grouping an iterable of blobs into lists
+        batch_size = batch_size or self.batch_size
+        batch = []
+        for blob in blobs:
+            batch.append(blob)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if len(batch) > 0:
+            yield batch
+
+    def _delete_blob(self, blob_name):
+        # Internal function deleting a single blob
+        if self.cache is not None:
+            self.cache.remove(blob_name)
+        self.storage_service.delete_blob(self.container, blob_name)
+
+    def _delete_batch(self, batch):
+        """
+        Deletes a list of blobs with a single Blob Batch request
+
+        Sub-requests refused with 500 or 503 are sent again in a follow-up
+        batch by the ThrottledService.
+
+        :param batch: list of blobs, at most 256
+        :return: list of (blob, error) tuples, error is None for the blobs
+                 that were deleted
+        """
+        if self.cache is not None:
+            for blob in batch:
+                self.cache.remove(blob.name)
+        responses = self.storage_service.batch_delete_blobs(
+            [BatchDeleteSubRequest(self.container, blob.name)
+             for blob in batch])
+        result = []
+        for blob, response in zip(batch, responses):
+            if response.is_successful:
+                result.append((blob, None))
+            else:
+                status = response.http_response.status
+                result.append((blob, AzureHttpError(
+                    "Batch delete failed with status {status}".format(
+                        status=status), status)))
+        return result
+
+    def _delete_blobs(self, blobs, max_workers=None):
+        """
+        Deletes blobs in batch requests that are sent concurrently
+
+        :param blobs: iterable of blobs
+        :param max_workers: the number of concurrent batch requests
+        :return: the list of deleted blobs and the list of failed dicts
+        """
+        obj_list = []
+        failed = []
+        for batch, result, error in self._parallel(
+                self._delete_batch, self._batches(blobs), max_workers):
+            if error is not None:
+                result = [(blob, error) for blob in batch]
+            for blob, blob_error in result:
+                if blob_error is None:
+                    obj_list.append(blob)
+                else:
+                    Console.error("Delete failed: {file}: {error}".format(
+                        file=blob.name, error=blob_error))
+                    failed.append(self.failed_dict(blob.name, blob_error))
+        return obj_list, failed
+
+    def delete(self, service=None, source=None, recursive=False,
+               max_workers=None):
         """
         Deletes the source from cloud service
 
         :param source: the source can be a directory or file
-        :return: None
+        :param max_workers: the number of concurrent batch requests of a
+                            folder delete, defaults to max_workers of the
+                            provider
+        :return: dict, blobs that could not be deleted have the status
+                 failed
 
         """
         HEADING()
 
-        container_name = self._create_container()
+        self._create_container()
 
-        blob_file, blob_folder = self.cloud_path(source)
+        blob_file, blob_folder, cloud_blob = self._cloud_blob(source)
 
         obj_list = []
+        failed = []
         if blob_folder is None:
             # SOURCE specified is File only
-            if self.storage_service.exists(container_name, blob_file):
-                blob_prop = self.storage_service.get_blob_properties(container_name,
-                                                                     blob_file)
-                obj_list.append(blob_prop)
-                self.storage_service.delete_blob(container_name, blob_file)
+            if cloud_blob is not None:
+                obj_list.append(cloud_blob)
+                self._delete_blob(cloud_blob.name)
             else:
                 return Console.error(
                     "File does not exist: {file}".format(file=blob_file))
         else:
             if blob_file is None:
                 # SOURCE specified is Folder only
-                del_gen = self.storage_service.list_blobs(container_name)
-                file_del = False
-                for blob in del_gen:
-                    if os.path.commonpath([blob.name, blob_folder]) == blob_folder:
-                        obj_list.append(blob)
-                        self.storage_service.delete_blob(container_name, blob.name)
-                        file_del = True
-                if not file_del:
+                del_gen = self._list_folder(blob_folder, recursive=True)
+                obj_list, failed = self._delete_blobs(del_gen,
+                                                      max_workers=max_workers)
+                if len(obj_list) + len(failed) == 0:
                     return Console.error(
                         "File does not exist: {file}".format(file=blob_folder))
             else:
                 # Source specified is both file and directory
-                if self.storage_service.exists(container_name, source[1:]):
-                    blob_prop = self.storage_service.get_blob_properties(container_name,
-                                                                         source[1:])
-                    obj_list.append(blob_prop)
-                    self.storage_service.delete_blob(container_name, source[1:])
+                if cloud_blob is not None:
+                    obj_list.append(cloud_blob)
+                    self._delete_blob(source[1:])
                 else:
                     return Console.error(
                         "File does not exist: {file}".format(file=blob_file))
-        dict_obj = self.update_dict(obj_list, func='delete')
+        if self.index is not None:
+            self.index.remove(blob.name for blob in obj_list)
+        dict_obj = self.update_dict(obj_list, func='delete') + failed
         pprint(dict_obj)
         return dict_obj
 
+    def _start_copy(self, task):
+        # Internal function starting the server side copy of a blob
+        blob, destination_name = task
+        if self.cache is not None:
+            self.cache.remove(destination_name)
+        return self.storage_service.copy_blob(
+            self.container, destination_name,
+            self.storage_service.make_blob_url(
+                self.container, quote(blob.name, safe='/')))
+
+    def _copied(self, blob, destination_name):
+        # Internal function building the destination blob of a copy, it
+        # has the size of the source
+        properties = BlobProperties()
+        properties.blob_type = blob.properties.blob_type
+        properties.content_length = blob.properties.content_length
+        return Blob(name=destination_name, props=properties)
+
+    def _poll_copies(self, pending, prefix, max_workers=None):
+        """
+        Waits until pending server side copies are finished
+
+        A few copies are checked with one properties request each, many
+        copies are checked together with a listing of their folder that
+        includes the copy status. A copy whose destination was deleted
+        fails, and so do the copies still pending after copy_timeout
+        seconds.
+
+        :param pending: dict of destination names and (blob, destination)
+                        tasks
+        :param prefix: the prefix of all destinations
+        :param max_workers: the number of concurrent properties requests
+        :return: the list of finished tasks and the list of failed dicts
+        """
+        max_workers = max_workers or self.max_workers
+        done = []
+        failed = []
+        deadline = time.monotonic() + self.copy_timeout
+        while len(pending) > 0:
+            if time.monotonic() >= deadline:
+                for name in pending:
+                    failed.append(self.failed_dict(
+                        name, "Copy did not finish within {timeout} "
+                              "seconds".format(timeout=self.copy_timeout)))
+                pending.clear()
+                break
+            time.sleep(self.copy_poll)
+            if len(pending) <= max_workers:
+                # a failed request is tried again in the next round
+                blobs = []
+                missing = set()
+                for name, blob, error in self._parallel(
+                        self._properties, list(pending), max_workers):
+                    if blob is not None:
+                        blobs.append(blob)
+                    elif error is None:
+                        missing.add(name)
+            else:
+                blobs = [blob for blob in self._list_blobs(
+                    prefix or None, include=Include(copy=True))
+                    if blob.name in pending]
+                missing = set(pending) - set(blob.name for blob in blobs)
+            for blob in blobs:
+                copy = blob.properties.copy
+                if copy.status == 'pending':
+                    continue
+                task = pending.pop(blob.name)
+                if copy.status == 'success':
+                    done.append(task)
+                else:
+                    failed.append(self.failed_dict(
+                        blob.name, "Copy {status}: {description}".format(
+                            status=copy.status,
+                            description=copy.status_description)))
+            for name in missing:
+                del pending[name]
+                failed.append(self.failed_dict(
+                    name, "Copy destination does not exist"))
+        return done, failed
+
+    def _copy_blobs(self, tasks, prefix, max_workers=None):
+        """
+        Copies blobs on the server with concurrent copy_blob calls
+
+        :param tasks: iterable of (blob, destination name) tuples
+        :param prefix: the prefix of all destinations
+        :param max_workers: the number of concurrent copy requests
+        :return: the list of finished tasks and the list of failed dicts
+        """
+        done = []
+        failed = []
+        pending = {}
+        for task, copy, error in self._parallel(self._start_copy, tasks,
+                                                max_workers):
+            if error is not None:
+                Console.error("Copy failed: {file}: {error}".format(
+                    file=task[0].name, error=error))
+                failed.append(self.failed_dict(task[1], error))
+            elif copy.status == 'success':
+                done.append(task)
+            else:
+                pending[task[1]] = task
+        polled, poll_failed = self._poll_copies(pending, prefix, max_workers)
+        return done + polled, failed + poll_failed
+
+    def _copy(self, source, destination, recursive, max_workers, move):
+        # Internal function implementing copy and move
+        self._create_container()
+
+        blob_file, blob_folder, cloud_blob = self._cloud_blob(source)
+
+        if cloud_blob is not None:
+            # SOURCE is a blob, a destination ending with / is a folder
+            destination_name = destination.lstrip('/')
+            if destination_name == '' or destination.endswith('/'):
+                destination_name += os.path.basename(cloud_blob.name)
+            if destination_name == cloud_blob.name:
+                return Console.error(
+                    "Source and destination are the same: {file}".format(
+                        file=cloud_blob.name))
+            tasks = [(cloud_blob, destination_name)]
+            prefix = os.path.dirname(destination_name)
+        elif blob_folder is not None:
+            # SOURCE is a folder, its path is replaced by the destination
+            source_prefix = self._prefix(blob_folder) or ''
+            prefix = self._prefix(destination) or ''
+            if prefix.startswith(source_prefix):
+                return Console.error(
+                    "Destination is inside the source: {directory}".format(
+                        directory=destination))
+            tasks = ((blob, prefix + blob.name[len(source_prefix):])
+                     for blob in self._list_folder(blob_folder,
+                                                   recursive=recursive)
+                     if not isinstance(blob, BlobPrefix))
+        else:
+            return Console.error(
+                "File does not exist: {file}".format(file=blob_file))
+
+        done, failed = self._copy_blobs(tasks, prefix, max_workers)
+        if len(done) + len(failed) == 0:
+            return Console.error(
+                "Directory does not exist: {directory}".format(
+                    directory=blob_folder))
+
+        if move:
+            if cloud_blob is not None:
+                sources = []
+                for blob, destination_name in done:
+                    self._delete_blob(blob.name)
+                    sources.append(blob)
+            else:
+                sources, delete_failed = self._delete_blobs(
+                    (blob for blob, destination_name in done), max_workers)
+                failed += delete_failed
+            if self.index is not None:
+                self.index.remove(blob.name for blob in sources)
+
+        obj_list = [self._copied(blob, destination_name)
+                    for blob, destination_name in done]
+        if self.index is not None:
+            self.index.update(obj_list)
+        return self.update_dict(obj_list) + failed
+
+    def copy(self, service=None, source=None, destination=None,
+             recursive=False, max_workers=None):
+        """
+        Copies a blob or a folder inside the container on the server
+
+        The data is copied by the storage service with copy_blob and does
+        not pass through this host. The copies of a folder are started
+        concurrently, copies that do not finish at once are polled
+        together every copy_poll seconds.
+
+        :param source: a blob or a folder
+        :param destination: the new name of the blob, a destination ending
+                            with / is the folder the blob is copied to. The
+                            new name of a folder.
+        :param recursive: copy the sub-folders of a folder
+        :param max_workers: the number of concurrent copy requests,
+                            defaults to max_workers of the provider
+        :return: dict of the copies, blobs that could not be copied have
+                 the status failed
+
+        """
+        HEADING()
+        return self._copy(source, destination, recursive, max_workers,
+                          move=False)
+
+    def move(self, service=None, source=None, destination=None,
+             recursive=False, max_workers=None):
+        """
+        Moves a blob or a folder inside the container on the server
+
+        The blobs are copied like in copy, a source is deleted once its
+        copy is finished. Sources whose copy failed are kept.
+
+        :param source: a blob or a folder
+        :param destination: the new name of the blob, a destination ending
+                            with / is the folder the blob is moved to. The
+                            new name of a folder.
+        :param recursive: move the sub-folders of a folder
+        :param max_workers: the number of concurrent requests, defaults to
+                            max_workers of the provider
+        :return: dict of the moved blobs under their new name, blobs that
+                 could not be moved have the status failed
+
+        """
+        HEADING()
+        return self._copy(source, destination, recursive, max_workers,
+                          move=True)
+
     def create_dir(self, service=None, directory=None):
         """
         Creates a directory in the cloud service
@@ -375,15 +1319,15 @@ class Provider(StorageABC):
         banner("Please note: Directory in Azure is a virtual folder, "
                "hence creating it with a uni-byte file - dummy.txt")
 
-        marker_file = 'dummy.txt'
+        marker_file = self.marker_file
         blob_cre = []
 
         if re.search('/', directory[1:]) is None:
             data = b' '
             blob_name = directory[1:] + '/' + marker_file
-            self.storage_service.create_blob_from_bytes(container_name, blob_name, data)
-            blob_cre.append(
-                self.storage_service.get_blob_to_bytes(container_name, blob_name))
+            resource = self.storage_service.create_blob_from_bytes(
+                container_name, blob_name, data)
+            blob_cre.append(self._blob(blob_name, resource, len(data)))
         else:
             dir_list = directory[1:].split('/')
             path_list = []
@@ -394,26 +1338,27 @@ class Provider(StorageABC):
                 path_list.append(new_path)
                 old_path = new_path
 
-            dir_gen = self.storage_service.list_blobs(container_name)
             for path in path_list:
                 path_found = False
-                for blob in dir_gen:
-                    if os.path.dirname(blob.name) == path:
-                        path_found = True
+                if path != directory[1:]:
+                    path_found = self._folder_exists(path)
                 if not path_found:
                     data = b' '
                     blob_name = path + '/' + marker_file
-                    self.storage_service.create_blob_from_bytes(container_name, blob_name, data)
+                    resource = self.storage_service.create_blob_from_bytes(
+                        container_name, blob_name, data)
                     if path == directory[1:]:
                         blob_cre.append(
-                            self.storage_service.get_blob_to_bytes(container_name, blob_name))
+                            self._blob(blob_name, resource, len(data)))
 
+        if self.index is not None:
+            self.index.update(blob_cre)
         dict_obj = self.update_dict(blob_cre)
         pprint(dict_obj[0])
         return dict_obj[0]
 
     def search(self, service=None, directory=None, filename=None,
-               recursive=False):
+               recursive=False, live=False):
         """
         searches the filename in the directory
 
@@ -421,43 +1366,49 @@ class Provider(StorageABC):
         :param filename: filename to be searched
         :param recursive: in case of directory the recursive refers to all
                           subdirectories in the specified directory
+        :param live: read from the service even if an index is configured
         :return: dict
 
         """
 
         HEADING()
-        container_name = self._create_container()
+        self._create_container()
+
+        if BlobPattern.is_glob(filename):
+            pattern = filename[1:] if filename.startswith('/') else \
+                os.path.join(directory.strip('/'), '**' if recursive else '',
+                             filename)
+            dict_obj = self.search_pattern(pattern, live=live)
+            pprint(dict_obj)
+            return dict_obj
 
-        srch_gen = self.storage_service.list_blobs(container_name)
         obj_list = []
         if not recursive:
             srch_file = os.path.join(directory[1:], filename)
             file_found = False
+            srch_gen = self._list_folder(os.path.dirname(srch_file),
+                                         live=live)
             for blob in srch_gen:
                 if blob.name == srch_file:
-                    obj_list.append(blob)
+                    obj_list.append(BlobRecord(blob, self.cloud))
                     file_found = True
             if not file_found:
                 return Console.error(
                     "File does not exist: {file}".format(file=srch_file))
         else:
             file_found = False
+            srch_gen = self._list_folder(directory, recursive=True,
+                                         live=live)
             for blob in srch_gen:
-                if re.search('/', blob.name) is not None:
-                    if os.path.basename(blob.name) == os.path.basename(filename):
-                        if os.path.commonpath([blob.name, directory[1:]]) == directory[1:]:
-                            if filename.startswith('/'):
-                                if filename[1:] in blob.name:
-                                    obj_list.append(blob)
-                                    file_found = True
-                            else:
-                                if filename in blob.name:
-                                    obj_list.append(blob)
-                                    file_found = True
-                else:
-                    if blob.name == os.path.join(directory[1:], filename):
-                        obj_list.append(blob)
-                        file_found = True
+                if os.path.basename(blob.name) == os.path.basename(filename):
+                    if filename.startswith('/'):
+                        if filename[1:] in blob.name:
+                            obj_list.append(BlobRecord(blob, self.cloud))
+                            file_found = True
+                    else:
+                        if filename in blob.name:
+                            obj_list.append(BlobRecord(blob, self.cloud))
+                            file_found = True
             if not file_found:
                 return Console.error(
                     "File does not exist: {file}".format(file=filename))
@@ -465,21 +1416,121 @@ class Provider(StorageABC):
         pprint(dict_obj)
         return dict_obj
 
-    def list(self, service=None, source=None, recursive=False):
+    def _search_prefix(self, pattern, task):
+        """
+        Lists one prefix of a pattern search
+
+        A glob is followed folder by folder. Segments without wildcards are
+        added to the prefix without a request, a segment with wildcards is
+        listed with the delimiter '/' and only the sub-folders matching it
+        are followed. The folder of a segment '**' and the literal prefix of
+        a regular expression are listed with the delimiter '/' as well, and
+        each of their sub-folders is then listed recursively, so the
+        sub-folders are read in parallel.
+
+        :param pattern: the BlobPattern
+        :param task: the prefix, the number of the segment matched next and
+                     whether the prefix is listed recursively
+        :return: the matching blobs and the tasks of the matching folders
+        """
+        prefix, index, recursive = task
+        found = []
+        tasks = []
+        if recursive:
+            delimiter = None
+            listing_prefix = prefix
+        elif pattern.is_regex:
+            delimiter = '/'
+            listing_prefix = prefix
+        else:
+            segments = pattern.segments
+            while index < len(segments) - 1 and \
+                    not BlobPattern.is_glob(segments[index]) and \
+                    segments[index] != '**':
+                prefix += segments[index] + '/'
+                index += 1
+            segment = segments[index]
+            delimiter = '/'
+            listing_prefix = prefix + BlobPattern.literal(segment)
+        for entry in self._list_blobs(listing_prefix or None, delimiter):
+            if isinstance(entry, BlobPrefix):
+                if pattern.is_regex or pattern.segments[index] == '**':
+                    tasks.append((entry.name, index, True))
+                elif index < len(pattern.segments) - 1 and \
+                        pattern.segment_regex[index].match(
+                            entry.name[len(prefix):-1]):
+                    tasks.append((entry.name, index + 1, False))
+            elif pattern.match(entry.name):
+                found.append(BlobRecord(entry, self.cloud))
+        return found, tasks
+
+    def search_pattern(self, pattern, regex=False, live=False,
+                       max_workers=None):
+        """
+        Searches the blobs whose names match a glob or regular expression
+
+        Only the blobs below the literal prefix of the pattern are listed.
+        The folders matching a glob are followed level by level and the
+        listings of one level are sent in parallel, so the folders that
+        cannot match are never read. A regular expression has to match the
+        name from its start, the sub-folders of its literal prefix are
+        listed in parallel.
+
+        :param pattern: a glob like *.parquet or **/2026-10-*/part-*, or a
+                        regular expression
+        :param regex: the pattern is a regular expression
+        :param live: read from the service even if an index is configured
+        :param max_workers: the number of concurrent listings
+        :return: dict
+
+        """
+        self._create_container()
+        pattern = BlobPattern(pattern, regex=regex)
+
+        obj_list = []
+        failed = []
+        if self.index is not None and not live:
+            folder = os.path.dirname(pattern.prefix)
+            for blob in self._list_folder(folder, recursive=True, live=False):
+                if blob.name.startswith(pattern.prefix) and \
+                        pattern.match(blob.name):
+                    obj_list.append(BlobRecord(blob, self.cloud))
+        else:
+            tasks = [(pattern.prefix if pattern.is_regex else '', 0,
+                      False)]
+            while len(tasks) > 0:
+                next_tasks = []
+                for task, result, error in self._parallel(
+                        lambda task: self._search_prefix(pattern, task),
+                        tasks, max_workers):
+                    if error is not None:
+                        failed.append(self.failed_dict(task[0], error))
+                        continue
+                    found, more = result
+                    obj_list.extend(found)
+                    next_tasks.extend(more)
+                tasks = next_tasks
+        if len(obj_list) == 0 and len(failed) == 0:
+            return Console.error(
+                "No file matches: {pattern}".format(pattern=pattern.pattern))
+        obj_list.sort(key=lambda record: record.name)
+        return self.update_dict(obj_list) + failed
+
+    def list(self, service=None, source=None, recursive=False, live=False):
         """
         lists all files specified in the source
 
         :param source: this can be a file or directory
         :param recursive: in case of directory the recursive refers to all
                           subdirectories in the specified source
+        :param live: read from the service even if an index is configured
         :return: dict
 
         """
 
         HEADING()
-        container_name = self._create_container()
-
-        blob_file, blob_folder = self.cloud_path(source)
+        blob_file, blob_folder, cloud_blob = self._cloud_blob(source,
+                                                              live=live)
 
         obj_list = []
         fold_list = []
@@ -487,21 +1538,17 @@ class Provider(StorageABC):
         if blob_folder is None:
             # SOURCE specified is File only
             if not recursive:
-                if self.storage_service.exists(container_name, blob_file):
-                    blob_prop = self.storage_service.get_blob_properties(container_name,
-                                                                         blob_file)
-                    blob_size = self.storage_service.get_blob_properties(container_name,
-                                                                         blob_file).properties.content_length
-                    obj_list.append(blob_prop)
+                if cloud_blob is not None:
+                    obj_list.append(cloud_blob)
                 else:
                     return Console.error(
                         "File does not exist: {file}".format(file=blob_file))
             else:
                 file_found = False
-                srch_gen = self.storage_service.list_blobs(container_name)
+                srch_gen = self._list_folder(recursive=True, live=live)
                 for blob in srch_gen:
                     if os.path.basename(blob.name) == blob_file:
-                        obj_list.append(blob)
+                        obj_list.append(BlobRecord(blob, self.cloud))
                         file_found = True
                 if not file_found:
                     return Console.error(
@@ -511,44 +1558,27 @@ class Provider(StorageABC):
                 # SOURCE specified is Directory only
                 if not recursive:
                     file_found = False
-                    srch_gen = self.storage_service.list_blobs(container_name)
+                    srch_gen = self._list_folder(blob_folder, live=live)
                     for blob in srch_gen:
-                        if os.path.dirname(blob.name) == blob_folder:
-                            obj_list.append(blob)
-                            file_list.append(os.path.basename(blob.name))
-                            file_found = True
-                        if blob_folder == '':
-                            if re.search('/', blob.name):
-                                srch_fold = os.path.dirname(blob.name).split('/')[0]
-                                file_found = True
-                                if srch_fold not in fold_list:
-                                    fold_list.append(srch_fold)
+                        if isinstance(blob, BlobPrefix):
+                            fold_list.append(
+                                os.path.basename(blob.name.rstrip('/')))
                         else:
-                            if blob not in obj_list:
-                                if len(os.path.dirname(blob.name).split('/')) == len(blob_folder.split('/')) + 1:
-                                    fold_match = 'Y'
-                                    for e in os.path.dirname(blob.name).split('/')[:-1]:
-                                        if e not in blob_folder.split('/'):
-                                            fold_match = 'N'
-                                    if fold_match == 'Y':
-                                        srch_fold = os.path.dirname(blob.name).split('/')[len(blob_folder.split('/'))]
-                                        file_found = True
-                                        if srch_fold not in fold_list:
-                                            fold_list.append(srch_fold)
+                            obj_list.append(BlobRecord(blob, self.cloud))
+                            file_list.append(os.path.basename(blob.name))
+                        file_found = True
                     if not file_found:
                         return Console.error(
                             "Directory does not exist: {directory}".format(
                                 directory=blob_folder))
                 else:
                     file_found = False
-                    srch_gen = self.storage_service.list_blobs(container_name)
+                    srch_gen = self._list_folder(blob_folder, recursive=True,
+                                                 live=live)
                     for blob in srch_gen:
-                        if (os.path.dirname(blob.name) == blob_folder) or \
-                            (os.path.commonpath(
-                                [blob.name, blob_folder]) == blob_folder):
-                            obj_list.append(blob)
-                            file_list.append(blob.name)
-                            file_found = True
+                        obj_list.append(BlobRecord(blob, self.cloud))
+                        file_list.append(blob.name)
+                        file_found = True
                     if not file_found:
                         return Console.error(
                             "Directory does not exist: {directory}".format(
@@ -556,13 +1586,8 @@ class Provider(StorageABC):
             else:
                 # SOURCE is specified with Directory and file
                 if not recursive:
-                    if self.storage_service.exists(container_name, source[1:]):
-                        blob_prop = self.storage_service.get_blob_properties(
-                            container_name, source[1:])
-                        blob_size = self.storage_service.get_blob_properties(
-                            container_name,
-                            source[1:]).properties.content_length
-                        obj_list.append(blob_prop)
+                    if cloud_blob is not None:
+                        obj_list.append(cloud_blob)
                     else:
                         return Console.error(
                             "File does not exist: {file}".format(
@@ -587,3 +1612,326 @@ class Provider(StorageABC):
             trl = '#' * 90
             Console.cprint("BLUE", "", trl)
         return dict_obj
+
+    def open_read(self, source=None, buffer_size=None):
+        """
+        Opens a blob for reading without a local file
+
+        The blob is read in ranges of buffer_size bytes while the file
+        object is read, so it never has to fit into memory.
+
+        :param source: the blob
+        :param buffer_size: the size of a range, defaults to block_size of
+                            the provider
+        :return: a seekable binary file object
+        """
+        self._create_container()
+        blob = self.storage_service.get_blob_properties(self.container,
+                                                        source.lstrip('/'))
+        return io.BufferedReader(
+            BlobReader(self.storage_service, self.container, blob),
+            buffer_size or self.block_size)
+
+    def iter_chunks(self, source=None, chunk_size=None):
+        """
+        Reads a blob in chunks of a fixed size
+
+        All chunks are memoryviews on the same buffer, a chunk is only valid
+        until the next one is requested.
+
+        :param source: the blob
+        :param chunk_size: the size of a chunk, defaults to block_size of
+                           the provider
+        :return: generator of memoryview objects
+        """
+        self._create_container()
+        chunk_size = chunk_size or self.block_size
+        blob = self.storage_service.get_blob_properties(self.container,
+                                                        source.lstrip('/'))
+        reader = BlobReader(self.storage_service, self.container, blob)
+        chunk = memoryview(bytearray(chunk_size))
+        while True:
+            length = reader.readinto(chunk)
+            if length == 0:
+                break
+            yield chunk[:length]
+
+    def open_write(self, destination=None, block_size=None, max_workers=None):
+        """
+        Opens a blob for writing without a local file
+
+        The data is uploaded in blocks while it is written and committed on
+        close, a with block that raises an exception discards the blob.
+
+        :param destination: the blob
+        :param block_size: the size of a block, defaults to block_size of
+                           the provider
+        :param max_workers: the number of blocks uploaded at the same time,
+                            defaults to block_workers of the provider
+        :return: a binary file object
+        """
+        self._create_container()
+        if self.cache is not None:
+            self.cache.remove(destination.lstrip('/'))
+        return BlobWriter(self.storage_service, self.container,
+                          destination.lstrip('/'),
+                          block_size or self.block_size,
+                          max_workers or self.block_workers)
+
+    @staticmethod
+    def _local_md5(local_file):
+        # Internal function computing the Content-MD5 of a local file
+        md5 = hashlib.md5()
+        with open(local_file, 'rb') as stream:
+            for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+                md5.update(chunk)
+        return base64.b64encode(md5.digest()).decode()
+
+    def _changed(self, local_file, blob, newer, checksum=False):
+        """
+        Compares a local file with a blob
+
+        :param local_file: the local file
+        :param blob: the blob with its properties from a listing
+        :param newer: 'local' if a newer local file counts as a change,
+                      'cloud' if a newer blob counts as a change
+        :param checksum: compare the Content-MD5 of the blob with the MD5 of
+                         the file instead of the modification times, blobs
+                         without Content-MD5 fall back to the times
+        :return: True if the file has to be transferred
+        """
+        stat = os.stat(local_file)
+        if stat.st_size != blob.properties.content_length:
+            return True
+        content_md5 = blob.properties.content_settings.content_md5
+        if checksum and content_md5:
+            return self._local_md5(local_file) != content_md5
+        modified = blob.properties.last_modified.timestamp()
+        if newer == 'local':
+            return stat.st_mtime > modified
+        return modified > stat.st_mtime
+
+    def sync(self, service=None, source=None, destination=None,
+             direction='put', delete=False, checksum=False, max_workers=None):
+        """
+        Synchronizes a local directory and a cloud folder, only new and
+        changed files are transferred
+
+        Files are compared by size and modification time, or with checksum
+        by the Content-MD5 of the blob. Downloaded files get the
+        last_modified time of their blob so that they count as unchanged in
+        the next sync. Marker blobs of empty directories are never deleted.
+        A get from a cloud folder that does not exist is refused, so that
+        delete does not remove every local file.
+
+        :param source: with direction put the local directory, with
+                       direction get the cloud folder
+        :param destination: with direction put the cloud folder, with
+                            direction get the local directory
+        :param direction: put uploads to the cloud, get downloads from it
+        :param delete: delete files that do not exist in the source
+        :param checksum: compare by Content-MD5
+        :param max_workers: the number of concurrent transfers
+        :return: dict of the transferred and deleted files, files that
+                 could not be transferred have the status failed
+
+        """
+
+        HEADING()
+        self._create_container()
+
+        if direction == 'put':
+            local_dir, cloud_folder = self.local_path(source), destination
+        elif direction == 'get':
+            cloud_folder, local_dir = source, self.local_path(destination)
+        else:
+            return Console.error(
+                "Invalid direction, put or get expected: {direction}".format(
+                    direction=direction))
+        if direction == 'put' and not os.path.isdir(local_dir):
+            return Console.error(
+                "Directory does not exist: {directory}".format(
+                    directory=local_dir))
+        blob_folder = cloud_folder.strip('/')
+        prefix = self._prefix(cloud_folder) or ''
+
+        remote = {}
+        for blob in self._list_folder(blob_folder, recursive=True):
+            remote[blob.name[len(prefix):]] = blob
+        if direction == 'get':
+            if len(remote) == 0:
+                return Console.error(
+                    "Directory does not exist: {directory}".format(
+                        directory=cloud_folder))
+            os.makedirs(local_dir, 0o777, exist_ok=True)
+        local = {}
+        for (root, folders, files) in os.walk(local_dir):
+            for base in files:
+                local_file = os.path.join(root, base)
+                rel_path = os.path.relpath(local_file, local_dir)
+                local[rel_path.replace(os.sep, '/')] = local_file
+
+        obj_list = []
+        del_list = []
+        failed = []
+        if direction == 'put':
+            uploads = [(prefix + name, local_file)
+                       for name, local_file in local.items()
+                       if name not in remote or
+                       self._changed(local_file, remote[name], 'local',
+                                     checksum)]
+            obj_list, failed = self._put_files(uploads, max_workers)
+            if delete:
+                extra = [blob for name, blob in remote.items()
+                         if name not in local and
+                         os.path.basename(name) != self.marker_file]
+                del_list, del_failed = self._delete_blobs(extra, max_workers)
+                failed += del_failed
+            if self.index is not None:
+                self.index.update(obj_list)
+                self.index.remove(blob.name for blob in del_list)
+        else:
+            downloads = [(blob.name,
+                          os.path.join(local_dir, *name.split('/')),
+                          blob)
+                         for name, blob in remote.items()
+                         if os.path.basename(name) != self.marker_file and
+                         (name not in local or
+                          self._changed(local[name], blob, 'cloud',
+                                        checksum))]
+            # the times of the files are set below, a file linked to the
+            # disk cache would change the time of the last use of its copy
+            obj_list, failed = self._get_files(downloads, max_workers,
+                                               link=False)
+            for blob in obj_list:
+                download_path = os.path.join(
+                    local_dir, *blob.name[len(prefix):].split('/'))
+                modified = blob.properties.last_modified.timestamp()
+                os.utime(download_path, (modified, modified))
+            if delete:
+                for name, local_file in local.items():
+                    if name not in remote:
+                        os.remove(local_file)
+                        del_list.append(Blob(name=local_file))
+
+        dict_obj = self.update_dict(obj_list)
+        if direction == 'put':
+            dict_obj += self.update_dict(del_list, func='delete')
+        else:
+            for blob in del_list:
+                dict_obj.append({
+                    "name": blob.name,
+                    "cm": {
+                        "kind": "storage",
+                        "cloud": self.cloud,
+                        "name": blob.name,
+                        "status": "deleted"
+                    }
+                })
+        dict_obj += failed
+        pprint(dict_obj)
+        return dict_obj
+
+    def _manifest_tasks(self, manifest, direction, checkpoint, counts):
+        # Internal function generating the transfers of the unfinished
+        # entries of a manifest, a destination ending with / is the folder
+        # the source is copied to
+        for index, source, destination in manifest:
+            counts["entries"] += 1
+            if index in checkpoint:
+                counts["skipped"] += 1
+                continue
+            if direction == 'put':
+                blob_name = destination.strip('/')
+                if destination.endswith('/'):
+                    blob_name = '/'.join(
+                        [blob_name, os.path.basename(source)]).strip('/')
+                yield blob_name, self.local_path(source), index
+            else:
+                blob_name = source.strip('/')
+                download_path = self.local_path(destination)
+                if destination.endswith(('/', os.sep)):
+                    download_path = os.path.join(
+                        download_path, os.path.basename(blob_name))
+                yield blob_name, download_path, None, index
+
+    def bulk(self, service=None, manifest=None, direction='put',
+             checkpoint=None, max_workers=None):
+        """
+        Transfers the files listed in a manifest as one job
+
+        The manifest is a .csv file of source,destination rows or a file of
+        JSON lines with source and destination. The container is checked
+        once for the whole job and the entries are transferred concurrently
+        over the shared connections of the provider while the manifest is
+        read. Every finished entry is recorded in the checkpoint, a job
+        started again with the same manifest and checkpoint skips them, so
+        a job that crashed resumes where it stopped and failed entries are
+        retried. The checkpoint is kept after the job, remove it to run the
+        manifest again.
+
+        :param manifest: the manifest file
+        :param direction: put uploads local sources to blob destinations,
+                          get downloads blob sources to local destinations
+        :param checkpoint: the checkpoint file, defaults to the manifest
+                           followed by .checkpoint
+        :param max_workers: the number of concurrent transfers
+        :return: dict with the number of entries, skipped and transferred
+                 entries and the failed dicts of entries that could not be
+                 transferred
+        """
+
+        HEADING()
+        self._create_container()
+
+        if direction not in ['put', 'get']:
+            return Console.error(
+                "Invalid direction, put or get expected: {direction}".format(
+                    direction=direction))
+        manifest = path_expand(manifest)
+        if not os.path.isfile(manifest):
+            return Console.error(
+                "File does not exist: {file}".format(file=manifest))
+        checkpoint = path_expand(checkpoint or manifest + '.checkpoint')
+
+        counts = {"entries": 0, "skipped": 0, "transferred": 0}
+        failed = []
+        uploaded = []
+        done = BlobCheckpoint(checkpoint, manifest)
+        try:
+            tasks = self._manifest_tasks(BlobManifest(manifest), direction,
+                                         done, counts)
+            if direction == 'put':
+                func = lambda task: self._upload_file(*task[:2])
+            else:
+                tasks = self._make_dirs(tasks)
+                func = lambda task: self._download_file(*task[:3])
+            for task, blob, error in self._parallel(func, tasks,
+                                                    max_workers):
+                if error is not None:
+                    Console.error("Transfer failed: {file}: {error}".format(
+                        file=task[0], error=error))
+                    failed.append(self.failed_dict(task[0], error))
+                    continue
+                done.record(task[-1])
+                counts["transferred"] += 1
+                if self.index is not None and direction == 'put':
+                    uploaded.append(blob)
+                    if len(uploaded) >= 1000:
+                        self.index.update(uploaded)
+                        uploaded = []
+        finally:
+            done.close()
+            if uploaded:
+                self.index.update(uploaded)
+
+        dict_obj = {
+            "manifest": manifest,
+            "checkpoint": checkpoint,
+            "entries": counts["entries"],
+            "skipped": counts["skipped"],
+            "transferred": counts["transferred"],
+            "failed": failed
+        }
+        pprint(dict_obj)
+        return dict_obj
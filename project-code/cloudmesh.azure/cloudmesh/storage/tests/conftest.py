@@ -0,0 +1,37 @@
+###############################################################
+# fixtures for the tests that run the azureblob Provider against
+# the in memory FakeBlobService instead of a storage account
+###############################################################
+import pytest
+
+from cloudmesh.storage.StorageABC import StorageABC
+from cloudmesh.storage.provider.azureblob.BlobClients import BlobClients
+from cloudmesh.storage.provider.azureblob.BlobFake import FakeBlobService
+from cloudmesh.storage.provider.azureblob.Provider import Provider
+
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    # the provider is built like in production, BlobClients hands out a
+    # shared FakeBlobService per container wrapped in a ThrottledService
+    # with the shared controller of the account
+    def init(self, service=None, config=None):
+        self.credentials = {
+            "account_name": "cloudmesh",
+            "account_key": "Y2xvdWRtZXNo",
+            "container": "test",
+            "backoff": 0.001
+        }
+
+    def client(account_name=None, account_key=None, request_session=None):
+        service = FakeBlobService()
+        service.request_session = request_session
+        return service
+
+    monkeypatch.setattr(StorageABC, "__init__", init)
+    monkeypatch.setattr(
+        "cloudmesh.storage.provider.azureblob.BlobClients.BlockBlobService",
+        client)
+    BlobClients.clear()
+    yield Provider(service="azure")
+    BlobClients.clear()
@@ -0,0 +1,56 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_async.py
+###############################################################
+import asyncio
+
+from cloudmesh.common.util import HEADING
+from cloudmesh.storage.provider.azureblob.AsyncProvider import AsyncProvider
+
+
+class Test_storage_async:
+
+    def test_gather(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for i in range(100):
+            service.add(f"a/{i}.txt", f"blob {i}".encode())
+        service.latency = 0.01
+
+        async def main():
+            async with AsyncProvider(provider=fake_provider,
+                                     max_workers=8) as provider:
+                return await asyncio.gather(*[
+                    provider.get(source=f"/a/{i}.txt",
+                                 destination=str(tmp_path / f"{i}.txt"))
+                    for i in range(100)])
+
+        results = asyncio.run(main())
+
+        assert [result[0]["name"] for result in results] == \
+            [f"a/{i}.txt" for i in range(100)]
+        for i in range(100):
+            assert (tmp_path / f"{i}.txt").read_text() == f"blob {i}"
+        assert 1 < service.peak <= 8
+
+    def test_list_iter(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for i in range(250):
+            service.add(f"a/{i:03}.txt")
+        service.add("a/b/c.txt")
+
+        async def main(recursive):
+            names = []
+            async with AsyncProvider(provider=fake_provider) as provider:
+                async for blob in provider.list_iter("/a",
+                                                     recursive=recursive,
+                                                     page_size=100):
+                    names.append(blob.name)
+            return names
+
+        calls = service.calls["list_blobs"]
+        assert asyncio.run(main(False)) == \
+            [f"a/{i:03}.txt" for i in range(250)] + ["a/b/"]
+        assert service.calls["list_blobs"] == calls + 3
+        assert asyncio.run(main(True)) == \
+            [f"a/{i:03}.txt" for i in range(250)] + ["a/b/c.txt"]
@@ -0,0 +1,90 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_bulk.py
+###############################################################
+import json
+
+from cloudmesh.common.util import HEADING
+from cloudmesh.storage.provider.azureblob.BlobFake import denied
+from cloudmesh.storage.provider.azureblob.BlobManifest import BlobCheckpoint
+
+
+class Test_storage_bulk:
+
+    def manifest(self, tmp_path, count):
+        path = tmp_path / "manifest.jsonl"
+        with open(str(path), 'w') as stream:
+            for i in range(count):
+                source = tmp_path / f"{i}.txt"
+                source.write_text(f"file {i}")
+                stream.write(json.dumps({"source": str(source),
+                                         "destination": f"/bulk/{i}.txt"}))
+                stream.write("\n")
+        return str(path)
+
+    def test_put_and_resume(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        manifest = self.manifest(tmp_path, 20)
+        # a refused request is retried, a denied one is not
+        service.fail("create_blob_from_path", denied(), times=3)
+
+        result = fake_provider.bulk(manifest=manifest, max_workers=4)
+        assert result["entries"] == 20
+        assert result["transferred"] == 17
+        assert len(result["failed"]) == 3
+        assert service.calls["create_container"] == 1
+
+        # the failed entries are retried, the others are skipped
+        result = fake_provider.bulk(manifest=manifest, max_workers=4)
+        assert result["skipped"] == 17
+        assert result["transferred"] == 3
+        assert result["failed"] == []
+        assert sorted(service.blobs) == \
+            sorted(f"bulk/{i}.txt" for i in range(20))
+        assert service.blobs["bulk/7.txt"][0] == b"file 7"
+
+        calls = service.calls["create_blob_from_path"]
+        result = fake_provider.bulk(manifest=manifest)
+        assert result["skipped"] == 20
+        assert service.calls["create_blob_from_path"] == calls
+
+    def test_get_csv(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        manifest = tmp_path / "manifest.csv"
+        lines = ["source,destination"]
+        for i in range(5):
+            service.add(f"a/{i}.txt", f"blob {i}".encode())
+            lines.append(f"/a/{i}.txt,{tmp_path}/out/{i % 2}/")
+        manifest.write_text("\n".join(lines) + "\n")
+
+        result = fake_provider.bulk(manifest=str(manifest), direction="get",
+                                    checkpoint=str(tmp_path / "done"))
+        assert result["transferred"] == 5
+        assert (tmp_path / "out" / "0" / "4.txt").read_text() == "blob 4"
+        assert (tmp_path / "out" / "1" / "3.txt").read_text() == "blob 3"
+
+    def test_checkpoint_after_crash(self, fake_provider, tmp_path):
+        HEADING()
+        manifest = self.manifest(tmp_path, 4)
+        checkpoint = manifest + ".checkpoint"
+        BlobCheckpoint(checkpoint, manifest).close()
+        # the job crashed while writing the index of entry 2
+        with open(checkpoint, 'a') as stream:
+            stream.write("0\n1\n2")
+
+        result = fake_provider.bulk(manifest=manifest)
+        assert result["skipped"] == 2
+        assert result["transferred"] == 2
+        service = fake_provider.storage_service.storage_service
+        assert sorted(service.blobs) == ["bulk/2.txt", "bulk/3.txt"]
+        done = BlobCheckpoint(checkpoint, manifest)
+        assert done.count == 4
+        done.close()
+
+        # a changed manifest starts again
+        with open(manifest, 'a') as stream:
+            stream.write("\n")
+        done = BlobCheckpoint(checkpoint, manifest)
+        assert done.count == 0
+        done.close()
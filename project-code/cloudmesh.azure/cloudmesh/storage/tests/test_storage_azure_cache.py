@@ -0,0 +1,59 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_cache.py
+###############################################################
+import os
+
+from cloudmesh.common.util import HEADING
+from cloudmesh.storage.provider.azureblob.BlobCache import BlobCache
+
+
+class Test_storage_cache:
+
+    def read(self, provider, tmp_path):
+        destination = os.path.join(str(tmp_path), "config.json")
+        provider.get(source="/a/config.json", destination=destination)
+        with open(destination, 'rb') as stream:
+            return stream.read()
+
+    def test_cached_get(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.cache = BlobCache(1024, ttl=60)
+        service.add("a/config.json", b"version 1")
+
+        assert self.read(fake_provider, tmp_path) == b"version 1"
+        calls = sum(service.calls.values())
+        for i in range(10):
+            assert self.read(fake_provider, tmp_path) == b"version 1"
+
+        assert sum(service.calls.values()) == calls
+        assert fake_provider.cache.stats()["hits"] >= 10
+        assert fake_provider.cache.stats()["misses"] == 1
+
+    def test_revalidate(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.cache = BlobCache(1024, ttl=0)
+        service.add("a/config.json", b"version 1")
+
+        assert self.read(fake_provider, tmp_path) == b"version 1"
+        assert self.read(fake_provider, tmp_path) == b"version 1"
+        assert fake_provider.cache.stats()["revalidations"] == 1
+
+        service.add("a/config.json", b"version 2")
+        assert self.read(fake_provider, tmp_path) == b"version 2"
+        assert fake_provider.cache.stats()["misses"] == 2
+
+    def test_eviction(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.cache = BlobCache(20, ttl=60)
+        for name in ["a/1", "a/2", "a/3"]:
+            service.add(name, b"0123456789")
+            fake_provider.get(source="/" + name,
+                              destination=os.path.join(str(tmp_path), "x"))
+
+        stats = fake_provider.cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["size"] == 20
+        assert "a/1" not in fake_provider.cache
@@ -0,0 +1,41 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_clients.py
+###############################################################
+from concurrent.futures import ThreadPoolExecutor
+
+from cloudmesh.common.util import HEADING
+from cloudmesh.storage.provider.azureblob.BlobClients import BlobClients
+from cloudmesh.storage.provider.azureblob.Provider import Provider
+
+
+class Test_storage_clients:
+
+    def test_shared_client(self, fake_provider):
+        HEADING()
+        BlobClients.clear()
+        first = Provider(service="azure")
+        second = Provider(service="azure")
+
+        assert first.storage_service.storage_service is \
+            second.storage_service.storage_service
+        assert first.controller is second.controller
+        session = first.storage_service.request_session
+        assert session.pool_size == first.max_workers * first.block_workers
+
+        other = BlobClients.client("cloudmesh", "Y2xvdWRtZXNo", "other")
+        assert other is not first.storage_service.storage_service
+
+    def test_pool_grows(self, fake_provider):
+        HEADING()
+        BlobClients.clear()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            clients = list(executor.map(
+                lambda size: BlobClients.client("cloudmesh", "Y2xvdWRtZXNo",
+                                                "test", size),
+                range(1, 33)))
+
+        assert len(set(map(id, clients))) == 1
+        session = clients[0].request_session
+        assert session.pool_size == 32
+        assert session.get_adapter("https://cloudmesh")._pool_maxsize == 32
+        BlobClients.clear()
@@ -0,0 +1,103 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_copy.py
+###############################################################
+from cloudmesh.common.util import HEADING
+
+
+class Test_storage_copy:
+
+    def test_copy_blob(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        service.add("a/my file.txt", b"content")
+
+        result = fake_provider.copy(source="/a/my file.txt", destination="/b/")
+
+        assert result[0]["cm"]["name"] == "b/my file.txt"
+        assert service.blobs["b/my file.txt"][0] == b"content"
+        assert "a/my file.txt" in service.blobs
+        assert service.calls["get_blob_to_path"] == 0
+
+    def test_move_folder(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.copy_poll = 0
+        service.copy_polls = 2
+        for name in ["a/1.txt", "a/2.txt", "a/b/3.txt", "c/4.txt"]:
+            service.add(name, name.encode())
+
+        result = fake_provider.move(source="/a", destination="/d",
+                                    recursive=True)
+
+        assert sorted(e["cm"]["name"] for e in result) == \
+            ["d/1.txt", "d/2.txt", "d/b/3.txt"]
+        assert sorted(service.blobs) == \
+            ["c/4.txt", "d/1.txt", "d/2.txt", "d/b/3.txt"]
+        assert service.blobs["d/b/3.txt"][0] == b"a/b/3.txt"
+        assert service.calls["batch_delete_blobs"] == 1
+
+    def test_move_many_polls_listing(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.copy_poll = 0
+        fake_provider.max_workers = 4
+        service.copy_polls = 1
+        for i in range(20):
+            service.add(f"a/{i}.txt")
+
+        result = fake_provider.move(source="/a", destination="/d",
+                                    recursive=True)
+
+        assert len(result) == 20
+        assert service.calls["get_blob_properties"] == 1
+        assert not any(name.startswith("a/") for name in service.blobs)
+
+    def test_copy_into_itself(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        service.add("a/1.txt")
+
+        assert fake_provider.copy(source="/a", destination="/a/b",
+                                  recursive=True) is None
+
+    def test_copy_destination_deleted(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.copy_poll = 0
+        fake_provider.max_workers = 2
+        service.copy_polls = 1000
+        for i in range(5):
+            service.add(f"a/{i}.txt")
+        copy_blob = service.copy_blob
+
+        def copy_and_delete(container_name, blob_name, copy_source, **kw):
+            result = copy_blob(container_name, blob_name, copy_source, **kw)
+            if blob_name != "d/0.txt":
+                del service.blobs[blob_name]
+            return result
+
+        service.copy_blob = copy_and_delete
+        # more pending copies than workers are polled with a listing
+        result = fake_provider.copy(source="/a", destination="/d",
+                                    recursive=True)
+        assert sorted(e["cm"]["name"] for e in result
+                      if e["cm"]["status"] == "failed") == \
+            [f"d/{i}.txt" for i in range(1, 5)]
+
+        # a single pending copy is polled with properties requests
+        result = fake_provider.copy(source="/a/1.txt", destination="/e/")
+        assert result[0]["cm"]["status"] == "failed"
+        assert "does not exist" in result[0]["cm"]["error"]
+
+    def test_copy_timeout(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.copy_poll = 0.01
+        fake_provider.copy_timeout = 0.05
+        service.copy_polls = 10 ** 6
+        service.add("a/1.txt")
+
+        result = fake_provider.copy(source="/a/1.txt", destination="/b/")
+
+        assert result[0]["cm"]["status"] == "failed"
+        assert "did not finish" in result[0]["cm"]["error"]
@@ -0,0 +1,44 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_delete.py
+###############################################################
+from cloudmesh.common.util import HEADING
+
+
+class Test_storage_delete:
+
+    def test_delete_folder_in_batches(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for i in range(600):
+            service.add(f"a/b/{i:04d}.txt")
+        service.add("a/keep.txt")
+
+        contents = fake_provider.delete(source="/a/b")
+
+        assert len(contents) == 600
+        for entry in contents:
+            assert entry["cm"]["status"] == "deleted"
+        assert list(service.blobs) == ["a/keep.txt"]
+        assert service.calls["batch_delete_blobs"] == 3
+        assert service.calls["delete_blob"] == 0
+
+    def test_delete_folder_reports_failed_blobs(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for i in range(10):
+            service.add(f"a/{i}.txt")
+        batch_delete_blobs = service.batch_delete_blobs
+
+        def vanish(requests, timeout=None):
+            del service.blobs["a/3.txt"]
+            return batch_delete_blobs(requests, timeout=timeout)
+
+        service.batch_delete_blobs = vanish
+
+        contents = fake_provider.delete(source="/a")
+
+        status = {entry["cm"]["name"]: entry["cm"]["status"]
+                  for entry in contents}
+        assert status.pop("a/3.txt") == "failed"
+        assert set(status.values()) == {"deleted"}
+        assert len(service.blobs) == 0
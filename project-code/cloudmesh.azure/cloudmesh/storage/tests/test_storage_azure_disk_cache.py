@@ -0,0 +1,120 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_disk_cache.py
+###############################################################
+import os
+
+from cloudmesh.common.util import HEADING
+from cloudmesh.storage.provider.azureblob.BlobDiskCache import BlobDiskCache
+
+
+class Test_storage_disk_cache:
+
+    def test_shared_copy(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        cache = str(tmp_path / "cache")
+        service.add("a/reference.bin", b"x" * 1000)
+
+        paths = []
+        for worker in range(3):
+            # every worker process has its own cache object on the directory
+            fake_provider.disk_cache = BlobDiskCache(cache, 10000,
+                                                     link=True)
+            path = str(tmp_path / f"worker{worker}.bin")
+            fake_provider.get(source="/a/reference.bin", destination=path)
+            paths.append(path)
+
+        assert service.calls["get_blob_to_path"] == 1
+        assert len({os.stat(path).st_ino for path in paths}) == 1
+        with open(paths[-1], 'rb') as stream:
+            assert stream.read() == b"x" * 1000
+
+        service.add("a/reference.bin", b"y" * 1000)
+        fake_provider.get(source="/a/reference.bin", destination=paths[0])
+        assert service.calls["get_blob_to_path"] == 2
+        with open(paths[0], 'rb') as stream:
+            assert stream.read() == b"y" * 1000
+
+    def test_quota(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.disk_cache = BlobDiskCache(str(tmp_path / "cache"),
+                                                 2500)
+        for i in range(4):
+            service.add(f"a/{i}.bin", b"x" * 1000)
+            fake_provider.get(source=f"/a/{i}.bin",
+                              destination=str(tmp_path / f"{i}.bin"))
+
+        assert fake_provider.disk_cache.stats() == \
+            {"hits": 0, "misses": 4, "evictions": 2}
+        path = tmp_path / "3.bin"
+        copy = fake_provider.disk_cache.path(
+            "cloudmesh/test", "a/3.bin", service.blobs["a/3.bin"][1])
+        # only the copy in the cache is read only
+        assert os.stat(str(path)).st_mode & 0o200
+        assert os.stat(copy).st_mode & 0o222 == 0
+        assert os.stat(str(path)).st_ino != os.stat(copy).st_ino
+        # changing the file does not change the copy in the cache
+        path.write_bytes(b"y" * 1000)
+        with open(copy, 'rb') as stream:
+            assert stream.read() == b"x" * 1000
+
+    def test_cleanup(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        root = tmp_path / "cache"
+        cache = BlobDiskCache(str(root), 2500)
+        fake_provider.disk_cache = cache
+
+        # the download of a process that crashed
+        stale = cache.path("cloudmesh/test", "a/crashed.bin", "etag")
+        os.makedirs(os.path.dirname(stale))
+        with open(stale + ".tmp", 'wb') as stream:
+            stream.write(b"x" * 500)
+        open(stale + ".tmp.checkpoint", 'w').close()
+        open(stale + ".lock", 'w').close()
+        # the ranged download of a process that crashed after the copy
+        # was removed
+        orphan = cache.path("cloudmesh/test", "a/orphan.bin", "etag")
+        os.makedirs(os.path.dirname(orphan), exist_ok=True)
+        open(orphan + ".tmp.checkpoint", 'w').close()
+
+        scans = []
+        scan = cache._scan
+        cache._scan = lambda: scans.append(1) or scan()
+        for i in range(6):
+            service.add(f"a/{i}.bin", b"x" * 1000)
+            fake_provider.get(source=f"/a/{i}.bin",
+                              destination=str(tmp_path / f"{i}.bin"))
+
+        # the first download scans, then only downloads beyond the quota
+        assert len(scans) == 5
+        files = sorted(path.name for path in root.rglob("*")
+                       if path.is_file())
+        copies = [name for name in files if "." not in name]
+        assert len(copies) == 2
+        assert files == sorted(copies + [name + ".lock" for name in copies] +
+                               ["evict.lock"])
+        assert cache.size == 2000
+
+    def test_sync_copies(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.disk_cache = BlobDiskCache(str(tmp_path / "cache"),
+                                                 10000)
+        service.add("s/a.bin", b"x" * 1000)
+        fake_provider.get(source="/s/a.bin",
+                          destination=str(tmp_path / "a.bin"))
+        path = fake_provider.disk_cache.path(
+            "cloudmesh/test", "s/a.bin", service.blobs["s/a.bin"][1])
+        used = os.stat(path).st_mtime
+
+        local_dir = tmp_path / "local"
+        fake_provider.sync(source="/s", destination=str(local_dir),
+                           direction="get")
+
+        assert os.stat(str(local_dir / "a.bin")).st_ino != \
+            os.stat(path).st_ino
+        assert os.stat(path).st_mtime >= used
+        assert os.stat(path).st_mtime > \
+            os.stat(str(local_dir / "a.bin")).st_mtime
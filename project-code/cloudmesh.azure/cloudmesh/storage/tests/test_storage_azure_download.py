@@ -0,0 +1,93 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_download.py
+###############################################################
+import os
+
+import pytest
+from azure.common import AzureHttpError
+
+from cloudmesh.common.util import HEADING
+from cloudmesh.storage.provider.azureblob.BlobFake import timed_out
+
+
+class Test_storage_download:
+
+    def interrupt(self, provider, tmp_path, after):
+        # downloads large.bin in 6 ranges, the range requests after the
+        # first ones fail
+        service = provider.storage_service.storage_service
+        provider.block_size = 8192
+        provider.block_threshold = 8192
+        provider.block_workers = 1
+        service.add("large.bin", os.urandom(5 * 8192 + 100))
+        get_blob_to_bytes = service.get_blob_to_bytes
+        calls = []
+
+        def fail(*args, **kwargs):
+            calls.append(1)
+            if len(calls) > after:
+                raise timed_out()
+            return get_blob_to_bytes(*args, **kwargs)
+
+        service.get_blob_to_bytes = fail
+        path = str(tmp_path / "large.bin")
+        with pytest.raises(AzureHttpError):
+            provider.get(source="/large.bin", destination=path)
+        service.get_blob_to_bytes = get_blob_to_bytes
+        return path
+
+    def test_resume(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        path = self.interrupt(fake_provider, tmp_path, 3)
+        with open(path + ".checkpoint") as stream:
+            # the header and one line per finished range
+            assert len(stream.readlines()) == 4
+
+        calls = service.calls["get_blob_to_bytes"]
+        fake_provider.get(source="/large.bin", destination=path)
+
+        assert service.calls["get_blob_to_bytes"] == calls + 3
+        with open(path, 'rb') as stream:
+            assert stream.read() == service.blobs["large.bin"][0]
+        assert not os.path.exists(path + ".checkpoint")
+
+    def test_changed_blob(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        path = self.interrupt(fake_provider, tmp_path, 3)
+        service.add("large.bin", os.urandom(5 * 8192 + 100))
+
+        calls = service.calls["get_blob_to_bytes"]
+        fake_provider.get(source="/large.bin", destination=path)
+
+        assert service.calls["get_blob_to_bytes"] == calls + 6
+        with open(path, 'rb') as stream:
+            assert stream.read() == service.blobs["large.bin"][0]
+        assert not os.path.exists(path + ".checkpoint")
+
+    def test_partial_failure(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for i in range(5):
+            service.add(f"a/{i}.txt", f"blob {i}".encode())
+        get_blob_to_path = service.get_blob_to_path
+
+        def deny(container_name, blob_name, file_path, **kwargs):
+            if blob_name == "a/2.txt":
+                raise AzureHttpError("denied", 403)
+            return get_blob_to_path(container_name, blob_name, file_path,
+                                    **kwargs)
+
+        service.get_blob_to_path = deny
+
+        result = fake_provider.get(source="/a", destination=str(tmp_path),
+                                   recursive=True)
+
+        status = {entry["cm"]["name"]: entry["cm"]["status"]
+                  for entry in result}
+        assert status.pop("a/2.txt") == "failed"
+        assert set(status.values()) == {"exists"}
+        assert len(status) == 4
+        assert sorted(os.listdir(str(tmp_path / "a"))) == \
+            ["0.txt", "1.txt", "3.txt", "4.txt"]
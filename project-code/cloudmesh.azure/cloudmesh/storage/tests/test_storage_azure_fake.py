@@ -0,0 +1,136 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_fake.py
+###############################################################
+import time
+
+import pytest
+from azure.common import AzureHttpError
+from azure.common import AzureMissingResourceHttpError
+from azure.storage.blob.models import BlobBlock
+from azure.storage.blob.models import BlobBlockState
+from azure.storage.blob.models import BlockListType
+
+from cloudmesh.common.util import HEADING
+from cloudmesh.storage.provider.azureblob.BlobFake import FakeBlobService
+
+
+class Test_storage_fake:
+
+    def test_ranges_and_conditions(self):
+        HEADING()
+        service = FakeBlobService()
+        etag = service.add("a.txt", b"0123456789").etag
+
+        blob = service.get_blob_to_bytes("test", "a.txt", start_range=2,
+                                         end_range=5, if_match=etag)
+        assert blob.content == b"2345"
+        assert blob.properties.content_range == "bytes 2-5/10"
+        assert service.get_blob_to_bytes(
+            "test", "a.txt", start_range=8, end_range=20).content == b"89"
+        with pytest.raises(AzureHttpError) as error:
+            service.get_blob_to_bytes("test", "a.txt", start_range=10)
+        assert error.value.status_code == 416
+
+        with pytest.raises(AzureHttpError) as error:
+            service.get_blob_to_bytes("test", "a.txt", if_none_match=etag)
+        assert error.value.status_code == 304
+        assert service.add("a.txt", b"new").etag != etag
+        with pytest.raises(AzureHttpError) as error:
+            service.get_blob_to_bytes("test", "a.txt", if_match=etag)
+        assert error.value.status_code == 412
+        with pytest.raises(AzureHttpError) as error:
+            service.create_blob_from_bytes("test", "a.txt", b"x",
+                                           if_none_match='*')
+        assert error.value.status_code == 409
+        with pytest.raises(AzureMissingResourceHttpError):
+            service.get_blob_properties("test", "b.txt")
+
+    def test_blocks(self):
+        HEADING()
+        service = FakeBlobService()
+        service.put_block("test", "a.bin", b"aaa", "id-1")
+        service.put_block("test", "a.bin", b"bb", "id-2")
+        assert "a.bin" not in service.blobs
+        blocks = service.get_block_list(
+            "test", "a.bin", block_list_type=BlockListType.All)
+        assert [(b.id, b.size) for b in blocks.uncommitted_blocks] == \
+            [("id-1", 3), ("id-2", 2)]
+        with pytest.raises(AzureHttpError) as error:
+            service.put_block("test", "a.bin", b"c", "id-10")
+        assert error.value.status_code == 400
+
+        service.put_block_list("test", "a.bin", [BlobBlock(id="id-2"),
+                                                 BlobBlock(id="id-1")])
+        assert service.blobs["a.bin"][0] == b"bbaaa"
+
+        # a committed block is kept while another one is replaced
+        service.put_block("test", "a.bin", b"cccc", "id-3")
+        service.put_block_list(
+            "test", "a.bin",
+            [BlobBlock(id="id-1", state=BlobBlockState.Committed),
+             BlobBlock(id="id-3")])
+        assert service.blobs["a.bin"][0] == b"aaacccc"
+        blocks = service.get_block_list("test", "a.bin")
+        assert [(b.id, b.size) for b in blocks.committed_blocks] == \
+            [("id-1", 3), ("id-3", 4)]
+        with pytest.raises(AzureHttpError) as error:
+            service.put_block_list("test", "a.bin", [BlobBlock(id="id-2")])
+        assert error.value.status_code == 400
+
+    def test_listing(self):
+        HEADING()
+        service = FakeBlobService()
+        for name in ["a/1", "a/2", "a/b/3", "a/c/4", "ab", "b/5"]:
+            service.add(name)
+
+        names = [item.name for item in
+                 service.list_blobs("test", prefix="a/", delimiter="/")]
+        assert names == ["a/1", "a/2", "a/b/", "a/c/"]
+        page = service.list_blobs("test", prefix="a", num_results=3)
+        assert [item.name for item in page] == ["a/1", "a/2", "a/b/3"]
+        page = service.list_blobs("test", prefix="a", num_results=3,
+                                  marker=page.next_marker)
+        assert [item.name for item in page] == ["a/c/4", "ab"]
+        assert page.next_marker is None
+
+    def test_faults(self, fake_provider):
+        HEADING()
+        service = FakeBlobService(error_rate=0.3, seed=7)
+        failures = []
+        for i in range(20):
+            try:
+                service.exists("test", "a")
+                failures.append(False)
+            except AzureHttpError as error:
+                assert error.status_code == 500
+                failures.append(True)
+        assert any(failures)
+        service = FakeBlobService(error_rate=0.3, seed=7)
+        again = []
+        for i in range(20):
+            try:
+                service.exists("test", "a")
+                again.append(False)
+            except AzureHttpError:
+                again.append(True)
+        assert again == failures
+
+        service = fake_provider.storage_service.storage_service
+        service.add("a/1.txt", b"one")
+        service.fail("get_blob_properties", times=2)
+        assert fake_provider.list(source="/a/1.txt")[0]["cm"]["size"] == 3
+        assert service.calls["get_blob_properties"] == 3
+        assert service.failed == 2
+
+    def test_latency_and_bandwidth(self):
+        HEADING()
+        service = FakeBlobService(latency=0.02, bandwidth=100000)
+        start = time.monotonic()
+        service.create_blob_from_bytes("test", "a.bin", bytes(10000))
+        service.get_blob_to_bytes("test", "a.bin")
+        elapsed = time.monotonic() - start
+        # two requests of 20 ms and 20000 bytes at 100 kB/s, a busy machine
+        # may take longer
+        assert elapsed >= 0.24
+        assert service.bytes_sent == 10000
+        assert service.bytes_received == 10000
@@ -0,0 +1,124 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_index.py
+###############################################################
+from cloudmesh.common.util import HEADING
+from cloudmesh.storage.provider.azureblob.BlobIndex import BlobIndex
+
+
+class Test_storage_index:
+
+    def test_list_from_index(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.index = BlobIndex(':memory:')
+        for name in ["a/a1.txt", "a/a2.txt", "a/b/b1.txt"]:
+            service.add(name)
+
+        first = fake_provider.list(source="/a", recursive=True)
+        calls = service.calls["list_blobs"]
+        second = fake_provider.list(source="/a", recursive=True)
+
+        assert service.calls["list_blobs"] == calls
+        assert [e["cm"]["name"] for e in first] == \
+            [e["cm"]["name"] for e in second]
+
+        folder = fake_provider.list(source="/a")
+        assert [e["cm"]["name"] for e in folder] == ["a/a1.txt", "a/a2.txt"]
+
+    def test_index_follows_changes(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.index = BlobIndex(':memory:')
+        for i in range(5):
+            service.add(f"a/{i}.txt")
+        assert len(fake_provider.list(source="/a", recursive=True)) == 5
+
+        fake_provider.delete(source="/a/3.txt")
+        assert len(fake_provider.list(source="/a", recursive=True)) == 4
+
+        service.add("a/new.txt")
+        assert len(fake_provider.list(source="/a", recursive=True)) == 4
+        assert len(fake_provider.list(source="/a", recursive=True,
+                                      live=True)) == 5
+        assert fake_provider.refresh_index("/a") == (1, 0)
+        assert len(fake_provider.list(source="/a", recursive=True)) == 5
+
+    def test_list_without_requests(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.index = BlobIndex(':memory:')
+        for name in ["a/a1.txt", "a/b/b1.txt"]:
+            service.add(name)
+        fake_provider.list(source="/a", recursive=True)
+
+        calls = sum(service.calls.values())
+        assert [e["cm"]["name"] for e in
+                fake_provider.list(source="/a/a1.txt")] == ["a/a1.txt"]
+        assert [e["cm"]["name"] for e in
+                fake_provider.list(source="/a/b")] == ["a/b/b1.txt"]
+        assert fake_provider.list(source="/a/missing.txt") is None
+        assert sum(service.calls.values()) == calls
+
+    def test_index_skips_folders(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        index = BlobIndex(':memory:')
+        names = ["a/0.txt", "a/b/0.txt", "a/b/1.txt", "a/b/c/2.txt",
+                 "a/c.txt", "a/d/0.txt", "a/e.txt", "b.txt"]
+        for name in names:
+            service.add(name)
+        index.update(service.get_blob_properties("test", name)
+                     for name in names)
+        statements = []
+        index.db.set_trace_callback(statements.append)
+
+        folder = index.list("a/", batch_size=2)
+
+        assert [entry.name for entry in folder] == \
+            ["a/0.txt", "a/b/", "a/c.txt", "a/d/", "a/e.txt"]
+        # the rows below a/b/ and a/d/ are skipped, not read
+        assert len([statement for statement in statements
+                    if "FROM blobs" in statement]) == 4
+        assert [entry.name for entry in index.list("a/", batch_size=2,
+                                                   num_results=3)] == \
+            ["a/0.txt", "a/b/", "a/c.txt"]
+        assert [entry.name for entry in index.list("a/", recursive=True,
+                                                   batch_size=2)] == \
+            names[:-1]
+
+    def test_sibling_folders_are_not_read(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.index = BlobIndex(':memory:')
+        for name in ["a/1.txt", "a/2.txt", "a/b/3.txt"]:
+            service.add(name)
+        for i in range(2000):
+            service.add(f"big/{i:04d}.txt")
+        listed = []
+        list_blobs = service.list_blobs
+
+        def record(container_name, prefix=None, delimiter=None, **kwargs):
+            page = list_blobs(container_name, prefix=prefix,
+                              delimiter=delimiter, **kwargs)
+            listed.append((prefix, delimiter, len(page.items)))
+            return page
+
+        service.list_blobs = record
+
+        folder = fake_provider.list(source="/a")
+        assert [e["cm"]["name"] for e in folder] == ["a/1.txt", "a/2.txt"]
+        # the path and the folder are read with the delimiter
+        assert listed == [("a", "/", 1), ("a/", "/", 3)]
+        assert sum(1 for name, in fake_provider.index.db.execute(
+            "SELECT name FROM blobs")) == 2
+
+        del listed[:]
+        assert len(fake_provider.list(source="/a")) == 2
+        assert [e["cm"]["name"] for e in
+                fake_provider.list(source="/a/1.txt")] == ["a/1.txt"]
+        assert listed == []
+
+        assert len(fake_provider.list(source="/a", recursive=True)) == 3
+        assert listed == [("a/", None, 3)]
+        assert all(prefix is not None and prefix.startswith("a")
+                   for prefix, delimiter, count in listed)
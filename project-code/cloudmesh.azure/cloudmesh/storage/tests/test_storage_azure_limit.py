@@ -0,0 +1,84 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_limit.py
+###############################################################
+import time
+
+import pytest
+
+from cloudmesh.common.util import HEADING
+from cloudmesh.storage.provider.azureblob.BlobThrottle import \
+    ConcurrencyController
+from cloudmesh.storage.provider.azureblob.BlobThrottle import RateLimiter
+from cloudmesh.storage.provider.azureblob.BlobThrottle import \
+    ThrottledService
+from cloudmesh.storage.provider.azureblob.BlobThrottle import TokenBucket
+
+
+class Clock(object):
+    """
+    A clock whose sleep advances the time at once, in whole microseconds
+    like a real sleep that never returns early
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now = round(self.now + max(seconds, 1e-6), 6)
+
+
+class Test_storage_limit:
+
+    def limit(self, provider, limiter):
+        service = provider.storage_service.storage_service
+        provider.storage_service = ThrottledService(
+            service, ConcurrencyController(16), limiter=limiter)
+        provider.max_workers = 16
+        return service
+
+    def test_token_bucket(self, monkeypatch):
+        HEADING()
+        clock = Clock()
+        monkeypatch.setattr(
+            "cloudmesh.storage.provider.azureblob.BlobThrottle.time", clock)
+        bucket = TokenBucket(100, burst=10)
+        for i in range(30):
+            bucket.take(1)
+        # the burst is free, the other 20 tokens take 0.2 seconds
+        assert clock.now == pytest.approx(0.2, abs=1e-4)
+
+    def test_upload_bandwidth(self, fake_provider, tmp_path):
+        HEADING()
+        self.limit(fake_provider, RateLimiter(bytes_per_second=200000,
+                                              burst_bytes=20000))
+        source = tmp_path / "source"
+        source.mkdir()
+        for i in range(10):
+            (source / f"{i}.bin").write_bytes(b"x" * 20000)
+
+        start = time.monotonic()
+        put = fake_provider.put(source=str(source), destination="/",
+                                recursive=True)
+
+        assert len(put) == 10
+        assert time.monotonic() - start > 0.8
+
+    def test_download_requests(self, fake_provider, tmp_path):
+        HEADING()
+        service = self.limit(fake_provider,
+                             RateLimiter(requests_per_second=100,
+                                         burst_requests=10))
+        for i in range(20):
+            service.add(f"a/{i}.txt")
+
+        start = time.monotonic()
+        got = fake_provider.get(source="/a", destination=str(tmp_path),
+                                recursive=True)
+
+        assert len(got) == 20
+        # 20 downloads and a few listing and properties requests
+        assert time.monotonic() - start > 0.1
+        assert service.calls["get_blob_to_path"] == 20
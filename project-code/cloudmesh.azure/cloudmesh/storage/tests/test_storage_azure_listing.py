@@ -0,0 +1,88 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_listing.py
+#
+# the operations on a folder must only list the blobs below the
+# folder and not the whole container
+###############################################################
+from cloudmesh.common.util import HEADING
+from cloudmesh.storage.provider.azureblob.Provider import PAGE_SIZE
+
+
+class Test_storage_listing:
+
+    def record(self, provider):
+        # fills the container and records the prefix, delimiter and
+        # num_results of every listing
+        service = provider.storage_service.storage_service
+        for name in ["a/b/1.txt", "a/b/2.txt", "a/b/c/3.txt", "a/x.txt"]:
+            service.add(name)
+        for i in range(50):
+            service.add(f"other/{i}.txt")
+        listings = []
+        list_blobs = service.list_blobs
+
+        def record(container_name, prefix=None, delimiter=None,
+                   num_results=None, **kwargs):
+            listings.append((prefix, delimiter, num_results))
+            return list_blobs(container_name, prefix=prefix,
+                              delimiter=delimiter, num_results=num_results,
+                              **kwargs)
+
+        service.list_blobs = record
+        return listings
+
+    def test_list(self, fake_provider):
+        HEADING()
+        listings = self.record(fake_provider)
+
+        folder = fake_provider.list(source="/a/b")
+        assert [entry["cm"]["name"] for entry in folder] == \
+            ["a/b/1.txt", "a/b/2.txt"]
+        assert listings == [("a/b/", "/", PAGE_SIZE)]
+
+        del listings[:]
+        folder = fake_provider.list(source="/a/b", recursive=True)
+        assert len(folder) == 3
+        assert listings == [("a/b/", None, PAGE_SIZE)]
+
+    def test_search(self, fake_provider):
+        HEADING()
+        listings = self.record(fake_provider)
+
+        fake_provider.search(directory="/a/b", filename="2.txt")
+        assert listings == [("a/b/", "/", PAGE_SIZE)]
+
+        del listings[:]
+        fake_provider.search(directory="/a/b", filename="3.txt",
+                             recursive=True)
+        assert listings == [("a/b/", None, PAGE_SIZE)]
+
+    def test_get(self, fake_provider, tmp_path):
+        HEADING()
+        listings = self.record(fake_provider)
+
+        result = fake_provider.get(source="/a/b", destination=str(tmp_path),
+                                   recursive=True)
+
+        assert len(result) == 3
+        assert listings == [("a/b/", None, PAGE_SIZE)]
+
+    def test_delete(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        listings = self.record(fake_provider)
+
+        result = fake_provider.delete(source="/a/b")
+
+        assert len(result) == 3
+        assert listings == [("a/b/", None, PAGE_SIZE)]
+        assert len(service.blobs) == 51
+
+    def test_create_dir(self, fake_provider):
+        HEADING()
+        listings = self.record(fake_provider)
+
+        fake_provider.create_dir(directory="/a/b/d")
+
+        # one blob is enough to know that a folder exists
+        assert listings == [("a/b/", None, 1), ("a/", None, 1)]
@@ -0,0 +1,37 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_pages.py
+###############################################################
+from cloudmesh.common.util import HEADING
+
+
+class Test_storage_pages:
+
+    def test_list_pages(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for i in range(7):
+            service.add(f"a/{i}.txt")
+        service.add("a/b/b1.txt")
+
+        pages = list(fake_provider.list_pages(source="/a", page_size=3))
+
+        assert [len(page["blobs"]) + len(page["folders"])
+                for page in pages] == [3, 3, 2]
+        assert pages[-1]["marker"] is None
+        assert pages[-1]["folders"] == ["a/b/"]
+        assert service.calls["list_blobs"] == 3
+
+    def test_list_pages_resume(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for i in range(10):
+            service.add(f"a/{i}.txt")
+
+        first = next(fake_provider.list_pages(source="/a", recursive=True,
+                                              page_size=4))
+        rest = fake_provider.list_pages(source="/a", recursive=True,
+                                        page_size=4, marker=first["marker"])
+        names = [record["cm"]["name"] for page in [first, *rest]
+                 for record in page["blobs"]]
+
+        assert names == [f"a/{i}.txt" for i in range(10)]
@@ -0,0 +1,90 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_pattern.py
+###############################################################
+from cloudmesh.common.util import HEADING
+
+
+class Test_storage_pattern:
+
+    def names(self, result):
+        return [entry["cm"]["name"] for entry in result]
+
+    def test_glob_prunes_folders(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for day in ["2026-09-30", "2026-10-01", "2026-10-02"]:
+            for part in range(2):
+                service.add(f"logs/{day}/part-{part}")
+                service.add(f"logs/{day}/other-{part}")
+        service.add("logs/2026-10-01/deep/part-9")
+        for i in range(20):
+            service.add(f"images/{i}.png")
+
+        result = fake_provider.search_pattern("logs/2026-10-*/part-*")
+
+        assert self.names(result) == [
+            "logs/2026-10-01/part-0", "logs/2026-10-01/part-1",
+            "logs/2026-10-02/part-0", "logs/2026-10-02/part-1"]
+        # one listing of logs/2026-10- and one of each matching day
+        assert service.calls["list_blobs"] == 3
+
+    def test_glob_any_folder(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for name in ["a.parquet", "a/b.parquet", "a/b/c.parquet",
+                     "a/b/c.csv"]:
+            service.add(name)
+
+        assert self.names(fake_provider.search_pattern("*.parquet")) == \
+            ["a.parquet"]
+        assert self.names(fake_provider.search_pattern("**/*.parquet")) == \
+            ["a.parquet", "a/b.parquet", "a/b/c.parquet"]
+        assert fake_provider.search_pattern("**/*.json") is None
+
+    def test_glob_any_folder_fans_out(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for folder in ["a", "b", "c"]:
+            for i in range(3):
+                service.add(f"data/{folder}/{i}/part.parquet")
+        service.add("data/top.parquet")
+        listings = []
+        list_blobs = service.list_blobs
+
+        def record(container_name, prefix=None, delimiter=None, **kwargs):
+            listings.append((prefix, delimiter))
+            return list_blobs(container_name, prefix=prefix,
+                              delimiter=delimiter, **kwargs)
+
+        service.list_blobs = record
+
+        result = fake_provider.search_pattern("data/**/*.parquet")
+
+        assert len(result) == 10
+        # the folder of '**' once, then each sub-folder recursively
+        assert sorted(listings, key=str) == [
+            ("data/", "/"), ("data/a/", None), ("data/b/", None),
+            ("data/c/", None)]
+
+    def test_regex(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for name in ["logs/2026.10/x.gz", "logs/2026.10/y.txt",
+                     "logs/2026.11/x.gz", "other/2026.10/x.gz"]:
+            service.add(name)
+
+        result = fake_provider.search_pattern(r"logs/2026\.10/.*\.gz",
+                                              regex=True)
+
+        assert self.names(result) == ["logs/2026.10/x.gz"]
+
+    def test_search_with_wildcard(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for name in ["a/a1.txt", "a/b/b1.txt", "a/b/b1.csv"]:
+            service.add(name)
+
+        result = fake_provider.search(directory="/a", filename="*1.txt",
+                                      recursive=True)
+
+        assert self.names(result) == ["a/a1.txt", "a/b/b1.txt"]
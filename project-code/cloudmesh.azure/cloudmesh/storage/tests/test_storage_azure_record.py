@@ -0,0 +1,86 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_record.py
+###############################################################
+import json
+import tracemalloc
+from collections.abc import Mapping
+
+import yaml
+
+from cloudmesh.common.util import HEADING
+from cloudmesh.storage.provider.azureblob.BlobRecord import BlobRecord
+
+
+class Test_storage_record:
+
+    def test_record_is_mapping(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        service.add("a/a1.txt", b"content of a1.txt")
+
+        record = BlobRecord(service.get_blob_properties("test", "a/a1.txt"),
+                            fake_provider.cloud)
+
+        assert not hasattr(record, "__dict__")
+        assert set(record) == {"name", "snapshot", "content", "properties",
+                               "metadata", "deleted", "cm"}
+        assert record["cm"]["size"] == len("content of a1.txt")
+        assert record["cm"]["updated"].startswith("2019-01-01T")
+        assert record["properties"]["etag"] == service.blobs["a/a1.txt"][1]
+        assert "last_modified" not in record["properties"]
+
+    def test_results_are_records(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        service.add("a/a1.txt", b"content of a1.txt")
+        service.add("a/b/b1.txt")
+        source = tmp_path / "c1.txt"
+        source.write_text("content of c1.txt")
+
+        results = [
+            fake_provider.list(source="/a", recursive=True),
+            fake_provider.search(directory="/a", filename="*.txt",
+                                 recursive=True),
+            fake_provider.get(source="/a/a1.txt",
+                              destination=str(tmp_path / "a1.txt")),
+            fake_provider.put(source=str(source), destination="/c"),
+            fake_provider.delete(source="/a/a1.txt")
+        ]
+
+        for result in results:
+            assert len(result) > 0
+            for entry in result:
+                assert isinstance(entry, BlobRecord)
+            # the records are converted where they are serialized
+            converted = [entry.to_dict() for entry in result]
+            assert json.loads(json.dumps(converted)) == converted
+            assert yaml.safe_load(yaml.safe_dump(converted)) == converted
+            assert converted == [dict(entry) for entry in result]
+
+        entry = results[-1][0].to_dict()
+        assert entry["name"] == "a/a1.txt"
+        assert entry["cm"]["status"] == "deleted"
+        assert entry["properties"]["deleted_time"] is None
+        entry["cm"]["status"] = "archived"
+        assert entry["cm"]["status"] == "archived"
+
+    def test_listing_memory(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for i in range(5000):
+            service.add(f"a/{i:05d}.txt")
+        fake_provider.list(source="/a", recursive=True)
+
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            listed = fake_provider.list(source="/a", recursive=True)
+            retained = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+
+        assert len(listed) == 5000
+        assert all(isinstance(entry, Mapping) for entry in listed)
+        # a record holds the values of a blob in slots, a dict of the blob
+        # with its nested properties and cm dicts takes about 1200 bytes
+        assert retained / len(listed) < 500
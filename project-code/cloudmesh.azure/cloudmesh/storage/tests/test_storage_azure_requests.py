@@ -0,0 +1,82 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_requests.py
+#
+# the number of requests of the single file operations must match
+# the table in the docstring of the azureblob Provider
+###############################################################
+from cloudmesh.common.util import HEADING
+from cloudmesh.common.util import writefile
+
+
+def requests(service):
+    return sum(service.calls.values())
+
+
+class Test_storage_requests:
+
+    def test_container_created_once(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        service.add("a/a1.txt")
+        fake_provider.list(source="/a/a1.txt")
+        fake_provider.list(source="/a/a1.txt")
+        assert service.calls["create_container"] == 1
+
+    def test_put(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.container_exists = True
+        writefile(str(tmp_path / "a1.txt"), "content of a1.txt")
+
+        contents = fake_provider.put(source=str(tmp_path / "a1.txt"),
+                                     destination="/a")
+
+        assert requests(service) == 2
+        assert contents[0]["cm"]["name"] == "a/a1.txt"
+        assert contents[0]["cm"]["size"] == len("content of a1.txt")
+
+    def test_put_root(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.container_exists = True
+        writefile(str(tmp_path / "a1.txt"), "content of a1.txt")
+
+        fake_provider.put(source=str(tmp_path / "a1.txt"), destination="/")
+
+        assert requests(service) == 1
+
+    def test_get(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.container_exists = True
+        service.add("a/a1.txt", b"content of a1.txt")
+
+        contents = fake_provider.get(source="/a/a1.txt",
+                                     destination=str(tmp_path))
+
+        assert requests(service) == 2
+        assert contents[0]["cm"]["name"] == "a/a1.txt"
+        assert (tmp_path / "a1.txt").read_bytes() == b"content of a1.txt"
+
+    def test_list(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.container_exists = True
+        service.add("a/a1.txt")
+
+        contents = fake_provider.list(source="/a/a1.txt")
+
+        assert requests(service) == 1
+        assert contents[0]["cm"]["name"] == "a/a1.txt"
+
+    def test_delete(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.container_exists = True
+        service.add("a/a1.txt")
+
+        contents = fake_provider.delete(source="/a/a1.txt")
+
+        assert requests(service) == 2
+        assert contents[0]["cm"]["status"] == "deleted"
+        assert len(service.blobs) == 0
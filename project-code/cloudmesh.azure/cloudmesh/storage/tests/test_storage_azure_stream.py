@@ -0,0 +1,120 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_stream.py
+###############################################################
+import io
+import os
+
+import pytest
+from azure.common import AzureMissingResourceHttpError
+
+from cloudmesh.common.util import HEADING
+
+
+class Test_storage_stream:
+
+    def ranges(self, service):
+        # records the start and end of every range request
+        ranges = []
+        get_blob_to_bytes = service.get_blob_to_bytes
+
+        def record(container_name, blob_name, start_range=None,
+                   end_range=None, **kwargs):
+            ranges.append((start_range, end_range))
+            return get_blob_to_bytes(container_name, blob_name,
+                                     start_range=start_range,
+                                     end_range=end_range, **kwargs)
+
+        service.get_blob_to_bytes = record
+        return ranges
+
+    def test_chunk_boundaries(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        content = os.urandom(3000)
+        service.add("a.bin", content)
+        service.add("b.bin", content + b"x")
+        ranges = self.ranges(service)
+
+        chunks = [bytes(chunk) for chunk in
+                  fake_provider.iter_chunks(source="/a.bin", chunk_size=1000)]
+        assert [len(chunk) for chunk in chunks] == [1000, 1000, 1000]
+        assert b"".join(chunks) == content
+        assert ranges == [(0, 999), (1000, 1999), (2000, 2999)]
+
+        chunks = [bytes(chunk) for chunk in
+                  fake_provider.iter_chunks(source="/b.bin", chunk_size=1000)]
+        assert [len(chunk) for chunk in chunks] == [1000, 1000, 1000, 1]
+        assert b"".join(chunks) == content + b"x"
+
+        del ranges[:]
+        with fake_provider.open_read(source="/a.bin",
+                                     buffer_size=1000) as stream:
+            assert stream.read(1500) == content[:1500]
+            stream.seek(2900)
+            assert stream.read() == content[2900:]
+        # a read across a boundary fetches the next range, a seek drops the
+        # buffer
+        assert ranges == [(0, 999), (1000, 1999), (2900, 2999)]
+
+    def test_empty_blob(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        service.add("empty.bin", b"")
+
+        assert list(fake_provider.iter_chunks(source="/empty.bin")) == []
+        with fake_provider.open_read(source="/empty.bin") as stream:
+            assert stream.read() == b""
+        assert service.calls["get_blob_to_bytes"] == 0
+
+        with fake_provider.open_write(destination="/new.bin"):
+            pass
+        assert service.blobs["new.bin"][0] == b""
+        assert service.calls["put_block"] == 0
+
+    def test_missing_blob(self, fake_provider):
+        HEADING()
+        with pytest.raises(AzureMissingResourceHttpError):
+            fake_provider.open_read(source="/missing.bin")
+        with pytest.raises(AzureMissingResourceHttpError):
+            next(fake_provider.iter_chunks(source="/missing.bin"))
+
+    def test_abort(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        with pytest.raises(IOError):
+            with fake_provider.open_write(destination="/a.bin",
+                                          block_size=1000) as stream:
+                stream.write(os.urandom(2500))
+                raise IOError("the source failed")
+
+        assert service.calls["put_block"] == 2
+        assert service.calls["put_block_list"] == 0
+        assert service.calls["create_blob_from_bytes"] == 0
+        assert "a.bin" not in service.blobs
+
+    def test_write_limits(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        service.latency = 0.01
+        sizes = []
+        put_block = service.put_block
+
+        def record(container_name, blob_name, block, block_id, **kwargs):
+            sizes.append(len(block))
+            return put_block(container_name, blob_name, block, block_id,
+                             **kwargs)
+
+        service.put_block = record
+        content = os.urandom(10 * 1000 + 1)
+        source = io.BytesIO(content)
+
+        with fake_provider.open_write(destination="/a.bin", block_size=1000,
+                                      max_workers=2) as stream:
+            for piece in iter(lambda: source.read(700), b""):
+                stream.write(piece)
+                # at most one block is collected while the workers send
+                assert len(stream.buffer) < 1000
+
+        assert service.blobs["a.bin"][0] == content
+        assert sizes == [1000] * 10 + [1]
+        assert service.peak <= 2
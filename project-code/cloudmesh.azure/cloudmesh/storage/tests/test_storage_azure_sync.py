@@ -0,0 +1,86 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_sync.py
+###############################################################
+import os
+from datetime import datetime
+from datetime import timezone
+
+from cloudmesh.common.util import HEADING
+
+# older than every blob of the FakeBlobService
+OLD = datetime(2018, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+class Test_storage_sync:
+
+    def local(self, tmp_path, count):
+        local_dir = tmp_path / "local"
+        (local_dir / "b").mkdir(parents=True)
+        for i in range(count):
+            path = local_dir / ("b" if i % 2 else "") / f"{i}.txt"
+            path.write_text(f"file {i}")
+            os.utime(str(path), (OLD, OLD))
+        return local_dir
+
+    def test_put_only_changed(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        local_dir = self.local(tmp_path, 4)
+
+        result = fake_provider.sync(source=str(local_dir), destination="/s")
+        assert sorted(entry["name"] for entry in result) == \
+            ["s/0.txt", "s/2.txt", "s/b/1.txt", "s/b/3.txt"]
+
+        calls = service.calls["create_blob_from_path"]
+        assert fake_provider.sync(source=str(local_dir),
+                                  destination="/s") == []
+        assert service.calls["create_blob_from_path"] == calls
+
+        # a changed size and a newer file are uploaded again
+        (local_dir / "0.txt").write_text("changed file 0")
+        os.utime(str(local_dir / "0.txt"), (OLD, OLD))
+        os.utime(str(local_dir / "b" / "1.txt"))
+        (local_dir / "2.txt").unlink()
+
+        result = fake_provider.sync(source=str(local_dir), destination="/s",
+                                    delete=True)
+        assert sorted((entry["name"], entry["cm"]["status"])
+                      for entry in result) == \
+            [("s/0.txt", "exists"), ("s/2.txt", "deleted"),
+             ("s/b/1.txt", "exists")]
+        assert service.blobs["s/0.txt"][0] == b"changed file 0"
+        assert "s/2.txt" not in service.blobs
+
+    def test_get_only_changed(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for i in range(3):
+            service.add(f"s/{i}.txt", f"blob {i}".encode())
+        local_dir = tmp_path / "local"
+
+        result = fake_provider.sync(source="/s", destination=str(local_dir),
+                                    direction="get")
+        assert len(result) == 3
+        assert (local_dir / "2.txt").read_text() == "blob 2"
+
+        calls = service.calls["get_blob_to_path"]
+        (local_dir / "extra.txt").write_text("extra")
+        service.add("s/1.txt", b"blob 1 changed")
+        result = fake_provider.sync(source="/s", destination=str(local_dir),
+                                    direction="get", delete=True)
+        assert sorted((os.path.basename(entry["name"]), entry["cm"]["status"])
+                      for entry in result) == \
+            [("1.txt", "exists"), ("extra.txt", "deleted")]
+        assert service.calls["get_blob_to_path"] == calls + 1
+        assert (local_dir / "1.txt").read_text() == "blob 1 changed"
+        assert not (local_dir / "extra.txt").exists()
+
+    def test_get_from_missing_folder(self, fake_provider, tmp_path):
+        HEADING()
+        local_dir = self.local(tmp_path, 2)
+
+        assert fake_provider.sync(source="/missing",
+                                  destination=str(local_dir),
+                                  direction="get", delete=True) is None
+        assert sorted(os.listdir(str(local_dir))) == ["0.txt", "b"]
+        assert os.listdir(str(local_dir / "b")) == ["1.txt"]
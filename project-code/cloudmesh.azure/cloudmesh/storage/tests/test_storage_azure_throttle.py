@@ -0,0 +1,143 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_throttle.py
+###############################################################
+import os
+
+import pytest
+from azure.common import AzureHttpError
+
+from cloudmesh.common.util import HEADING
+from cloudmesh.storage.provider.azureblob.BlobFake import \
+    BatchRefusingBlobService
+from cloudmesh.storage.provider.azureblob.BlobFake import \
+    PageFailingBlobService
+from cloudmesh.storage.provider.azureblob.BlobFake import \
+    ThrottlingBlobService
+from cloudmesh.storage.provider.azureblob.BlobFake import busy
+from cloudmesh.storage.provider.azureblob.BlobThrottle import \
+    ConcurrencyController
+from cloudmesh.storage.provider.azureblob.BlobThrottle import \
+    ThrottledService
+
+
+class Test_storage_throttle:
+
+    def throttle(self, provider, capacity):
+        service = ThrottlingBlobService(capacity)
+        provider.controller = ConcurrencyController(16)
+        provider.storage_service = ThrottledService(
+            service, provider.controller, retries=20, backoff=0.001,
+            max_backoff=0.05)
+        provider.max_workers = 16
+        return service
+
+    def test_put_get_under_throttling(self, fake_provider, tmp_path):
+        HEADING()
+        service = self.throttle(fake_provider, 4)
+        source = tmp_path / "source"
+        source.mkdir()
+        for i in range(60):
+            (source / f"{i}.txt").write_text(f"file {i}")
+
+        put = fake_provider.put(source=str(source), destination="/a",
+                                recursive=True)
+        target = tmp_path / "target"
+        target.mkdir()
+        got = fake_provider.get(source="/a", destination=str(target),
+                                recursive=True)
+
+        assert len([e for e in put if e["cm"]["status"] == "exists"]) == 60
+        assert len([e for e in got if e["cm"]["status"] == "exists"]) == 60
+        assert len(os.listdir(str(target / "a"))) == 60
+        assert service.throttled > 0
+        assert fake_provider.controller.limit < 16
+
+    def test_limit_recovers(self):
+        HEADING()
+        controller = ConcurrencyController(16)
+        start = controller.acquire()
+        controller.release(start, throttled=True)
+        assert controller.limit == 8
+
+        # requests that started before the decrease do not lower it again
+        controller.release(start - 1, throttled=True)
+        assert controller.limit == 8
+
+        for i in range(200):
+            controller.release(controller.acquire())
+        assert controller.limit == 16
+
+    def test_errors_are_not_retried(self, fake_provider):
+        HEADING()
+        service = self.throttle(fake_provider, 4)
+
+        assert fake_provider.list(source="/a/missing.txt") is None
+        assert service.calls["get_blob_properties"] == 1
+        assert fake_provider.controller.retries == 0
+
+    def test_transient_errors(self, fake_provider):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        controller = fake_provider.controller
+        service.add("a/1.txt", b"one")
+        limit = controller.limit
+
+        # timeouts and server errors are retried and keep the limit
+        service.fail("get_blob_properties", AzureHttpError("timeout", 408))
+        service.fail("get_blob_properties", AzureHttpError("gateway", 502))
+        assert fake_provider.list(source="/a/1.txt")[0]["cm"]["size"] == 3
+        assert service.calls["get_blob_properties"] == 3
+        assert controller.retries == 2
+        assert controller.throttled == 0
+        assert controller.limit == limit
+
+        # a busy account is retried and lowers the limit
+        service.fail("get_blob_properties", busy())
+        assert fake_provider.list(source="/a/1.txt")[0]["cm"]["size"] == 3
+        assert controller.retries == 3
+        assert controller.throttled == 1
+        assert controller.limit < limit
+
+        # errors that stay the same are not retried
+        service.fail("get_blob_properties",
+                     AzureHttpError("not implemented", 501))
+        with pytest.raises(AzureHttpError):
+            fake_provider.storage_service.get_blob_properties("test",
+                                                             "a/1.txt")
+        assert controller.retries == 3
+
+    def test_pages_are_retried(self, fake_provider):
+        HEADING()
+        service = PageFailingBlobService()
+        service.page_size = 100
+        for i in range(250):
+            service.add(f"a/{i:03d}.txt")
+        fake_provider.controller = ConcurrencyController(16)
+        fake_provider.storage_service = ThrottledService(
+            service, fake_provider.controller, backoff=0.001)
+
+        listed = fake_provider.list(source="/a", recursive=True)
+
+        assert len(listed) == 250
+        assert fake_provider.controller.retries == 2
+        assert fake_provider.controller.throttled == 2
+        assert service.calls["list_blobs"] == 3
+
+    def test_refused_deletes_are_retried(self, fake_provider):
+        HEADING()
+        service = BatchRefusingBlobService(batch_refusals=2)
+        for i in range(10):
+            service.add(f"a/{i}.txt")
+        fake_provider.controller = ConcurrencyController(16)
+        fake_provider.storage_service = ThrottledService(
+            service, fake_provider.controller, backoff=0.001)
+
+        contents = fake_provider.delete(source="/a")
+
+        assert sorted(entry["cm"]["status"] for entry in contents) == \
+            ["deleted"] * 10
+        assert len(service.blobs) == 0
+        # 10 sub-requests, then the 5 refused ones, then the 2 refused again
+        assert service.calls["batch_delete_blobs"] == 3
+        assert fake_provider.controller.retries == 2
+        assert fake_provider.controller.throttled == 2
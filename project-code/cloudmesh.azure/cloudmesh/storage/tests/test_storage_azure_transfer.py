@@ -0,0 +1,94 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_transfer.py
+###############################################################
+import os
+
+from cloudmesh.common.util import HEADING
+from cloudmesh.storage.provider.azureblob.BlobFake import FakeBlobService
+from cloudmesh.storage.provider.azureblob.BlobTransfer import Transfer
+from cloudmesh.storage.provider.azureblob.Provider import Provider
+
+
+class LocalProvider(object):
+    """
+    A provider with only get, put and list that keeps its files in a dict
+    """
+
+    def __init__(self):
+        self.files = {}
+
+    def get(self, source=None, destination=None, recursive=False):
+        with open(destination, 'wb') as stream:
+            stream.write(self.files[source.lstrip('/')])
+
+    def put(self, source=None, destination=None, recursive=False):
+        name = os.path.join(destination.strip('/'), os.path.basename(source))
+        with open(source, 'rb') as stream:
+            self.files[name] = stream.read()
+
+    def list(self, source=None, recursive=False):
+        prefix = source.strip('/')
+        return [{"cm": {"name": name}} for name in sorted(self.files)
+                if name == prefix or name.startswith(prefix + '/')]
+
+
+class Test_storage_transfer:
+
+    def test_provider_to_provider(self, fake_provider):
+        HEADING()
+        source = fake_provider.storage_service.storage_service
+        for i in range(5):
+            source.add(f"a/{i}.bin", os.urandom(100000 + i))
+        source.add("a/b/big.bin", os.urandom(300000))
+        destination = Provider(service="azure")
+        # a container of its own instead of the shared client
+        target = FakeBlobService()
+        destination.storage_service.storage_service = target
+        destination.block_size = 65536
+
+        result = Transfer(fake_provider, destination, chunk_size=10000,
+                          buffers=2, max_workers=3).copy(
+            source="/a", destination="/c", recursive=True)
+
+        assert sorted(e["cm"]["name"] for e in result) == \
+            ["c/0.bin", "c/1.bin", "c/2.bin", "c/3.bin", "c/4.bin",
+             "c/b/big.bin"]
+        for i in range(5):
+            assert target.blobs[f"c/{i}.bin"][0] == \
+                source.blobs[f"a/{i}.bin"][0]
+        assert target.blobs["c/b/big.bin"][0] == \
+            source.blobs["a/b/big.bin"][0]
+        assert target.calls["put_block"] == 15
+
+    def test_without_streams(self, fake_provider):
+        HEADING()
+        local = LocalProvider()
+        local.files["x/data.txt"] = b"some data"
+
+        result = Transfer(local, fake_provider).copy(
+            source="/x/data.txt", destination="/y/")
+        assert result[0]["cm"]["name"] == "y/data.txt"
+        service = fake_provider.storage_service.storage_service
+        assert service.blobs["y/data.txt"][0] == b"some data"
+
+        result = Transfer(fake_provider, local).copy(
+            source="/y/data.txt", destination="/z/copy.txt")
+        assert result[0]["cm"]["status"] == "exists"
+        assert local.files["z/copy.txt"] == b"some data"
+
+    def test_failed_read(self, fake_provider):
+        HEADING()
+        local = LocalProvider()
+        service = fake_provider.storage_service.storage_service
+        service.add("a/1.txt", b"one")
+        service.add("a/2.txt", b"two")
+
+        def fail(*args, **kwargs):
+            raise IOError("read failed")
+
+        service.get_blob_to_bytes = fail
+        result = Transfer(fake_provider, local).copy(
+            source="/a", destination="/b", recursive=True)
+
+        assert [e["cm"]["status"] for e in result] == ["failed", "failed"]
+        assert local.files == {}
@@ -0,0 +1,120 @@
+###############################################################
+# pytest -v --capture=no tests/test_storage_azure_upload.py
+###############################################################
+import os
+
+import pytest
+from azure.common import AzureHttpError
+
+from cloudmesh.common.util import HEADING
+
+
+class Test_storage_upload:
+
+    def upload(self, provider, tmp_path, mmap_upload):
+        service = provider.storage_service.storage_service
+        provider.block_size = 8192
+        provider.block_threshold = 8192
+        provider.mmap_upload = mmap_upload
+        content = os.urandom(5 * 8192 + 100)
+        path = str(tmp_path / "large.bin")
+        with open(path, 'wb') as stream:
+            stream.write(content)
+
+        provider.put(source=path, destination="/")
+
+        assert service.calls["put_block"] == 6
+        assert service.blobs["large.bin"][0] == content
+
+    def test_mmap_upload(self, fake_provider, tmp_path):
+        HEADING()
+        self.upload(fake_provider, tmp_path, True)
+
+    def test_read_upload(self, fake_provider, tmp_path):
+        HEADING()
+        self.upload(fake_provider, tmp_path, False)
+
+    def test_partial_failure(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        for i in range(5):
+            (tmp_path / f"{i}.txt").write_text(f"file {i}")
+        create_blob_from_path = service.create_blob_from_path
+
+        def deny(container_name, blob_name, file_path, **kwargs):
+            if blob_name == "a/2.txt":
+                raise AzureHttpError("denied", 403)
+            return create_blob_from_path(container_name, blob_name,
+                                         file_path, **kwargs)
+
+        service.create_blob_from_path = deny
+
+        result = fake_provider.put(source=str(tmp_path), destination="/a",
+                                   recursive=True)
+
+        status = {entry["cm"]["name"]: entry["cm"]["status"]
+                  for entry in result}
+        assert status.pop("a/2.txt") == "failed"
+        assert set(status.values()) == {"exists"}
+        assert len(status) == 4
+        assert sorted(service.blobs) == \
+            ["a/0.txt", "a/1.txt", "a/3.txt", "a/4.txt"]
+
+    def test_blocks_are_not_sent_again(self, fake_provider, tmp_path):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        fake_provider.block_size = 8192
+        fake_provider.block_threshold = 8192
+        fake_provider.block_workers = 1
+        content = os.urandom(5 * 8192 + 100)
+        path = str(tmp_path / "large.bin")
+        with open(path, 'wb') as stream:
+            stream.write(content)
+        put_block = service.put_block
+        calls = []
+
+        def fail(*args, **kwargs):
+            calls.append(1)
+            if len(calls) > 3:
+                raise AzureHttpError("denied", 403)
+            return put_block(*args, **kwargs)
+
+        service.put_block = fail
+        with pytest.raises(AzureHttpError):
+            fake_provider.put(source=path, destination="/")
+        service.put_block = put_block
+        uploaded = len(service.blocks["large.bin"])
+        assert 0 < uploaded < 6
+
+        calls = service.calls["put_block"]
+        fake_provider.put(source=path, destination="/")
+
+        assert service.calls["put_block"] == calls + 6 - uploaded
+        assert service.blobs["large.bin"][0] == content
+
+    def test_block_limit(self, fake_provider, tmp_path, monkeypatch):
+        HEADING()
+        service = fake_provider.storage_service.storage_service
+        monkeypatch.setattr(
+            "cloudmesh.storage.provider.azureblob.Provider.MAX_BLOCKS", 4)
+        fake_provider.block_size = 1024
+        fake_provider.block_threshold = 1024
+        content = os.urandom(10 * 1024)
+        path = str(tmp_path / "large.bin")
+        with open(path, 'wb') as stream:
+            stream.write(content)
+
+        fake_provider.put(source=path, destination="/")
+
+        # 10 blocks of 1024 bytes are too many, 4 blocks of 2560 are sent
+        assert service.calls["put_block"] == 4
+        assert [size for block, size in service.committed["large.bin"]] == \
+            [2560] * 4
+        assert service.blobs["large.bin"][0] == content
+
+        monkeypatch.setattr(
+            "cloudmesh.storage.provider.azureblob.Provider.MAX_BLOCK_SIZE",
+            2048)
+        with pytest.raises(ValueError):
+            fake_provider.put(source=path, destination="/copy.bin")
+        assert service.calls["put_block"] == 4